@@ -1,14 +1,249 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from game_logic.board import Board
 from game_logic.player import Player
 from game_logic.computerplayer import ComputerPlayer
 from game_logic.gamemanager import GameManager
+from game_logic import metrics
+from game_logic.computerturns import ComputerTurnScheduler
+from game_logic.events import EventBroker
+from game_logic.replay import ReplayCache, ReplayError, game_state
+from game_logic.persistence import ConcurrentUpdateError, GameRepository, MemoryBackend, create_backend
+from game_logic.sessionstore import GameSessionStore
+from game_logic.wireformat import BoardVersions, compact_state, encode_points
+from contextlib import contextmanager
+from functools import partial
 import json
+import logging
+import time
 
 app = Flask(__name__)
+logger = logging.getLogger(__name__)
+
+# Log level for the app and game_logic loggers; DEBUG traces every action
+app.config.setdefault("LOG_LEVEL", "WARNING")
+logging.basicConfig(format="%(asctime)s %(name)s %(levelname)s %(message)s")
+logging.getLogger("game_logic").setLevel(app.config["LOG_LEVEL"])
+logger.setLevel(app.config["LOG_LEVEL"])
+
+# Collect counters and timers and serve them at /api/metrics
+app.config.setdefault("METRICS_ENABLED", False)
+metrics.enable(app.config["METRICS_ENABLED"])
+
+# Strength of the computer opponent: search depth in plies and a per-move time budget in seconds
+app.config.setdefault("COMPUTER_SEARCH_DEPTH", 4)
+app.config.setdefault("COMPUTER_TIME_BUDGET", 0.5)
+# Processes a deep search splits its root moves across; 1 keeps every search in this process
+app.config.setdefault("COMPUTER_SEARCH_WORKERS", 1)
+# Endgame tablebase file built with `python -m game_logic.tablebase`, or None
+app.config.setdefault("TABLEBASE_PATH", None)
+# Opening book file built with `python -m game_logic.openingbook`, or None
+app.config.setdefault("OPENING_BOOK_PATH", None)
+# Evaluation weights file (see game_logic/evaluation.py and `python -m game_logic.tuning`), or None
+app.config.setdefault("EVALUATION_WEIGHTS_PATH", None)
+
+# Plan computer turns on background threads and deliver them through /api/events, so a
+# move request returns without waiting for the search; off plays them inside the request
+app.config.setdefault("ASYNC_COMPUTER_TURNS", True)
+app.config.setdefault("COMPUTER_TURN_WORKERS", 4)
+computer_turns = ComputerTurnScheduler(workers=app.config["COMPUTER_TURN_WORKERS"])
+
+# Longest /api/events long poll, and how long an event stream stays open (with a comment
+# line every EVENT_KEEPALIVE seconds) before the client reconnects
+app.config.setdefault("EVENT_POLL_TIMEOUT", 25)
+app.config.setdefault("EVENT_STREAM_SECONDS", 300)
+app.config.setdefault("EVENT_KEEPALIVE", 15)
+
+# Re-verify the incrementally tracked piece counts against a full recount after every action
+app.config.setdefault("DEBUG_CONSISTENCY_CHECKS", False)
+GameManager.debug_checks = app.config["DEBUG_CONSISTENCY_CHECKS"]
+
+# Actions each game remembers for /api/undo
+app.config.setdefault("UNDO_HISTORY", 256)
+GameManager.history_limit = app.config["UNDO_HISTORY"]
+
+# Running games, keyed by the game_id returned from /api/setup
+app.config.setdefault("MAX_GAMES", 10000)
+app.config.setdefault("GAME_IDLE_TTL", 3600)
+game_store = GameSessionStore(max_games=app.config["MAX_GAMES"], idle_ttl=app.config["GAME_IDLE_TTL"])
+game_events = EventBroker(max_games=app.config["MAX_GAMES"])
+
+# Board versions remembered per game for answering ``format=compact`` requests with only the changes
+app.config.setdefault("BOARD_VERSION_HISTORY", 64)
+board_versions = BoardVersions(history=app.config["BOARD_VERSION_HISTORY"], max_games=app.config["MAX_GAMES"])
+
+# Records indexed by /api/replay, kept for seeking with /api/replay/<replay_id>
+app.config.setdefault("REPLAY_CACHE_SIZE", 256)
+replays = ReplayCache(max_replays=app.config["REPLAY_CACHE_SIZE"])
+
+# Where games are persisted: a SQLite file shared by all workers, or None to keep them in memory
+app.config.setdefault("GAME_DATABASE", None)
+app.config.setdefault("GAME_LOG_COMPACT_EVERY", 64)
+game_repository = GameRepository(
+    create_backend(app.config["GAME_DATABASE"]), compact_every=app.config["GAME_LOG_COMPACT_EVERY"]
+)
+
+def forget_evicted_game(game_id):
+    """Drop the stored copy of a game the store evicted, unless it lives in a shared database."""
+    if isinstance(game_repository.backend, MemoryBackend):
+        # Nothing else can reach it, and load_session would otherwise bring it back forever
+        game_repository.delete(game_id)
+
+game_store.on_evict = forget_evicted_game
+
+def create_computer_player(player_id, pieces):
+    """Create a computer player configured from the app settings."""
+    return ComputerPlayer(
+        player_id, pieces,
+        search_depth=app.config["COMPUTER_SEARCH_DEPTH"],
+        time_budget=app.config["COMPUTER_TIME_BUDGET"],
+        tablebase_path=app.config["TABLEBASE_PATH"],
+        opening_book_path=app.config["OPENING_BOOK_PATH"],
+        search_workers=app.config["COMPUTER_SEARCH_WORKERS"],
+        weights_path=app.config["EVALUATION_WEIGHTS_PATH"]
+    )
 
-# Initialize global game_manager
-game_manager = None
+def create_game_manager(game_type, opponent_type, starting_player_id):
+    """Create a fresh game with the players for the given game type and opponent."""
+    board = Board(game_type)
+
+    if game_type == '9mm':
+        player1 = Player(1, 9)
+        player2 = create_computer_player(2, 9) if opponent_type == 'computer' else Player(2, 9)
+    else:
+        player1 = Player(1, 12)
+        player2 = create_computer_player(2, 12) if opponent_type == 'computer' else Player(2, 12)
+
+    return GameManager(board, player1, player2, game_type, starting_player_id, opponent_type=opponent_type)
+
+def request_option(name, type=None):
+    """Return a request parameter from the JSON body or, failing that, the query string."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or data.get(name) is None:
+        return request.args.get(name, type=type)
+    if type is None:
+        return data[name]
+    try:
+        return type(data[name])
+    except (TypeError, ValueError):
+        return None
+
+def find_session():
+    """Return the session named by the request's game_id, or None."""
+    return load_session(request_option('game_id'))
+
+def load_session(game_id):
+    """Return the session for ``game_id``, or None if there is no such game."""
+    if not game_id:
+        return None
+    session = game_store.get(game_id)
+    if session is None:
+        # Not in this process yet (or evicted): rehydrate it from storage
+        game_manager = game_repository.load(game_id)
+        if game_manager is None:
+            return None
+        session = game_store.add(game_id, game_manager)
+    return session
+
+@contextmanager
+def locked_game(session):
+    """Hold the game's lock, catching up on its stored log first and compacting it afterwards."""
+    with session.lock:
+        try:
+            # Another worker may have compacted the log past our copy, which then gets replaced
+            session.game_manager = game_repository.sync(session.game_manager)
+            if app.config["ASYNC_COMPUTER_TURNS"]:
+                session.game_manager.computer_turns_enabled = False  # start_computer_turn schedules them
+            yield session.game_manager
+        except ConcurrentUpdateError:
+            # Another worker moved first; drop our copy so the next request reloads it
+            game_store.remove(session.game_id)
+            raise
+        game_repository.checkpoint(session.game_manager)
+
+def board_payload(session, game_manager, compact=None, since=None):
+    """Return the board for a response: the full grid, or with ``format=compact`` the compact board.
+
+    A compact request may pass ``since``, the last version it saw, to get only the changes.
+    Outside a request, pass ``compact`` (and ``since``) instead.
+    """
+    if compact is None:
+        compact = request_option('format') == 'compact'
+        since = request_option('since', type=int)
+    if not compact:
+        return game_manager.get_board_state()
+    return board_versions.board(session.game_id, game_manager, since)
+
+def publish_state(session, game_manager):
+    """Send the game's current state to everyone following its /api/events feed."""
+    # Clients following the feed in compact form will diff their next request against this version
+    board_versions.record(session.game_id, game_manager.version, encode_points(game_manager.board))
+    return game_events.publish(session.game_id, "state", game_state(game_manager))
+
+def start_computer_turn(session, game_manager):
+    """Start the computer's turn if it is due; call with the game locked.
+
+    With ASYNC_COMPUTER_TURNS the turn is planned in the background and True
+    is returned; the resulting state arrives as an /api/events event.
+    Otherwise the turn is played before this returns.
+    """
+    if not isinstance(game_manager.current_player, ComputerPlayer) or game_manager.check_game_over()["game_over"]:
+        return False
+    if not app.config["ASYNC_COMPUTER_TURNS"]:
+        logger.debug("Triggering computer turn...")
+        game_manager.handle_computer_turn()
+        return False
+    computer_turns.schedule(session.game_id, game_manager, partial(finish_computer_turn, session))
+    return True
+
+def finish_computer_turn(session, turn):
+    """Apply a computer turn planned in the background (runs on a worker thread)."""
+    with locked_game(session) as game_manager:
+        if not computer_turns.complete(session.game_id, turn):
+            logger.debug("Dropping cancelled computer turn for game %s", session.game_id)
+            return
+        if turn.is_stale(game_manager):
+            # The game changed while the turn was planned, e.g. in another worker; plan again if still due
+            logger.debug("Replanning stale computer turn for game %s", session.game_id)
+            start_computer_turn(session, game_manager)
+            return
+        if turn.apply(game_manager):
+            publish_state(session, game_manager)
+
+def after_action(session, game_manager, result, compact=None, since=None):
+    """Follow a successful human action: publish it and start the computer's reply.
+
+    ``compact`` and ``since`` are passed on to ``board_payload``.
+    """
+    result["waiting_for_removal"] = game_manager.waiting_for_removal  # Include removal state
+    if result.get("success"):
+        result["computer_thinking"] = start_computer_turn(session, game_manager)
+        result["event_id"] = publish_state(session, game_manager)
+    if "board" in result:
+        result["board"] = board_payload(session, game_manager, compact, since)
+    return result
+
+def unknown_game():
+    """Response for requests whose game_id is missing, unknown or expired."""
+    return jsonify(success=False, message="Unknown or expired game_id"), 404
+
+@app.before_request
+def start_request_timer():
+    if metrics.enabled:
+        g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    """Time every /api/* request, labelled by route rather than by raw path."""
+    started = g.pop("request_started", None)
+    if started is not None and request.path.startswith("/api/"):
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.REQUESTS.observe(time.perf_counter() - started, route, request.method, response.status_code)
+    return response
+
+@app.errorhandler(ConcurrentUpdateError)
+def concurrent_update(error):
+    """The game changed in another worker while this request was applying a move."""
+    return jsonify(success=False, message="The game was updated by another request; please retry"), 409
 
 @app.route('/api/setup', methods=['POST'])
 def setup_game():
@@ -19,35 +254,33 @@ def setup_game():
     opponent_type = data['opponentType']
     game_type = data['gameType']
 
-    global game_manager
-
-    board = Board(game_type)
-
-    if game_type == '9mm':
-        player1 = Player(1, 9)
-        player2 = ComputerPlayer(2, 9) if opponent_type == 'computer' else Player(2, 9)
-    else:
-        player1 = Player(1, 12)
-        player2 = ComputerPlayer(2, 12) if opponent_type == 'computer' else Player(2, 12)
-
     starting_player_id = 1 if starting_player == 'player1' else 2
 
     try:
-        game_manager = GameManager(board, player1, player2, game_type, starting_player_id, opponent_type=opponent_type)
-        print(f"GameManager initialized: Player 1 type: {type(player1)}, Player 2 type: {type(player2)}")
+        game_manager = create_game_manager(game_type, opponent_type, starting_player_id)
+        logger.debug("GameManager initialized: Player 1 type: %s, Player 2 type: %s", type(game_manager.player1), type(game_manager.player2))
     except Exception as e:
-        print(f"Error initializing GameManager: {e}")
+        logger.exception("Error initializing GameManager: %s", e)
         return jsonify(success=False, error="Internal server error"), 510
 
-    return jsonify(
-        success=True,
-        board=game_manager.get_board_state(),
-        current_player=game_manager.get_current_player(),
-        phase=game_manager.phase,
-        waiting_for_removal=game_manager.waiting_for_removal
-    )
+    session = game_store.create(game_manager)
+    game_repository.create(session.game_id, game_manager)
+
+    with locked_game(session):
+        # The computer may be the one to open the game
+        computer_thinking = start_computer_turn(session, game_manager)
+        return jsonify(
+            success=True,
+            game_id=session.game_id,
+            board=board_payload(session, game_manager),
+            current_player=game_manager.get_current_player(),
+            phase=game_manager.phase,
+            waiting_for_removal=game_manager.waiting_for_removal,
+            computer_thinking=computer_thinking,
+            event_id=publish_state(session, game_manager)
+        )
 
-def check_and_return_game_over():
+def check_and_return_game_over(game_manager):
     """Centralized check for game-over conditions."""
     game_over_status = game_manager.check_game_over()
     if game_over_status["game_over"]:
@@ -61,105 +294,287 @@ def check_and_return_game_over():
         )
     return None
 
-@app.route('/api/place', methods=['POST'])
-def place_piece():
-    """Place a piece on the board."""
-    global game_manager
+def action_response(name):
+    """Answer ``POST /api/<name>`` with the game action of that name from GAME_ACTIONS."""
+    session = find_session()
+    if session is None:
+        return unknown_game()
+    result, status = GAME_ACTIONS[name](session, request.get_json())
+    return jsonify(result), status
 
-    data = request.get_json()
+def place_action(session, data, compact=None, since=None):
+    """Place a piece at ``data``'s ``x``/``y``; returns ``(result, status)``."""
     x = data['x']
     y = data['y']
 
-    print(f"Received placement request for Player {game_manager.current_player.player_id} at ({x}, {y})")
-    result = game_manager.place_piece(x, y)
+    with locked_game(session) as game_manager:
+        logger.debug("Received placement request for Player %s at (%s, %s)", game_manager.current_player.player_id, x, y)
+        return after_action(session, game_manager, game_manager.place_piece(x, y), compact, since), 200
 
-    # Add `waiting_for_removal` to the response
-    result["waiting_for_removal"] = game_manager.waiting_for_removal
-
-    if result.get("success"):
-        # Trigger computer turn if applicable
-        if isinstance(game_manager.current_player, ComputerPlayer):
-            print("Triggering computer turn...")
-            game_manager.handle_computer_turn()
-
-    return jsonify(result)
-
-@app.route('/api/move', methods=['POST'])
-def move_piece():
-    """Move a piece on the board from one position to another."""
-    data = request.get_json()
-
-    print("Backend received move_piece payload:", data)
+def move_action(session, data, compact=None, since=None):
+    """Move a piece from ``from_x``/``from_y`` to ``to_x``/``to_y``; returns ``(result, status)``."""
+    logger.debug("Backend received move_piece payload: %s", data)
 
     if not data or 'from_x' not in data or 'from_y' not in data or 'to_x' not in data or 'to_y' not in data:
-        return jsonify(success=False, error="Invalid data: coordinates are missing"), 420
+        return {"success": False, "error": "Invalid data: coordinates are missing"}, 420
 
     from_x = data['from_x']
     from_y = data['from_y']
     to_x = data['to_x']
     to_y = data['to_y']
 
-    result = game_manager.move_piece(from_x, from_y, to_x, to_y)
+    with locked_game(session) as game_manager:
+        result = game_manager.move_piece(from_x, from_y, to_x, to_y)
+        return after_action(session, game_manager, result, compact, since), 200
 
-    result["waiting_for_removal"] = game_manager.waiting_for_removal  # Include removal state
-
-    return jsonify(result)
-
-@app.route('/api/remove', methods=['POST'])
-def remove_piece():
-    """Remove an opponent's piece from the board."""
-    data = request.get_json()
+def remove_action(session, data, compact=None, since=None):
+    """Remove the opponent's piece at ``data``'s ``x``/``y``; returns ``(result, status)``."""
     x = data['x']
     y = data['y']
 
-    result = game_manager.remove_piece(x, y)
+    with locked_game(session) as game_manager:
+        return after_action(session, game_manager, game_manager.remove_piece(x, y), compact, since), 200
 
-    result["waiting_for_removal"] = game_manager.waiting_for_removal  # Include removal state
+@app.route('/api/place', methods=['POST'])
+def place_piece():
+    """Place a piece on the board."""
+    return action_response("place")
 
-    return jsonify(result)
+@app.route('/api/move', methods=['POST'])
+def move_piece():
+    """Move a piece on the board from one position to another."""
+    return action_response("move")
+
+@app.route('/api/remove', methods=['POST'])
+def remove_piece():
+    """Remove an opponent's piece from the board."""
+    return action_response("remove")
 
 @app.route('/api/board', methods=['GET'])
 def get_board():
     """Get the current state of the board."""
-    return jsonify(
-        board=game_manager.get_board_state(),
-        current_player=game_manager.get_current_player(),
-        phase=game_manager.phase,
-        game_type=game_manager.game_type,
-        waiting_for_removal=game_manager.waiting_for_removal  # Include removal state
-    )
+    session = find_session()
+    if session is None:
+        return unknown_game()
 
-@app.route('/api/reset', methods=['POST'])
-def reset_board():
-    """Reset the board to its initial empty state."""
-    global game_manager
+    with locked_game(session) as game_manager:
+        return jsonify(
+            board=board_payload(session, game_manager),
+            current_player=game_manager.get_current_player(),
+            phase=game_manager.phase,
+            game_type=game_manager.game_type,
+            waiting_for_removal=game_manager.waiting_for_removal,  # Include removal state
+            computer_thinking=computer_turns.pending(session.game_id),
+            event_id=game_events.last_id(session.game_id)
+        )
 
-    game_type = game_manager.game_type
-    starting_player_id = 1
+@app.route('/api/legal-moves', methods=['GET'])
+def get_legal_moves():
+    """List the actions the current player may take, optionally only those from one point."""
+    session = find_session()
+    if session is None:
+        return unknown_game()
 
-    if game_type == '9mm':
-        player1 = Player(1, 9)
-        player2 = ComputerPlayer(2, 9) if game_manager.opponent_type == "computer" else Player(2, 9)
-    else:
-        player1 = Player(1, 12)
-        player2 = ComputerPlayer(2, 12) if game_manager.opponent_type == "computer" else Player(2, 12)
+    from_x = request.args.get('from_x', type=int)
+    from_y = request.args.get('from_y', type=int)
 
-    board = Board(game_type)
+    with locked_game(session) as game_manager:
+        moves = game_manager.legal_moves()
+        if from_x is not None and from_y is not None:
+            moves = [move for move in moves if move.from_pos == (from_x, from_y)]
+        return jsonify(
+            success=True,
+            current_player=game_manager.get_current_player(),
+            phase=game_manager.phase,
+            waiting_for_removal=game_manager.waiting_for_removal,
+            moves=[move.to_dict() for move in moves]
+        )
 
+@app.route('/api/replay', methods=['POST'])
+def replay_game():
+    """Validate and apply a whole game record in one call.
+
+    The body is a record (``{"moves": [...]}`` in algebraic notation) plus an
+    optional ``game_type`` and ``ply``; ``ply`` asks for the state after that
+    many moves as well as the final one. The record is kept under the
+    returned ``replay_id`` for seeking with ``GET /api/replay/<replay_id>``.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify(success=False, message="Expected a JSON game record"), 400
+
+    game_type = data.get('game_type', data.get('gameType', '9mm'))
+    ply = data.get('ply')
     try:
-        game_manager = GameManager(board, player1, player2, game_type, starting_player_id, opponent_type=game_manager.opponent_type)
-        print(f"GameManager reset: Player 1 type: {type(player1)}, Player 2 type: {type(player2)}")
-    except Exception as e:
-        print(f"Error resetting GameManager: {e}")
-        return jsonify(success=False, error="Internal server error"), 520
-
+        index = replays.index(data, game_type=game_type)
+        snapshot = index.state_at(ply) if ply is not None else None
+    except ReplayError as error:
+        return jsonify(success=False, message=str(error), move_index=error.index), 400
+    except (TypeError, ValueError) as error:
+        return jsonify(success=False, message=str(error)), 400
+
+    response = dict(success=True, replay_id=index.replay_id, moves_applied=index.plies, **index.final_state)
+    if snapshot is not None:
+        response['ply'] = ply
+        response['state_at_ply'] = snapshot
+    return jsonify(response)
+
+@app.route('/api/replay/<replay_id>', methods=['GET'])
+def seek_replay(replay_id):
+    """Return the state of an indexed record after ``ply`` moves (by default all of them)."""
+    index = replays.get(replay_id)
+    if index is None:
+        return jsonify(success=False, message="Unknown or expired replay_id; post the record again"), 404
+
+    ply = request.args.get('ply', index.plies, type=int)
+    try:
+        state = index.state_at(ply)
+    except ValueError as error:
+        return jsonify(success=False, message=str(error)), 400
+    if request.args.get('format') == 'compact':
+        state = compact_state(state)
+    return jsonify(success=True, replay_id=replay_id, ply=ply, plies=index.plies, **state)
+
+@app.route('/api/events', methods=['GET'])
+def get_events():
+    """Deliver the game's events, each carrying the full game state after a change.
+
+    Clients that accept ``text/event-stream`` (EventSource) get a stream of
+    Server-Sent Events; any other request is a long poll that returns as soon
+    as there is an event newer than ``after`` or ``timeout`` seconds pass.
+    ``after`` (or the Last-Event-ID header) is the last event id the client
+    has seen; without it only events published from now on are sent. With
+    ``format=compact`` the states carry compact boards.
+    """
+    session = find_session()
+    if session is None:
+        return unknown_game()
+    game_id = session.game_id
+
+    after = request.args.get('after', type=int)
+    if after is None:
+        after = request.headers.get('Last-Event-ID', type=int)
+    if after is None:
+        after = game_events.last_id(game_id)
+    encode = compact_state if request_option('format') == 'compact' else (lambda state: state)
+
+    if request.accept_mimetypes.best_match(['application/json', 'text/event-stream']) == 'text/event-stream':
+        def stream(last):
+            yield "retry: 1000\n\n"
+            closes = time.monotonic() + app.config["EVENT_STREAM_SECONDS"]
+            while time.monotonic() < closes:
+                wait = min(app.config["EVENT_KEEPALIVE"], closes - time.monotonic())
+                events = game_events.wait(game_id, last, max(wait, 0))
+                if not events:
+                    yield ": keepalive\n\n"
+                for event_id, event_type, data in events:
+                    last = event_id
+                    yield f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(encode(data))}\n\n"
+
+        return Response(stream(after), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    timeout = min(request.args.get('timeout', app.config["EVENT_POLL_TIMEOUT"], type=float),
+                  app.config["EVENT_POLL_TIMEOUT"])
+    events = game_events.wait(game_id, after, max(timeout, 0))
     return jsonify(
         success=True,
-        board=game_manager.get_board_state(),
-        current_player=game_manager.get_current_player(),
-        phase=game_manager.phase,
-        waiting_for_removal=game_manager.waiting_for_removal  # Include removal state
+        events=[{"id": event_id, "type": event_type, "data": encode(data)} for event_id, event_type, data in events],
+        last_event_id=events[-1][0] if events else after
     )
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Expose the counters and timers in the Prometheus text format."""
+    if not metrics.enabled:
+        return jsonify(success=False, message="Metrics are disabled"), 404
+    return Response(metrics.REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+def reset_action(session, data, compact=None, since=None):
+    """Start the game over with an empty board; returns ``(result, status)``."""
+    with session.lock:
+        # Abandon a computer turn still being searched for the old game
+        computer_turns.cancel(session.game_id)
+        previous = session.game_manager
+        starting_player_id = 1
+
+        try:
+            game_manager = create_game_manager(previous.game_type, previous.opponent_type, starting_player_id)
+            logger.debug("GameManager reset: Player 1 type: %s, Player 2 type: %s", type(game_manager.player1), type(game_manager.player2))
+        except Exception as e:
+            logger.exception("Error resetting GameManager: %s", e)
+            return {"success": False, "error": "Internal server error"}, 520
+
+        # Keep versions increasing across the reset, so no client mistakes the new game for an old version
+        game_manager.version = previous.version + 1
+        session.game_manager = game_manager
+        game_repository.create(session.game_id, game_manager)
+
+        return {
+            "success": True,
+            "game_id": session.game_id,
+            "board": board_payload(session, game_manager, compact, since),
+            "current_player": game_manager.get_current_player(),
+            "phase": game_manager.phase,
+            "waiting_for_removal": game_manager.waiting_for_removal,  # Include removal state
+            "event_id": publish_state(session, game_manager),
+        }, 200
+
+@app.route('/api/reset', methods=['POST'])
+def reset_board():
+    """Reset the board to its initial empty state."""
+    return action_response("reset")
+
+def step_history(session, game_manager, step):
+    """Undo or redo (``step``) an action, and against the computer carry on until a human is to move.
+
+    Returns the number of actions stepped over; call with the game locked.
+    """
+    # A reply still being searched belongs to the position being stepped away from
+    computer_turns.cancel(session.game_id)
+    steps = 0
+    while step():
+        steps += 1
+        if not isinstance(game_manager.current_player, ComputerPlayer):
+            break
+    return steps
+
+def history_action(name, session, data, compact=None, since=None):
+    """Undo or redo (``name``); returns ``(result, status)``."""
+    with locked_game(session) as game_manager:
+        steps = step_history(session, game_manager, getattr(game_manager, name))
+        result = {
+            "success": steps > 0,
+            "steps": steps,
+            "board": game_manager.get_board_state(),
+            "current_player": game_manager.get_current_player(),
+            "phase": game_manager.phase,
+            "can_undo": game_manager.can_undo,
+            "can_redo": game_manager.can_redo,
+        }
+        if not steps:
+            result["message"] = f"Nothing to {name}"
+        return after_action(session, game_manager, result, compact, since), 200
+
+@app.route('/api/undo', methods=['POST'])
+def undo_action():
+    """Take back the latest action; against the computer, back to before the player's latest move."""
+    return action_response("undo")
+
+@app.route('/api/redo', methods=['POST'])
+def redo_action():
+    """Apply the latest undone action again, with the computer's recorded reply to it."""
+    return action_response("redo")
+
+# What a player can do to a game, by name: POST /api/<name> and the ASGI WebSocket's messages.
+# Each takes the session, the action's JSON object and the board format, and returns (result, status)
+GAME_ACTIONS = {
+    "place": place_action,
+    "move": move_action,
+    "remove": remove_action,
+    "reset": reset_action,
+    "undo": partial(history_action, "undo"),
+    "redo": partial(history_action, "redo"),
+}
+
 if __name__ == '__main__':
     app.run(debug=True)
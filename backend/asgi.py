@@ -0,0 +1,379 @@
+"""ASGI entry point for the game API.
+
+Serves the same ``/api/*`` routes and JSON contracts as the Flask app in
+``app.py``, from an event loop instead of a thread per request::
+
+    pip install uvicorn
+    uvicorn asgi:app --workers 4
+
+Rules requests (setup, place, move, remove, board, legal moves, replay,
+reset, metrics) run through the Flask app itself, so the two modes cannot
+drift apart. They wait for game locks and may read and write the SQLite
+game database, so they run on the loop's default thread pool rather than
+on the loop itself; so does every other lookup or action on a game below.
+Computer turns are planned on the background executor of
+``ComputerTurnScheduler``. ``/api/events`` is served natively: a long poll or an
+event stream waits on the loop without holding a thread, which is what lets
+one process follow many more games at once than the threaded Flask server.
+See ``loadtest.py`` for a comparison of the two.
+
+``/api/ws?game_id=...`` is a WebSocket channel for one game. The server
+first sends the current state, then every event of the game as soon as it
+is published, including the computer's moves::
+
+    {"type": "event", "id": 7, "event": "state", "data": {...}}
+
+Players send actions as ``{"type": "place", "x": 0, "y": 0, "id": 1}``
+(or ``move`` with ``from_x``/``from_y``/``to_x``/``to_y``, ``remove``,
+``reset``, ``undo``, ``redo``) and get ``{"type": "result", "id": 1,
+"status": 200, "data": {...}}`` back, ``data`` being what the matching
+``POST /api/<type>`` route returns; the actions are run directly from
+``GAME_ACTIONS`` rather than through Flask. Any number of connections may follow a game; with
+``role=spectator`` a connection only watches. With ``format=compact`` the
+states carry compact boards, and after the first one only the points that
+changed since the previous state (``since`` and ``changes``, see
+``game_logic/wireformat.py``).
+"""
+import asyncio
+import io
+import json
+import sys
+import time
+from urllib.parse import parse_qs
+
+from app import app as flask_app
+from app import GAME_ACTIONS, computer_turns, game_events, load_session, locked_game
+from game_logic import metrics
+from game_logic.persistence import ConcurrentUpdateError
+from game_logic.replay import game_state
+from game_logic.wireformat import compact_state, diff_points
+
+# Messages a player may send on a game's WebSocket, each the game action of the same name
+WEBSOCKET_ACTIONS = tuple(GAME_ACTIONS)
+
+
+class EventWaiters:
+    """Lets coroutines wait for a game's next event, whichever thread publishes it."""
+
+    def __init__(self, broker):
+        self.broker = broker
+        self._loop = None
+        self._waiters = {}  # game_id -> set of asyncio.Event
+        broker.add_listener(self._published)
+
+    def _published(self, game_id, event_id):
+        loop = self._loop
+        if loop is not None and game_id in self._waiters:
+            loop.call_soon_threadsafe(self._wake, game_id)
+
+    def _wake(self, game_id):
+        for waiter in self._waiters.pop(game_id, ()):
+            waiter.set()
+
+    async def wait(self, game_id, after, timeout):
+        """Return the game's events newer than ``after``, waiting up to ``timeout`` seconds for one."""
+        loop = self._loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            waiter = asyncio.Event()
+            self._waiters.setdefault(game_id, set()).add(waiter)
+            # Checked after registering, so an event published in between still wakes us
+            events = self.broker.events_after(game_id, after)
+            remaining = deadline - loop.time()
+            if events or remaining <= 0:
+                self._forget(game_id, waiter)
+                return events
+            try:
+                await asyncio.wait_for(waiter.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._forget(game_id, waiter)
+
+    def _forget(self, game_id, waiter):
+        waiters = self._waiters.get(game_id)
+        if waiters is not None:
+            waiters.discard(waiter)
+            if not waiters:
+                del self._waiters[game_id]
+
+
+event_waiters = EventWaiters(game_events)
+
+
+async def app(scope, receive, send):
+    """The ASGI application."""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+    elif scope["type"] == "http":
+        body = await _read_body(receive)
+        if scope["path"] == "/api/events":
+            await _events(scope, send)
+        else:
+            await _send_wsgi_response(send, *await asyncio.to_thread(_call_flask, scope, body))
+    elif scope["type"] == "websocket":
+        await _websocket(scope, receive, send)
+    else:
+        raise ValueError(f"Unsupported ASGI scope type {scope['type']!r}")
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            computer_turns.shutdown()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+def _call_flask(scope, body):
+    """Run one request through the Flask app; returns ``(status, headers, body)``."""
+    headers = [(name.decode("latin-1"), value.decode("latin-1")) for name, value in scope["headers"]]
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"],
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in headers:
+        key = name.upper().replace("-", "_")
+        if key == "CONTENT_TYPE":
+            environ[key] = value
+        elif key != "CONTENT_LENGTH":
+            environ[f"HTTP_{key}"] = value
+    response = {}
+
+    def start_response(status, response_headers, exc_info=None):
+        response["status"] = int(status.split(" ", 1)[0])
+        response["headers"] = response_headers
+
+    chunks = flask_app.wsgi_app(environ, start_response)
+    try:
+        content = b"".join(chunks)
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+    return response["status"], response["headers"], content
+
+
+async def _send_wsgi_response(send, status, headers, body):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_json(send, status, data):
+    body = json.dumps(data).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _query(scope):
+    return {name: values[-1] for name, values in parse_qs(scope["query_string"].decode("latin-1")).items()}
+
+
+async def _events(scope, send):
+    """``/api/events``: the same long poll and event stream as the Flask route, waiting on the loop."""
+    started = time.perf_counter()
+    query = _query(scope)
+    headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+    status = 200
+    session = await asyncio.to_thread(load_session, query.get("game_id"))
+    if session is None:
+        status = 404
+        await _send_json(send, status, {"success": False, "message": "Unknown or expired game_id"})
+    else:
+        game_id = session.game_id
+        after = _int(query.get("after"))
+        if after is None:
+            after = _int(headers.get("last-event-id"))
+        if after is None:
+            after = game_events.last_id(game_id)
+        encode = compact_state if query.get("format") == "compact" else (lambda state: state)
+        accept = headers.get("accept", "")
+        if "text/event-stream" in accept and "application/json" not in accept:
+            await _stream_events(send, game_id, after, encode)
+        else:
+            timeout = flask_app.config["EVENT_POLL_TIMEOUT"]
+            requested = query.get("timeout")
+            try:
+                timeout = min(float(requested), timeout) if requested is not None else timeout
+            except ValueError:
+                pass
+            events = await event_waiters.wait(game_id, after, max(timeout, 0))
+            await _send_json(send, status, {
+                "success": True,
+                "events": [{"id": event_id, "type": event_type, "data": encode(data)}
+                           for event_id, event_type, data in events],
+                "last_event_id": events[-1][0] if events else after,
+            })
+    if metrics.enabled:
+        metrics.REQUESTS.observe(time.perf_counter() - started, "/api/events", scope["method"], status)
+
+
+async def _stream_events(send, game_id, last, encode):
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"text/event-stream; charset=utf-8"), (b"cache-control", b"no-cache")],
+    })
+    await send({"type": "http.response.body", "body": b"retry: 1000\n\n", "more_body": True})
+    loop = asyncio.get_running_loop()
+    closes = loop.time() + flask_app.config["EVENT_STREAM_SECONDS"]
+    while loop.time() < closes:
+        wait = min(flask_app.config["EVENT_KEEPALIVE"], closes - loop.time())
+        events = await event_waiters.wait(game_id, last, max(wait, 0))
+        chunk = "" if events else ": keepalive\n\n"
+        for event_id, event_type, data in events:
+            last = event_id
+            chunk += f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(encode(data))}\n\n"
+        await send({"type": "http.response.body", "body": chunk.encode(), "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+class _GameChannel:
+    """The sending side of one WebSocket following a game."""
+
+    def __init__(self, send, compact):
+        self._send = send
+        self.compact = compact
+        self._points = None  # The last board sent, to send the next one as changes
+        self._version = None
+
+    async def send_json(self, data):
+        await self._send({"type": "websocket.send", "text": json.dumps(data)})
+
+    async def push(self, event_id, event_type, state):
+        if self.compact:
+            state = compact_state(state)
+            board = state["board"]
+            points = board["points"]
+            if self._points is not None:
+                del board["points"]
+                board["since"] = self._version
+                board["changes"] = diff_points(self._points, points)
+            self._points, self._version = points, board["version"]
+        await self.send_json({"type": "event", "id": event_id, "event": event_type, "data": state})
+
+
+async def _websocket(scope, receive, send):
+    """``/api/ws``: a game's channel for sending actions and hearing every event as it happens."""
+    if (await receive())["type"] != "websocket.connect":
+        return
+    query = _query(scope)
+    session = None
+    if scope["path"] == "/api/ws":
+        session = await asyncio.to_thread(load_session, query.get("game_id"))
+    if session is None:
+        await send({"type": "websocket.close", "code": 4404})
+        return
+    await send({"type": "websocket.accept"})
+    channel = _GameChannel(send, query.get("format") == "compact")
+    last, state = await asyncio.to_thread(_current_state, session)
+    await channel.push(last, "state", state)
+    pusher = asyncio.ensure_future(_push_events(channel, session.game_id, last))
+    try:
+        while True:
+            message = await receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message["type"] == "websocket.receive":
+                text = message.get("text")
+                if text is None:
+                    text = (message.get("bytes") or b"").decode("utf-8", "replace")
+                await _handle_message(channel, session, query.get("role") == "spectator", text)
+    finally:
+        pusher.cancel()
+
+
+def _current_state(session):
+    with locked_game(session) as game_manager:
+        return game_events.last_id(session.game_id), game_state(game_manager)
+
+
+async def _push_events(channel, game_id, last):
+    while True:
+        events = await event_waiters.wait(game_id, last, flask_app.config["EVENT_KEEPALIVE"])
+        for event_id, event_type, data in events:
+            last = event_id
+            await channel.push(event_id, event_type, data)
+
+
+async def _handle_message(channel, session, spectator, text):
+    try:
+        message = json.loads(text)
+    except ValueError:
+        message = None
+    if not isinstance(message, dict):
+        await channel.send_json({"type": "error", "message": "Expected a JSON object"})
+        return
+    kind, message_id = message.get("type"), message.get("id")
+    if kind == "ping":
+        await channel.send_json({"type": "pong", "id": message_id})
+    elif kind not in WEBSOCKET_ACTIONS:
+        await channel.send_json({"type": "error", "id": message_id, "message": f"Unknown message type {kind!r}"})
+    elif spectator:
+        await channel.send_json({"type": "error", "id": message_id, "message": "Spectators cannot play"})
+    else:
+        data = {key: value for key, value in message.items() if key not in ("type", "id")}
+        compact = channel.compact or data.get("format") == "compact"
+        data, status = await asyncio.to_thread(_run_action, kind, session, data, compact, _int(data.get("since")))
+        await channel.send_json({"type": "result", "id": message_id, "status": status, "data": data})
+
+
+def _run_action(kind, session, data, compact, since):
+    """Run a game action for a WebSocket message; returns ``(result, status)`` like its route."""
+    try:
+        return GAME_ACTIONS[kind](session, data, compact, since)
+    except ConcurrentUpdateError:
+        return {"success": False, "message": "The game was updated by another request; please retry"}, 409
+    except (KeyError, TypeError, ValueError):
+        return {"success": False, "message": "Invalid action"}, 400
+
+
+if __name__ == "__main__":
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("Serving the ASGI app needs an ASGI server: pip install uvicorn")
+    uvicorn.run("asgi:app")
@@ -0,0 +1,531 @@
+"""Speed benchmarks for the rules core, the computer player and the HTTP API.
+
+Each benchmark times one operation (a mill check, a move generation, a
+computer turn, a self-play game, a request to an /api/* route) on fixed,
+seeded positions, repeating it until a run lasts at least ``--min-time``
+seconds and keeping the best of ``--repeat`` runs. Results are written as
+JSON and can be compared against a stored baseline; any benchmark more
+than ``--tolerance`` slower than its baseline makes the run fail::
+
+    python benchmark.py                                   # run everything
+    python benchmark.py --filter rules. --filter ai.      # only some groups
+    python benchmark.py --baseline benchmark_baseline.json --output results.json
+    python benchmark.py --save-baseline benchmark_baseline.json
+
+Baselines are only meaningful on the machine that recorded them: record one
+before a change, then compare after it.
+"""
+import argparse
+import gc
+import itertools
+import json
+import logging
+import platform
+import random
+import statistics
+import sys
+import time
+
+from game_logic import batcheval
+from game_logic.bitboard import get_geometry
+from game_logic.computerplayer import ComputerPlayer
+from game_logic.notation import format_move
+from game_logic.position import Position
+from game_logic.replay import ReplayIndex, new_game
+from game_logic.search import SearchEngine
+from game_logic.selfplay import parse_agent, play_game
+
+FORMAT_VERSION = 1
+# A benchmark this much slower than its baseline (as a fraction) is a regression
+DEFAULT_TOLERANCE = 0.3
+DEFAULT_REPEAT = 5
+# Each timed run repeats the operation until it lasts at least this many seconds
+DEFAULT_MIN_TIME = 0.2
+
+BENCHMARKS = []
+
+
+def benchmark(name, per_call=1):
+    """Register a benchmark.
+
+    The decorated function does the untimed setup and returns the operation
+    to time; ``per_call`` is how many operations one call of it performs.
+    """
+    def register(setup):
+        BENCHMARKS.append((name, setup, per_call))
+        return setup
+    return register
+
+
+def random_game(game_type, seed, actions, phase=None, record=None):
+    """Play seeded random actions and return the game, stopping early once it reaches ``phase``.
+
+    Pass a list as ``record`` to collect the game's moves in record notation.
+    """
+    rng = random.Random(seed)
+    game_manager = new_game(game_type)
+    if record is not None:
+        game_manager.action_listeners.append(lambda _, action: record.append(format_move(action)))
+    for _ in range(actions):
+        if phase is not None and game_manager.phase == phase and not game_manager.waiting_for_removal:
+            break
+        options = game_manager.legal_moves()
+        if not options:
+            break
+        move = rng.choice(options).to_dict()
+        move["player"] = game_manager.current_player.player_id
+        game_manager.apply_action(move)
+    return game_manager
+
+
+def quiet_placements(game_type="9mm"):
+    """Return a placing phase, as (x, y) points alternating from Player 1, in which nobody closes a mill."""
+    geometry = get_geometry(game_type)
+    pieces = 12 if game_type == "12mm" else 9
+    bits = [0, 0, 0]
+    points = []
+    for turn in range(2 * pieces):
+        player = 1 + turn % 2
+        occupied = bits[1] | bits[2]
+        index = next(
+            i for i in range(len(geometry.points))
+            if not occupied >> i & 1 and not geometry.closes_mill(bits[player], i)
+        )
+        bits[player] |= 1 << index
+        points.append(geometry.points[index])
+    return points
+
+
+def quiet_move(game_manager, avoid=()):
+    """Return a ``(from, to)`` slide for the side to move that closes no mill either way, or None."""
+    geometry = get_geometry(game_manager.game_type)
+    position = Position.from_game(game_manager)
+    own = position.bits[position.side]
+    for src, dst, rem in position.legal_moves():
+        if rem < 0 and geometry.points[dst] not in avoid and not geometry.closes_mill(own & ~(1 << src), src):
+            return geometry.points[src], geometry.points[dst]
+    return None
+
+
+# Rules core
+
+@benchmark("rules.check_for_mill", per_call=24)
+def bench_check_for_mill():
+    game_manager = random_game("9mm", 1, 40)
+    board, player = game_manager.board, game_manager.player1
+    points = board.board_positions
+    return lambda: [board.check_for_mill(x, y, player) for x, y in points]
+
+
+@benchmark("rules.legal_moves.placing")
+def bench_legal_moves_placing():
+    game_manager = random_game("9mm", 2, 8)
+    return game_manager.legal_moves
+
+
+@benchmark("rules.legal_moves.moving")
+def bench_legal_moves_moving():
+    game_manager = random_game("9mm", 3, 60, phase="moving")
+    return game_manager.legal_moves
+
+
+@benchmark("rules.check_game_over")
+def bench_check_game_over():
+    game_manager = random_game("9mm", 3, 60, phase="moving")
+    return game_manager.check_game_over
+
+
+@benchmark("rules.generate_moves.bitboard")
+def bench_generate_moves():
+    position = Position.from_game(random_game("9mm", 3, 60, phase="moving"))
+    engine = SearchEngine("9mm")
+    bits, hand = list(position.bits), list(position.hand)
+    return lambda: engine.generate_moves(bits, hand, position.side)
+
+
+@benchmark("rules.position.make_unmake")
+def bench_make_unmake():
+    position = Position.from_game(random_game("9mm", 3, 60, phase="moving"))
+    moves = position.legal_moves()
+
+    def make_unmake():
+        for move in moves:
+            position.make(move).unmake(move)
+    return make_unmake
+
+
+@benchmark("rules.undo_redo", per_call=120)
+def bench_undo_redo():
+    game_manager = random_game("9mm", 5, 60)
+    steps = len(game_manager.history)
+
+    def undo_redo():
+        for _ in range(steps):
+            game_manager.undo()
+        for _ in range(steps):
+            game_manager.redo()
+    return undo_redo
+
+
+@benchmark("rules.replay_index")
+def bench_replay_index():
+    moves = []
+    random_game("9mm", 5, 120, record=moves)
+    return lambda: ReplayIndex({"moves": moves})
+
+
+# Computer player
+
+def _computer_turn(game_manager, depth):
+    player = game_manager.current_player
+    opponent = game_manager.get_opponent()
+    board = game_manager.board
+
+    def turn():
+        # A fresh player each time, so no turn reuses an earlier turn's transposition table
+        computer = ComputerPlayer(player.player_id, player.pieces, search_depth=depth)
+        if game_manager.phase == "placing":
+            computer.decide_placement(board, opponent)
+        else:
+            computer.decide_move(board, opponent)
+    return turn
+
+
+for _depth in (1, 2, 3, 4):
+    benchmark(f"ai.turn.placing.depth{_depth}")(
+        lambda depth=_depth: _computer_turn(random_game("9mm", 4, 8), depth)
+    )
+    benchmark(f"ai.turn.moving.depth{_depth}")(
+        lambda depth=_depth: _computer_turn(random_game("9mm", 3, 60, phase="moving"), depth)
+    )
+
+
+@benchmark("ai.turn.greedy")
+def bench_greedy_turn():
+    return _computer_turn(random_game("9mm", 3, 60, phase="moving"), 0)
+
+
+# Self-play
+
+@benchmark("selfplay.greedy_vs_greedy")
+def bench_selfplay_greedy():
+    agent = parse_agent("greedy")
+    return lambda: play_game("9mm", agent, agent, seed=1)
+
+
+@benchmark("selfplay.search2_vs_greedy")
+def bench_selfplay_search():
+    search, greedy = parse_agent("search:2"), parse_agent("greedy")
+    return lambda: play_game("9mm", search, greedy, seed=1, max_plies=200)
+
+
+# Evaluation
+
+EVAL_POSITIONS = 1000
+
+
+def sample_positions(game_type, count, seed=0):
+    """Return ``count`` positions met along seeded random games."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        game_manager = random_game(game_type, rng.random(), 0)
+        for _ in range(200):
+            if len(positions) == count:
+                break
+            positions.append(Position.from_game(game_manager))
+            options = game_manager.legal_moves()
+            if not options:
+                break
+            move = rng.choice(options).to_dict()
+            move["player"] = game_manager.current_player.player_id
+            game_manager.apply_action(move)
+    return positions
+
+
+@benchmark("eval.scalar", per_call=EVAL_POSITIONS)
+def bench_eval_scalar():
+    engine = SearchEngine("9mm")
+    boards = [(list(p.bits), list(p.hand), p.side) for p in sample_positions("9mm", EVAL_POSITIONS)]
+    return lambda: [engine.evaluate(bits, hand, side) for bits, hand, side in boards]
+
+
+if batcheval.np is not None:
+    @benchmark("eval.batch", per_call=EVAL_POSITIONS)
+    def bench_eval_batch():
+        evaluator = batcheval.BatchEvaluator("9mm")
+        arrays = batcheval.positions_to_arrays(sample_positions("9mm", EVAL_POSITIONS))
+        return lambda: evaluator.scores(*arrays)
+
+
+# HTTP API, through Flask's test client (one operation is one request)
+
+def _client():
+    from app import app
+    app.config["TESTING"] = True
+    return app.test_client()
+
+
+def _setup_game(client, opponent_type="human"):
+    data = client.post('/api/setup', json={
+        'firstPlayer': 'player1', 'opponentType': opponent_type, 'gameType': '9mm'
+    }).get_json()
+    return data['game_id']
+
+
+def _moving_game(client):
+    """Set up a human game through the API and play it into the moving phase."""
+    game_id = _setup_game(client)
+    game_manager = new_game("9mm")
+    for x, y in quiet_placements():
+        client.post('/api/place', json={'game_id': game_id, 'x': x, 'y': y})
+        game_manager.place_piece(x, y)
+    return game_id, game_manager
+
+
+@benchmark("http.setup")
+def bench_http_setup():
+    client = _client()
+    return lambda: client.post('/api/setup', json={'firstPlayer': 'player1', 'opponentType': 'human', 'gameType': '9mm'})
+
+
+@benchmark("http.board")
+def bench_http_board():
+    client = _client()
+    game_id = _setup_game(client)
+    return lambda: client.get('/api/board', query_string={'game_id': game_id})
+
+
+@benchmark("http.board.compact")
+def bench_http_board_compact():
+    client = _client()
+    game_id = _setup_game(client)
+    query = {'game_id': game_id, 'format': 'compact', 'since': 0}
+    return lambda: client.get('/api/board', query_string=query)
+
+
+@benchmark("http.legal_moves")
+def bench_http_legal_moves():
+    client = _client()
+    game_id, _ = _moving_game(client)
+    return lambda: client.get('/api/legal-moves', query_string={'game_id': game_id})
+
+
+@benchmark("http.reset_and_place", per_call=19)
+def bench_http_place():
+    client = _client()
+    game_id = _setup_game(client)
+    placements = quiet_placements()
+
+    def reset_and_place():
+        client.post('/api/reset', json={'game_id': game_id})
+        for x, y in placements:
+            client.post('/api/place', json={'game_id': game_id, 'x': x, 'y': y})
+    return reset_and_place
+
+
+@benchmark("http.move", per_call=4)
+def bench_http_move():
+    client = _client()
+    game_id, game_manager = _moving_game(client)
+    first = quiet_move(game_manager)
+    game_manager.move_piece(*first[0], *first[1])
+    second = quiet_move(game_manager, avoid=[first[0]])
+    # Each side slides a piece out and back, which leaves the game where it started
+    sequence = [(first[0], first[1]), (second[0], second[1]), (first[1], first[0]), (second[1], second[0])]
+
+    def move():
+        for (from_x, from_y), (to_x, to_y) in sequence:
+            response = client.post('/api/move', json={
+                'game_id': game_id, 'from_x': from_x, 'from_y': from_y, 'to_x': to_x, 'to_y': to_y
+            })
+        return response.get_json()["success"]
+    assert move(), "the benchmark's move sequence was rejected"
+    return move
+
+
+@benchmark("http.reset_place_remove", per_call=7)
+def bench_http_remove():
+    client = _client()
+    game_id = _setup_game(client)
+    # Player 1 closes the top row and captures
+    opening = [(0, 0), (1, 1), (0, 3), (1, 3), (0, 6)]
+
+    def reset_place_remove():
+        client.post('/api/reset', json={'game_id': game_id})
+        for x, y in opening:
+            client.post('/api/place', json={'game_id': game_id, 'x': x, 'y': y})
+        client.post('/api/remove', json={'game_id': game_id, 'x': 1, 'y': 1})
+    return reset_place_remove
+
+
+@benchmark("http.replay")
+def bench_http_replay():
+    client = _client()
+    moves = []
+    random_game("9mm", 5, 120, record=moves)
+    return lambda: client.post('/api/replay', json={'moves': moves, 'game_type': '9mm'})
+
+
+@benchmark("http.replay.seek")
+def bench_http_replay_seek():
+    client = _client()
+    moves = []
+    random_game("9mm", 5, 120, record=moves)
+    replay_id = client.post('/api/replay', json={'moves': moves, 'game_type': '9mm'}).get_json()['replay_id']
+    plies = list(range(len(moves) + 1))
+    random.Random(0).shuffle(plies)
+    seeks = itertools.cycle(plies)
+    return lambda: client.get(f'/api/replay/{replay_id}', query_string={'ply': next(seeks)})
+
+
+@benchmark("http.events")
+def bench_http_events():
+    client = _client()
+    game_id = _setup_game(client)
+    return lambda: client.get('/api/events', query_string={'game_id': game_id, 'after': 0, 'timeout': 0})
+
+
+@benchmark("http.place_vs_computer")
+def bench_http_computer():
+    from app import app
+    client = _client()
+    game_id = _setup_game(client, opponent_type="computer")
+
+    def place_vs_computer():
+        # Played inside the request, so the time includes the computer's reply
+        async_turns, app.config["ASYNC_COMPUTER_TURNS"] = app.config["ASYNC_COMPUTER_TURNS"], False
+        try:
+            client.post('/api/reset', json={'game_id': game_id})
+            client.post('/api/place', json={'game_id': game_id, 'x': 0, 'y': 0})
+        finally:
+            app.config["ASYNC_COMPUTER_TURNS"] = async_turns
+    return place_vs_computer
+
+
+def measure(operation, per_call=1, repeat=DEFAULT_REPEAT, min_time=DEFAULT_MIN_TIME):
+    """Time ``operation``; returns seconds per operation for the best and median run.
+
+    The garbage collector is paused while timing, as ``timeit`` does, so a
+    collection triggered by earlier work does not land in one run.
+    """
+    collecting = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        return _measure(operation, per_call, repeat, min_time)
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def _measure(operation, per_call, repeat, min_time):
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            operation()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    runs = [elapsed]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            operation()
+        runs.append(time.perf_counter() - started)
+    scale = number * per_call
+    return {
+        "seconds": min(runs) / scale,
+        "median": statistics.median(runs) / scale,
+        "calls": number,
+        "repeat": repeat,
+    }
+
+
+def run_benchmarks(filters=(), repeat=DEFAULT_REPEAT, min_time=DEFAULT_MIN_TIME, progress=None):
+    """Run every registered benchmark whose name starts with one of ``filters`` (all if none)."""
+    results = {}
+    for name, setup, per_call in BENCHMARKS:
+        if filters and not any(name.startswith(prefix) for prefix in filters):
+            continue
+        results[name] = measure(setup(), per_call, repeat, min_time)
+        if progress:
+            progress(name, results[name])
+    return {
+        "version": FORMAT_VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return ``(name, seconds, baseline seconds, ratio, regressed)`` for benchmarks in both runs."""
+    rows = []
+    for name, result in results["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        ratio = result["seconds"] / previous["seconds"] if previous["seconds"] else float("inf")
+        rows.append((name, result["seconds"], previous["seconds"], ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def _format_seconds(seconds):
+    if seconds >= 1:
+        return f"{seconds:.3f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f}ms"
+    return f"{seconds * 1e6:.2f}us"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the rules core, the computer player and the HTTP API.")
+    parser.add_argument("--filter", action="append", default=[], help="only run benchmarks starting with this prefix")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed runs per benchmark")
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME, help="minimum seconds per timed run")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against this results file and fail on regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown against the baseline, as a fraction")
+    parser.add_argument("--save-baseline", help="also write the results to this file as the new baseline")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, _, _ in BENCHMARKS:
+            print(name)
+        return 0
+
+    # Keep request logging and debug traces out of the timings
+    logging.getLogger("game_logic").setLevel(logging.WARNING)
+    results = run_benchmarks(
+        args.filter, args.repeat, args.min_time,
+        progress=lambda name, result: print(f"{name:<34} {_format_seconds(result['seconds']):>12}", flush=True)
+    )
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+                f.write("\n")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline, args.tolerance)
+    print(f"\nAgainst {args.baseline} (tolerance {args.tolerance:.0%}):")
+    for name, seconds, previous, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<34} {_format_seconds(seconds):>12} {_format_seconds(previous):>12} {ratio:6.2f}x{flag}")
+    regressions = [row[0] for row in rows if row[4]]
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+import random
+
+from . import metrics
+from .board import Board, _GridRow
+
+# Zobrist keys: one random 64-bit number per (player, point), per (player, pieces in hand)
+# and for player 2 to move. Seeded so keys are stable across processes and restarts.
+_zobrist_random = random.Random(0x4D4F52524953)
+ZOBRIST_PIECES = [[_zobrist_random.getrandbits(64) for _ in range(24)] for _ in range(3)]
+ZOBRIST_HAND = [[_zobrist_random.getrandbits(64) for _ in range(13)] for _ in range(3)]
+ZOBRIST_SIDE = _zobrist_random.getrandbits(64)
+
+
+def zobrist_key(bits):
+    """Return the Zobrist key of the pieces in ``bits`` (a list indexed by player id)."""
+    key = 0
+    for player_id in (1, 2):
+        table = ZOBRIST_PIECES[player_id]
+        for index in iter_bits(bits[player_id]):
+            key ^= table[index]
+    return key
+
+
+def position_key(bits, hand, player_id):
+    """Return the Zobrist key of a full position: pieces, pieces in hand and side to move."""
+    key = zobrist_key(bits) ^ ZOBRIST_HAND[1][hand[1]] ^ ZOBRIST_HAND[2][hand[2]]
+    if player_id == 2:
+        key ^= ZOBRIST_SIDE
+    return key
+
+
+def iter_bits(mask):
+    """Yield the point index of every set bit in mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def popcount(mask):
+    """Return the number of set bits in mask."""
+    return bin(mask).count("1")
+
+
+class BoardGeometry:
+    """Point indices and precomputed bit masks for one game type."""
+
+    def __init__(self, game_type):
+        self.game_type = game_type
+        self.points = tuple(Board.board_positions)
+        self.index = {pos: i for i, pos in enumerate(self.points)}
+        self.full_mask = (1 << len(self.points)) - 1
+
+        # Adjacency masks, including the diagonals for 12 Men's Morris
+        adjacency = {pos: list(neighbors) for pos, neighbors in Board.default_adjacent_positions.items()}
+        if game_type == "12mm":
+            for pos, neighbors in Board.additional_adjacent_positions_12mm.items():
+                adjacency[pos].extend(neighbors)
+        self.adjacent = tuple(self.mask_of(adjacency[pos]) for pos in self.points)
+
+        # Every mill line as a 3-bit mask (the tables list each line once per member)
+        tables = [Board.mill_combinations]
+        if game_type == "12mm":
+            tables.append(Board.mill_combinations_12mens)
+        mills = set()
+        for table in tables:
+            for pos, pairs in table.items():
+                for pair in pairs:
+                    mills.add(self.mask_of([pos] + list(pair)))
+        self.mills = tuple(sorted(mills))
+        self.mills_at = tuple(
+            tuple(mill for mill in self.mills if mill >> i & 1) for i in range(len(self.points))
+        )
+
+        # Board symmetries as point permutations, their inverses, and per-byte lookup tables
+        # so a 24-bit mask is permuted with three lookups
+        self.symmetries = Board.symmetries(game_type)
+        self.inverse_symmetries = tuple(
+            tuple(perm.index(i) for i in range(len(perm))) for perm in self.symmetries
+        )
+        self._symmetry_tables = tuple(
+            tuple(tuple(self._permute_slow(perm, value << shift) for value in range(256)) for shift in (0, 8, 16))
+            for perm in self.symmetries
+        )
+
+    def mask_of(self, positions):
+        """Return the bit mask covering the given (x, y) positions."""
+        mask = 0
+        for pos in positions:
+            mask |= 1 << self.index[tuple(pos)]
+        return mask
+
+    @staticmethod
+    def _permute_slow(perm, mask):
+        result = 0
+        for index in iter_bits(mask):
+            result |= 1 << perm[index]
+        return result
+
+    def permute(self, mask, transform):
+        """Return ``mask`` with every point moved by symmetry number ``transform``."""
+        low, mid, high = self._symmetry_tables[transform]
+        return low[mask & 255] | mid[mask >> 8 & 255] | high[mask >> 16]
+
+    def canonical(self, first, second=0):
+        """Return ``(first, second, transform)`` for the symmetric image of a pair of masks.
+
+        The image chosen is the one with the smallest ``second << 24 | first``,
+        so symmetric positions always give the same pair back.
+        """
+        best = None
+        for transform, (low, mid, high) in enumerate(self._symmetry_tables):
+            key = (low[second & 255] | mid[second >> 8 & 255] | high[second >> 16]) << 24 \
+                | low[first & 255] | mid[first >> 8 & 255] | high[first >> 16]
+            if best is None or key < best:
+                best, best_transform = key, transform
+        return best & self.full_mask, best >> 24, best_transform
+
+    def closes_mill(self, mask, index):
+        """Return True if a piece on point ``index`` would complete a mill with the pieces in ``mask``."""
+        mask |= 1 << index
+        for mill in self.mills_at[index]:
+            if mask & mill == mill:
+                return True
+        return False
+
+    def positions_of(self, mask):
+        """Return the (x, y) positions of the set bits in mask."""
+        return [self.points[i] for i in iter_bits(mask)]
+
+    def bits_of(self, board):
+        """Return ``[0, player 1 mask, player 2 mask]`` for a grid-based board or a BitBoard."""
+        if hasattr(board, "bits"):
+            return list(board.bits)
+        bits = [0, 0, 0]
+        grid = board.grid
+        for index, (x, y) in enumerate(self.points):
+            owner = grid[x][y]
+            if owner in (1, 2):
+                bits[owner] |= 1 << index
+        return bits
+
+
+_GEOMETRIES = {}
+
+
+def get_geometry(game_type):
+    """Return the shared BoardGeometry for a game type ("9mm" unless "12mm")."""
+    game_type = "12mm" if game_type == "12mm" else "9mm"
+    geometry = _GEOMETRIES.get(game_type)
+    if geometry is None:
+        geometry = _GEOMETRIES[game_type] = BoardGeometry(game_type)
+    return geometry
+
+
+class BitBoard(Board):
+    """Board that stores each player's pieces as a 24-bit integer.
+
+    Bit i of ``bits[player_id]`` is set when that player occupies
+    ``geometry.points[i]``. The familiar 7x7 ``grid`` is kept as a view whose
+    writes update the bitboards, so GameManager and the API routes work
+    unchanged while engines use the mask helpers directly.
+    """
+
+    def __init__(self, game_type):
+        self.geometry = get_geometry(game_type)
+        self.bits = [0, 0, 0]  # Indexed by player id; slot 0 is unused
+        self.zobrist_key = 0  # Zobrist hash of the pieces, updated on every change
+        super().__init__(game_type)
+
+    def _clear(self):
+        """Empty the board, including the bitboards."""
+        super()._clear()
+        self.bits = [0, 0, 0]
+        self.zobrist_key = 0
+
+    def _set_cell(self, x, y, value):
+        """Write a grid cell and keep the bitboards in sync."""
+        index = self.geometry.index.get((x, y))
+        if index is None:
+            if value is not None:
+                raise ValueError(f"({x}, {y}) is not a point on the board")
+            return
+        if value not in (None, 1, 2):
+            raise ValueError(f"Unknown player id {value!r}")
+        if (self.bits[1] | self.bits[2]) >> index & 1:
+            self.remove(index)
+        if value is not None:
+            self.place(index, value)
+
+    def place(self, index, player_id):
+        """Put a piece of ``player_id`` on the empty point ``index``."""
+        self.bits[player_id] |= 1 << index
+        self.zobrist_key ^= ZOBRIST_PIECES[player_id][index]
+        x, y = self.geometry.points[index]
+        list.__setitem__(self._grid[x], y, player_id)
+        self._occupy(x, y, player_id)
+
+    def remove(self, index):
+        """Take the piece on point ``index`` off the board."""
+        bit = 1 << index
+        player_id = 1 if self.bits[1] & bit else 2
+        self.bits[player_id] &= ~bit
+        self.zobrist_key ^= ZOBRIST_PIECES[player_id][index]
+        x, y = self.geometry.points[index]
+        self._vacate(x, y, player_id)
+        list.__setitem__(self._grid[x], y, None)
+
+    def move(self, from_index, to_index):
+        """Move the piece on ``from_index`` to the empty point ``to_index``."""
+        player_id = 1 if self.bits[1] >> from_index & 1 else 2
+        self.remove(from_index)
+        self.place(to_index, player_id)
+
+    def copy(self):
+        """Return an independent copy of this board."""
+        board = BitBoard(self.game_type)
+        board.bits = list(self.bits)
+        board.zobrist_key = self.zobrist_key
+        board._grid = [_GridRow(board, x, row) for x, row in enumerate(self._grid)]
+        board.piece_counts = dict(self.piece_counts)
+        board.mobility = dict(self.mobility)
+        board.empty_points = self.empty_points
+        return board
+
+    def is_valid_position(self, x, y):
+        """Check if the given (x, y) position is valid within the board."""
+        return (x, y) in self.geometry.index
+
+    def is_adjacent(self, from_x, from_y, to_x, to_y):
+        """Check if two positions are adjacent based on the game type layout."""
+        index = self.geometry.index
+        if (from_x, from_y) not in index or (to_x, to_y) not in index:
+            return False
+        return bool(self.geometry.adjacent[index[(from_x, from_y)]] >> index[(to_x, to_y)] & 1)
+
+    def completes_mill(self, x, y, player_id):
+        """Check if a piece of ``player_id`` on (x, y) is part of a full mill line."""
+        if metrics.enabled:
+            metrics.MILL_CHECKS.inc()
+        index = self.geometry.index.get((x, y))
+        if index is None:
+            return False
+        return self.mill_at(index, player_id)
+
+    # Index- and mask-based helpers for engines
+
+    def pieces(self, player_id):
+        """Return the bitboard of the given player's pieces."""
+        return self.bits[player_id]
+
+    def empty_mask(self):
+        """Return the bitboard of empty points."""
+        return self.geometry.full_mask & ~(self.bits[1] | self.bits[2])
+
+    def count_pieces(self, player_id):
+        """Return how many pieces the player has on the board."""
+        return popcount(self.bits[player_id])
+
+    def mill_at(self, index, player_id):
+        """Check if the player owning point ``index`` would complete a mill through it."""
+        own = self.bits[player_id] | 1 << index
+        for mill in self.geometry.mills_at[index]:
+            if own & mill == mill:
+                return True
+        return False
+
+    def mill_mask(self, player_id):
+        """Return the bitboard of the player's pieces that sit in closed mills."""
+        own = self.bits[player_id]
+        mask = 0
+        for mill in self.geometry.mills:
+            if own & mill == mill:
+                mask |= mill
+        return mask
+
+    def removable_mask(self, player_id):
+        """Return the player's pieces that may be removed (not in a mill, unless all are)."""
+        own = self.bits[player_id]
+        outside = own & ~self.mill_mask(player_id)
+        return outside if outside else own
+
+    def targets_mask(self, index, flying=False):
+        """Return the empty points a piece on ``index`` can move to."""
+        empty = self.empty_mask()
+        return empty if flying else self.geometry.adjacent[index] & empty
+
+    def movable_mask(self, player_id):
+        """Return the player's pieces that have at least one empty adjacent point."""
+        empty = self.empty_mask()
+        adjacent = self.geometry.adjacent
+        mask = 0
+        for index in iter_bits(self.bits[player_id]):
+            if adjacent[index] & empty:
+                mask |= 1 << index
+        return mask
+
+    def legal_moves(self, player_id, flying=False):
+        """Return every (from_pos, to_pos) move available to the player."""
+        points = self.geometry.points
+        moves = []
+        for index in iter_bits(self.bits[player_id]):
+            for target in iter_bits(self.targets_mask(index, flying)):
+                moves.append((points[index], points[target]))
+        return moves
@@ -1,10 +1,174 @@
+from . import metrics
+
+
+class BoardStateError(Exception):
+    """Raised when the incrementally maintained counts disagree with the grid."""
+
+
+def _nonzero(counts):
+    return {key: count for key, count in counts.items() if count}
+
+
+def _symmetry_image(position, rotate, mirror, swap):
+    """Map a grid position through ``rotate`` quarter turns, a mirror and an inner/outer ring swap."""
+    dx, dy = position[0] - 3, position[1] - 3
+    if swap:
+        ring = max(abs(dx), abs(dy))
+        dx, dy = dx // ring * (4 - ring), dy // ring * (4 - ring)
+    if mirror:
+        dy = -dy
+    for _ in range(rotate):
+        dx, dy = dy, -dx
+    return dx + 3, dy + 3
+
+
+class _GridRow(list):
+    """One row of the 7x7 grid; writes go through the board so its counts stay current."""
+
+    def __init__(self, board, x, values):
+        super().__init__(values)
+        self._board = board
+        self._x = x
+
+    def __setitem__(self, y, value):
+        self._board._set_cell(self._x, y, value)
+
+
 class Board:
+    """The 7x7 grid plus running per-player piece counts and mobility.
+
+    Every write to ``grid[x][y]`` updates ``piece_counts`` (pieces per
+    player id), ``empty_points`` (free playable points) and ``mobility``
+    (per player, the number of own-piece/empty-neighbour pairs), so callers
+    can ask how many pieces a player has or whether it can move without
+    scanning the grid. ``recount`` recomputes all of them from scratch.
+    """
+
     def __init__(self, game_type):
         """Initialize the board with a 7x7 grid and valid positions."""
         self.size = 7
-        self.grid = [[None for _ in range(7)] for _ in range(7)]  # 7x7 grid with None values
-        self.valid_positions = self.get_valid_positions()
         self.game_type = game_type
+        self.valid_positions = self.get_valid_positions()
+        self._adjacent_positions = self.default_adjacent_positions
+        self.neighbors = self.get_neighbors()
+        self.grid = [[None for _ in range(7)] for _ in range(7)]  # 7x7 grid with None values
+
+    @property
+    def grid(self):
+        return self._grid
+
+    @grid.setter
+    def grid(self, rows):
+        """Load a 7x7 list-of-lists grid, rebuilding the counts."""
+        self._clear()
+        for x, row in enumerate(rows):
+            for y, value in enumerate(row):
+                if value is not None:
+                    self._set_cell(x, y, value)
+
+    def _clear(self):
+        """Empty the board."""
+        self._grid = [_GridRow(self, x, [None] * self.size) for x in range(self.size)]
+        self.piece_counts = {}
+        self.mobility = {}
+        self.empty_points = len(self.board_positions)
+
+    def _set_cell(self, x, y, value):
+        """Write a grid cell and update the counts for the old and new occupant."""
+        old = self._grid[x][y]
+        if old == value:
+            return
+        if old is not None:
+            self._vacate(x, y, old)
+        list.__setitem__(self._grid[x], y, value)
+        if value is not None:
+            self._occupy(x, y, value)
+
+    @property
+    def adjacent_positions(self):
+        """The adjacency map of the lines, without the 12 Men's Morris diagonals."""
+        return self._adjacent_positions
+
+    @adjacent_positions.setter
+    def adjacent_positions(self, adjacency):
+        """Use a custom adjacency map; the neighbour map and mobility follow it."""
+        self._adjacent_positions = adjacency
+        self.neighbors = self.get_neighbors()
+        self.mobility = self.recount()[2]
+
+    def _occupy(self, x, y, value):
+        """Count a piece that was just put on (x, y)."""
+        self.piece_counts[value] = self.piece_counts.get(value, 0) + 1
+        if (x, y) not in self.playable_points:
+            return  # Off the playable points; counted, but it never moves
+        self.empty_points -= 1
+        grid = self._grid
+        mobility = self.mobility
+        free = 0
+        for nx, ny in self.neighbors.get((x, y), ()):
+            owner = grid[nx][ny]
+            if owner is None:
+                free += 1
+            else:
+                mobility[owner] -= 1  # The neighbour lost this empty point
+        mobility[value] = mobility.get(value, 0) + free
+
+    def _vacate(self, x, y, value):
+        """Uncount the piece that is about to leave (x, y)."""
+        self.piece_counts[value] -= 1
+        if (x, y) not in self.playable_points:
+            return
+        self.empty_points += 1
+        grid = self._grid
+        mobility = self.mobility
+        free = 0
+        for nx, ny in self.neighbors.get((x, y), ()):
+            owner = grid[nx][ny]
+            if owner is None:
+                free += 1
+            else:
+                mobility[owner] = mobility.get(owner, 0) + 1
+        mobility[value] -= free
+
+    def count_pieces(self, player_id):
+        """Return how many pieces the player has on the board."""
+        return self.piece_counts.get(player_id, 0)
+
+    def mobility_of(self, player_id):
+        """Return how many (piece, empty adjacent point) pairs the player has."""
+        return self.mobility.get(player_id, 0)
+
+    def recount(self):
+        """Recompute ``(piece_counts, empty_points, mobility)`` with a full scan of the grid."""
+        piece_counts = {}
+        mobility = {}
+        empty_points = 0
+        for x, row in enumerate(self._grid):
+            for y, value in enumerate(row):
+                playable = (x, y) in self.playable_points
+                if value is None:
+                    if playable:
+                        empty_points += 1
+                    continue
+                piece_counts[value] = piece_counts.get(value, 0) + 1
+                if playable:
+                    neighbors = self.neighbors.get((x, y), ())
+                    free = sum(1 for nx, ny in neighbors if self._grid[nx][ny] is None)
+                    mobility[value] = mobility.get(value, 0) + free
+        return piece_counts, empty_points, mobility
+
+    def verify_counts(self):
+        """Raise BoardStateError if the running counts differ from a full recount."""
+        piece_counts, empty_points, mobility = self.recount()
+        problems = []
+        if _nonzero(self.piece_counts) != piece_counts:
+            problems.append(f"piece counts {_nonzero(self.piece_counts)} != {piece_counts}")
+        if self.empty_points != empty_points:
+            problems.append(f"empty points {self.empty_points} != {empty_points}")
+        if _nonzero(self.mobility) != _nonzero(mobility):
+            problems.append(f"mobility {_nonzero(self.mobility)} != {_nonzero(mobility)}")
+        if problems:
+            raise BoardStateError("; ".join(problems))
 
     # Add this method to serialize the board state
     def to_dict(self):
@@ -20,30 +184,43 @@ class Board:
         board.grid = data["grid"]
         return board
 
+    # The 24 playable points, in the order used everywhere points are indexed
+    board_positions = [
+        (0, 0), (0, 3), (0, 6),  # Top row
+        (1, 1), (1, 3), (1, 5),  # Second row
+        (2, 2), (2, 3), (2, 4),  # Third row
+        (3, 0), (3, 1), (3, 2), (3, 4), (3, 5), (3, 6),  # Middle row
+        (4, 2), (4, 3), (4, 4),  # Fifth row
+        (5, 1), (5, 3), (5, 5),  # Sixth row
+        (6, 0), (6, 3), (6, 6),  # Bottom row
+    ]
+
+    playable_points = frozenset(board_positions)
+
     def get_valid_positions(self):
         """Return the valid positions for placing pieces based on Nine Men's Morris."""
         # Return a list of tuples that represent all the valid positions on the board
-        return [
-            (0, 0), (0, 3), (0, 6),  # Top row
-            (1, 1), (1, 3), (1, 5),  # Second row
-            (2, 2), (2, 3), (2, 4),  # Third row
-            (3, 0), (3, 1), (3, 2), (3, 4), (3, 5), (3, 6),  # Middle row
-            (4, 2), (4, 3), (4, 4),  # Fifth row
-            (5, 1), (5, 3), (5, 5),  # Sixth row
-            (6, 0), (6, 3), (6, 6),  # Bottom row
-        ]
+        return list(self.board_positions)
+
+    def get_neighbors(self):
+        """Return the adjacency map for this game type, including the 12 Men's Morris diagonals."""
+        neighbors = {pos: list(adjacent) for pos, adjacent in self.adjacent_positions.items()}
+        if self.game_type == "12mm":
+            for pos, adjacent in self.additional_adjacent_positions_12mm.items():
+                neighbors.setdefault(pos, []).extend(adjacent)
+        return neighbors
 
     def is_valid_position(self, x, y):
         """Check if the given (x, y) position is valid within the board."""
         return (x, y) in self.valid_positions
 
     # Define adjacent positions for the Nine Men's Morris board
-    adjacent_positions = {
+    default_adjacent_positions = {
         (0, 0): [(0, 3), (3, 0)], (0, 3): [(0, 0), (0, 6), (1, 3)], (0, 6): [(0, 3), (3, 6)],
         (1, 1): [(1, 3), (3, 1)], (1, 3): [(1, 1), (1, 5), (0, 3), (2, 3)], (1, 5): [(1, 3), (3, 5)],
         (2, 2): [(2, 3), (3, 2)], (2, 3): [(2, 2), (2, 4), (1, 3)], (2, 4): [(2, 3), (3, 4)],
         (3, 0): [(0, 0), (3, 1), (6, 0)], (3, 1): [(3, 0), (1, 1), (3, 2), (5, 1)],
-        (3, 2): [(3, 1), (2, 2), (3, 4), (4, 2)], (3, 4): [(3, 2), (2, 4), (3, 5), (4, 4)],
+        (3, 2): [(3, 1), (2, 2), (4, 2)], (3, 4): [(2, 4), (3, 5), (4, 4)],
         (3, 5): [(3, 4), (1, 5), (3, 6), (5, 5)], (3, 6): [(0, 6), (3, 5), (6, 6)],
         (4, 2): [(3, 2), (4, 3)], (4, 3): [(4, 2), (4, 4), (5, 3)], (4, 4): [(3, 4), (4, 3)],
         (5, 1): [(3, 1), (5, 3)], (5, 3): [(5, 1), (5, 5), (4, 3), (6, 3)], (5, 5): [(3, 5), (5, 3)],
@@ -68,13 +245,7 @@ class Board:
 
     def is_adjacent(self, from_x, from_y, to_x, to_y):
         """Check if two positions are adjacent based on the game type layout."""
-        if self.game_type == "9mm":
-            return (to_x, to_y) in self.adjacent_positions.get((from_x, from_y), [])
-        elif self.game_type == "12mm":
-            if (to_x, to_y) in self.adjacent_positions.get((from_x, from_y), []):
-                return (to_x, to_y)
-            else: 
-                return (to_x, to_y) in self.additional_adjacent_positions_12mm.get((from_x, from_y), [])
+        return (to_x, to_y) in self.neighbors.get((from_x, from_y), ())
 
     mill_combinations = {
     # Top row mills
@@ -141,25 +312,93 @@ class Board:
 
     def check_for_mill(self, x, y, player):
         """Check if placing or moving a piece forms a mill."""
-        player_id = player.player_id
+        return self.completes_mill(x, y, player.player_id)
+
+    def completes_mill(self, x, y, player_id):
+        """Check if a piece of ``player_id`` on (x, y) is part of a full mill line."""
+        if metrics.enabled:
+            metrics.MILL_CHECKS.inc()
+        grid = self.grid
         for mill in self.mill_combinations.get((x, y), []):
-            print(f"Checking the mill: {mill} for position ({x}, {y})")
-            if all(self.grid[pos[0]][pos[1]] == player_id for pos in mill):
-                print("9mm morris mill")
+            if all(grid[pos[0]][pos[1]] == player_id for pos in mill):
                 return True
-        # add another loop to check for 12 men's morris mills
-
-        print(self.game_type)
-
         if self.game_type == "12mm":
             for mill in self.mill_combinations_12mens.get((x, y), []):
-                print(f"Checking the mill: {mill} for position ({x}, {y})")
-                if all(self.grid[pos[0]][pos[1]] == player_id for pos in mill):
-                    print("9mm morris mill")
+                if all(grid[pos[0]][pos[1]] == player_id for pos in mill):
                     return True
-            
         return False
-    
+
+    _symmetries = {}
+
+    @classmethod
+    def symmetries(cls, game_type):
+        """Return the symmetries of the board as permutations of ``board_positions`` indices.
+
+        Entry ``i`` of a permutation is the index point ``i`` is sent to. The
+        candidates are the eight rotations and reflections of the square, each
+        with and without swapping the inner and outer rings; a candidate is
+        kept only if it maps every mill and every adjacency of the game type
+        (diagonals included for 12 Men's Morris) onto the board's own. The
+        identity comes first.
+        """
+        game_type = "12mm" if game_type == "12mm" else "9mm"
+        cached = cls._symmetries.get(game_type)
+        if cached is not None:
+            return cached
+
+        index = {pos: i for i, pos in enumerate(cls.board_positions)}
+        tables = [cls.mill_combinations] + ([cls.mill_combinations_12mens] if game_type == "12mm" else [])
+        mills = {frozenset([pos, *pair]) for table in tables for pos, pairs in table.items() for pair in pairs}
+        links = [cls.default_adjacent_positions]
+        if game_type == "12mm":
+            links.append(cls.additional_adjacent_positions_12mm)
+        edges = {frozenset((pos, other)) for table in links for pos, others in table.items() for other in others}
+
+        symmetries = []
+        for rotate in range(4):
+            for mirror in (False, True):
+                for swap in (False, True):
+                    image = {pos: _symmetry_image(pos, rotate, mirror, swap) for pos in cls.board_positions}
+                    if {frozenset(image[pos] for pos in mill) for mill in mills} != mills:
+                        continue
+                    if {frozenset(image[pos] for pos in edge) for edge in edges} != edges:
+                        continue
+                    symmetries.append(tuple(index[image[pos]] for pos in cls.board_positions))
+        cached = cls._symmetries[game_type] = tuple(symmetries)
+        return cached
+
+    def canonical_form(self):
+        """Return ``(cells, transform)`` for the board's symmetry-canonical form.
+
+        ``cells`` holds the owner of every point (0 when empty) in
+        ``board_positions`` order after applying symmetry number ``transform``.
+        Of all symmetric images of the position it is the one whose packed
+        ``player 2 mask << 24 | player 1 mask`` is smallest (the order
+        ``BoardGeometry.canonical`` uses), so two boards are symmetric exactly
+        when their ``cells`` are equal.
+        """
+        grid = self._grid
+        owners = [grid[x][y] if grid[x][y] in (1, 2) else 0 for x, y in self.board_positions]
+        best = None
+        for transform, perm in enumerate(self.symmetries(self.game_type)):
+            packed = 0
+            for i, owner in enumerate(owners):
+                if owner:
+                    packed |= 1 << (perm[i] + 24 * (owner - 1))
+            if best is None or packed < best:
+                best, best_transform = packed, transform
+        cells = tuple(1 if best >> i & 1 else 2 if best >> (i + 24) & 1 else 0 for i in range(len(owners)))
+        return cells, best_transform
+
+    def transform_position(self, position, transform, inverse=False):
+        """Map a grid position through symmetry number ``transform`` (or back, with ``inverse``)."""
+        positions = self.board_positions
+        perm = self.symmetries(self.game_type)[transform]
+        index = positions.index(tuple(position))
+        if inverse:
+            return positions[perm.index(index)]
+        return positions[perm[index]]
+
     def display(self):
         """Display the current board layout (for debugging)."""
         for row in self.grid:
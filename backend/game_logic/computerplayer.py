@@ -1,125 +1,187 @@
+from . import metrics, movegenerator
+from .bitboard import get_geometry
+from .evaluation import load_weights
+from .openingbook import open_opening_book
 from .player import Player
+from .parallelsearch import ParallelSearchEngine
+from .search import SearchEngine
+from .tablebase import open_tablebase
+from .transposition import TranspositionTable
+import logging
 import random
 
+logger = logging.getLogger(__name__)
+
+
 class ComputerPlayer(Player):
-    def __init__(self, player_id, pieces):
+    def __init__(self, player_id, pieces, search_depth=0, time_budget=None, table_memory_mb=16,
+                 tablebase_path=None, opening_book_path=None, search_workers=1, weights_path=None):
         self.player_id = player_id
         self.pieces = pieces  # Number of pieces to place (9 or 12)
         self.placed_pieces = []  # Track where the player's pieces are placed
         self.type = "ComputerPlayer"
-
-    def decide_placement(self, board):
+        self.search_depth = search_depth  # 0 keeps the one-ply heuristics
+        self.time_budget = time_budget  # Seconds per move, None for no limit
+        self.planned_removal = None  # Removal chosen together with the last searched move
+        self.table_memory_mb = table_memory_mb  # Cap for the transposition table kept between turns
+        self.transposition_table = None  # Created on the first search
+        self.tablebase_path = tablebase_path  # Endgame tablebase file consulted by the search
+        self.opening_book_path = opening_book_path  # Opening book file consulted before placing
+        self.search_workers = search_workers  # Processes sharing the root moves of a deep search
+        self.weights_path = weights_path  # Evaluation weights file, None for the built-in weights
+        self.stop_event = None  # threading.Event that aborts a search in progress when set
+        self.last_search = None
+
+    def to_dict(self):
+        data = super().to_dict()
+        data["search_depth"] = self.search_depth
+        data["time_budget"] = self.time_budget
+        data["table_memory_mb"] = self.table_memory_mb
+        data["tablebase_path"] = self.tablebase_path
+        data["opening_book_path"] = self.opening_book_path
+        data["search_workers"] = self.search_workers
+        data["weights_path"] = self.weights_path
+        return data
+
+    def book_move(self, board, opponent=None):
+        """Return the opening book's placement for this position and remember its capture, or None."""
+        if not self.opening_book_path or not self.pieces:
+            return None
+        opponent_pieces = opponent.pieces if opponent is not None else self.pieces
+        hit = open_opening_book(self.opening_book_path).probe_board(board, self.player_id, self.pieces, opponent_pieces)
+        if hit is None:
+            return None
+        position, self.planned_removal = hit
+        logger.debug("Computer playing book placement at %s", position)
+        return position
+
+    def search_move(self, board, opponent=None):
+        """Search for the best compound move and remember its removal.
+
+        Returns ``(from_pos, to_pos)``, where ``from_pos`` is None for a placement.
+        """
+        if self.transposition_table is None:
+            self.transposition_table = TranspositionTable(self.table_memory_mb)
+        settings = dict(
+            max_depth=self.search_depth, time_budget=self.time_budget,
+            transposition_table=self.transposition_table,
+            tablebase=open_tablebase(self.tablebase_path) if self.tablebase_path else None,
+            stop_event=self.stop_event,
+            weights=load_weights(self.weights_path) if self.weights_path else None
+        )
+        if self.search_workers > 1:
+            engine = ParallelSearchEngine(
+                board.game_type, workers=self.search_workers, table_memory_mb=self.table_memory_mb,
+                tablebase_path=self.tablebase_path, **settings
+            )
+        else:
+            engine = SearchEngine(board.game_type, **settings)
+        if opponent is not None:
+            opponent_pieces = opponent.pieces
+        else:
+            opponent_pieces = self.pieces  # Best guess when the caller does not say
+        result = engine.search_board(board, self.player_id, self.pieces, opponent_pieces)
+        self.last_search = result
+        if metrics.enabled:
+            metrics.SEARCH_NODES.inc(result.nodes)
+        if result.move is None:
+            self.planned_removal = None
+            return None, None
+        from_pos, to_pos, self.planned_removal = engine.move_to_positions(result.move)
+        return from_pos, to_pos
+
+    def decide_placement(self, board, opponent=None):
         """Decide where to place a piece, prioritizing mills."""
+        position = self.book_move(board, opponent)
+        if position is not None:
+            return position
+        if self.search_depth > 0:
+            _, position = self.search_move(board, opponent)
+            return position
+
+        candidates = [move.to_pos for move in movegenerator.placements(board)]
+        geometry = get_geometry(board.game_type)
+        bits = geometry.bits_of(board)
+        index = geometry.index
+
         # Prioritize forming mills
-        for x, y in board.valid_positions:
-            if board.grid[x][y] is None and self.forms_mill(x, y, board):
-                print(f"Computer prioritizing mill formation at {x, y}")
+        for x, y in candidates:
+            if geometry.closes_mill(bits[self.player_id], index[(x, y)]):
+                logger.debug("Computer prioritizing mill formation at %s", (x, y))
                 return x, y
 
         # Block opponent's mills
         opponent_id = 1 if self.player_id == 2 else 2
-        for x, y in board.valid_positions:
-            if board.grid[x][y] is None and self.blocks_opponent_mill(x, y, board, opponent_id):
-                print(f"Computer blocking opponent's mill at {x, y}")
+        for x, y in candidates:
+            if geometry.closes_mill(bits[opponent_id], index[(x, y)]):
+                logger.debug("Computer blocking opponent's mill at %s", (x, y))
                 return x, y
 
         # Fallback to random placement
-        valid_positions = [
-            (x, y) for x, y in board.valid_positions if board.grid[x][y] is None
-        ]
-        print(f"Valid positions for placement: {valid_positions}")
-        if not valid_positions:
-            print("No valid positions available for placement.")
+        logger.debug("Valid positions for placement: %s", candidates)
+        if not candidates:
+            logger.debug("No valid positions available for placement.")
             return None
-        chosen_position = random.choice(valid_positions)
-        print(f"Computer chose position {chosen_position} for placement.")
+        chosen_position = random.choice(candidates)
+        logger.debug("Computer chose position %s for placement.", chosen_position)
         return chosen_position
 
-    def decide_move(self, board):
+    def decide_move(self, board, opponent=None):
         """Decide which piece to move and where, prioritizing mills and flying when applicable."""
+        if self.search_depth > 0:
+            return self.search_move(board, opponent)
+
         opponent_id = 1 if self.player_id == 2 else 2
+        candidates = movegenerator.moves(board, self.player_id)
+        geometry = get_geometry(board.game_type)
+        bits = geometry.bits_of(board)
+        index = geometry.index
 
-        # Flying phase: when the computer has only three pieces left
-        if len(self.placed_pieces) == 3:
-            print("Computer is in the flying phase.")
-            # Prioritize forming mills during flying phase
-            for from_x, from_y in self.placed_pieces:
-                for to_x in range(board.size):
-                    for to_y in range(board.size):
-                        if board.is_valid_position(to_x, to_y) and board.grid[to_x][to_y] is None:
-                            if self.forms_mill(to_x, to_y, board):
-                                print(f"Computer flying to form mill from ({from_x}, {from_y}) to ({to_x}, {to_y})")
-                                return (from_x, from_y), (to_x, to_y)
-
-            # Try to block opponent's mills during flying phase
-            for from_x, from_y in self.placed_pieces:
-                for to_x in range(board.size):
-                    for to_y in range(board.size):
-                        if board.is_valid_position(to_x, to_y) and board.grid[to_x][to_y] is None:
-                            if self.blocks_opponent_mill(to_x, to_y, board, opponent_id):
-                                print(f"Computer flying to block opponent mill from ({from_x}, {from_y}) to ({to_x}, {to_y})")
-                                return (from_x, from_y), (to_x, to_y)
-
-            # Fallback to random flying move
-            for from_x, from_y in self.placed_pieces:
-                for to_x in range(board.size):
-                    for to_y in range(board.size):
-                        if board.is_valid_position(to_x, to_y) and board.grid[to_x][to_y] is None:
-                            print(f"Computer flying randomly from ({from_x}, {from_y}) to ({to_x}, {to_y})")
-                            return (from_x, from_y), (to_x, to_y)
-
-        else:  # Normal moving phase
-            # Prioritize forming mills in normal phase
-            for from_x, from_y in self.placed_pieces:
-                for to_x, to_y in board.adjacent_positions.get((from_x, from_y), []):
-                    if board.grid[to_x][to_y] is None and self.forms_mill(to_x, to_y, board):
-                        print(f"Computer moving to form mill from ({from_x}, {from_y}) to ({to_x}, {to_y})")
-                        return (from_x, from_y), (to_x, to_y)
-
-            # Try to block opponent's mills in normal phase
-            for from_x, from_y in self.placed_pieces:
-                for to_x, to_y in board.adjacent_positions.get((from_x, from_y), []):
-                    if board.grid[to_x][to_y] is None and self.blocks_opponent_mill(to_x, to_y, board, opponent_id):
-                        print(f"Computer moving to block opponent mill from ({from_x}, {from_y}) to ({to_x}, {to_y})")
-                        return (from_x, from_y), (to_x, to_y)
-
-            # Fallback to random move
-            for from_x, from_y in self.placed_pieces:
-                for to_x, to_y in board.adjacent_positions.get((from_x, from_y), []):
-                    if board.grid[to_x][to_y] is None:
-                        print(f"Computer moving randomly from ({from_x}, {from_y}) to ({to_x}, {to_y})")
-                        return (from_x, from_y), (to_x, to_y)
-
-        print("Computer deciding move. No valid moves found.")
+        # Prioritize forming mills
+        for move in candidates:
+            if geometry.closes_mill(bits[self.player_id], index[move.to_pos]):
+                logger.debug("Computer moving to form mill from %s to %s", move.from_pos, move.to_pos)
+                return move.from_pos, move.to_pos
+
+        # Try to block opponent's mills
+        for move in candidates:
+            if geometry.closes_mill(bits[opponent_id], index[move.to_pos]):
+                logger.debug("Computer moving to block opponent mill from %s to %s", move.from_pos, move.to_pos)
+                return move.from_pos, move.to_pos
+
+        # Fallback to random move
+        if candidates:
+            move = random.choice(candidates)
+            logger.debug("Computer moving randomly from %s to %s", move.from_pos, move.to_pos)
+            return move.from_pos, move.to_pos
+
+        logger.debug("Computer deciding move. No valid moves found.")
         return None, None
 
     def decide_removal(self, board, opponent):
         """Decide which opponent's piece to remove, prioritizing pieces outside mills."""
-        removable_pieces = [
-            pos for pos in opponent.placed_pieces
-            if not board.check_for_mill(pos[0], pos[1], opponent) or self.all_opponent_pieces_in_mills(board, opponent)
-        ]
-        print(f"Removable pieces for the computer: {removable_pieces}")
+        planned, self.planned_removal = self.planned_removal, None
+        if planned is not None and board.grid[planned[0]][planned[1]] == opponent.player_id:
+            return planned
+
+        removable_pieces = [move.to_pos for move in movegenerator.removals(board, opponent.player_id)]
+        logger.debug("Removable pieces for the computer: %s", removable_pieces)
         if removable_pieces:
             chosen_piece = random.choice(removable_pieces)
-            print(f"Computer removing opponent's piece at {chosen_piece}")
+            logger.debug("Computer removing opponent's piece at %s", chosen_piece)
             return chosen_piece
-        print("No pieces available for removal.")
+        logger.debug("No pieces available for removal.")
         return None
 
     def forms_mill(self, x, y, board):
         """Check if placing or moving to (x, y) forms a mill for the computer."""
-        result = board.check_for_mill(x, y, self)
-        print(f"Checking if placing at ({x}, {y}) forms a mill: {result}")
-        return result
+        geometry = get_geometry(board.game_type)
+        return geometry.closes_mill(geometry.bits_of(board)[self.player_id], geometry.index[(x, y)])
 
     def blocks_opponent_mill(self, x, y, board, opponent_id):
         """Check if placing or moving to (x, y) blocks an opponent's mill."""
-        # Temporarily place the opponent's piece at (x, y) to simulate the mill
-        board.grid[x][y] = opponent_id
-        blocks_mill = board.check_for_mill(x, y, Player(opponent_id, 0))  # Check as if it was the opponent's piece
-        board.grid[x][y] = None  # Remove the simulated placement
-        return blocks_mill
+        geometry = get_geometry(board.game_type)
+        return geometry.closes_mill(geometry.bits_of(board)[opponent_id], geometry.index[(x, y)])
 
     def all_opponent_pieces_in_mills(self, board, opponent):
         """Check if all opponent pieces are in mills."""
@@ -0,0 +1,138 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .gamemanager import GameManager
+
+logger = logging.getLogger(__name__)
+
+
+class ComputerTurn:
+    """A computer turn planned on a private copy of a game.
+
+    The copy is taken while the caller holds the game's lock; ``plan`` then
+    runs the search without it, recording the actions the computer takes,
+    and ``apply`` replays them on the live game if it has not changed in the
+    meantime. Setting ``cancelled`` aborts a search in progress.
+
+    The turn borrows the live player's transposition table, so what it learned
+    carries over between turns, but a turn planned while another (cancelled)
+    one is still searching gets a table of its own.
+    """
+
+    def __init__(self, game_manager):
+        self.state = game_manager.to_dict()
+        self.player = game_manager.current_player
+        self.table = self.player.transposition_table
+        self.player.transposition_table = None
+        self.actions = []
+        self.cancelled = threading.Event()
+
+    def plan(self):
+        """Play the turn on a copy of the game and return the actions it took."""
+        game_manager = GameManager.from_dict(self.state)
+        computer = game_manager.current_player
+        computer.transposition_table = self.table
+        computer.stop_event = self.cancelled
+        game_manager.action_listeners.append(lambda _, action: self.actions.append(action))
+        try:
+            game_manager.handle_computer_turn()
+            if game_manager.current_player is computer and not self.cancelled.is_set():
+                # The search came back without a move; play the one-ply heuristics rather than nothing
+                logger.warning("Search left the computer's turn unplayed; using the heuristics")
+                computer.search_depth = 0
+                game_manager.handle_computer_turn()
+        finally:
+            if self.player.transposition_table is None:
+                self.player.transposition_table = computer.transposition_table
+            self.player.last_search = computer.last_search
+        return self.actions
+
+    def is_stale(self, game_manager):
+        """Return True if the live game is no longer in the state the turn was planned from."""
+        return game_manager.to_dict() != self.state
+
+    def apply(self, game_manager):
+        """Apply the planned actions to the live game; returns False if the turn is stale or cancelled."""
+        if self.cancelled.is_set() or self.is_stale(game_manager):
+            return False
+        for action in self.actions:
+            result = game_manager.apply_action(action)
+            if not result["success"]:
+                logger.error("Planned computer action %s was rejected: %s", action, result.get("message"))
+                return False
+        return True
+
+
+class ComputerTurnScheduler:
+    """Plans computer turns on a pool of worker threads, at most one pending turn per game."""
+
+    def __init__(self, workers=4):
+        self.workers = workers
+        self._executor = None
+        self._turns = {}  # game_id -> pending ComputerTurn
+        self._lock = threading.Lock()
+
+    def schedule(self, game_id, game_manager, finish):
+        """Plan the computer's turn in the background and return the pending ComputerTurn.
+
+        Call with the game's lock held. Once the turn is planned, ``finish(turn)``
+        is called on the worker thread; it should take the game's lock, call
+        ``complete`` and, if that succeeds, ``turn.apply``. A turn already
+        pending for the game is cancelled.
+        """
+        turn = ComputerTurn(game_manager)
+        with self._lock:
+            previous = self._turns.get(game_id)
+            if previous is not None:
+                previous.cancelled.set()
+            self._turns[game_id] = turn
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="computer-turn")
+            self._executor.submit(self._run, game_id, turn, finish)
+        return turn
+
+    def pending(self, game_id):
+        """Return True while a computer turn is being planned for the game."""
+        with self._lock:
+            return game_id in self._turns
+
+    def complete(self, game_id, turn):
+        """Mark ``turn`` as done; returns False if it was cancelled or replaced in the meantime."""
+        with self._lock:
+            if self._turns.get(game_id) is not turn or turn.cancelled.is_set():
+                return False
+            del self._turns[game_id]
+            return True
+
+    def cancel(self, game_id):
+        """Abort the game's pending turn, if any; returns True if there was one."""
+        with self._lock:
+            turn = self._turns.pop(game_id, None)
+        if turn is None:
+            return False
+        turn.cancelled.set()
+        return True
+
+    def shutdown(self, wait=True):
+        """Cancel every pending turn and stop the worker threads."""
+        with self._lock:
+            turns, self._turns = list(self._turns.values()), {}
+            executor, self._executor = self._executor, None
+        for turn in turns:
+            turn.cancelled.set()
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _run(self, game_id, turn, finish):
+        try:
+            turn.plan()
+            if not turn.cancelled.is_set():
+                finish(turn)
+        except Exception:
+            logger.exception("Computer turn for game %s failed", game_id)
+        finally:
+            # Never leave a failed turn pending
+            with self._lock:
+                if self._turns.get(game_id) is turn:
+                    del self._turns[game_id]
@@ -0,0 +1,179 @@
+"""Weighted static evaluation used by the search.
+
+A position is scored as a weighted sum of features, each the side to
+move's count minus the opponent's (``FEATURES``), with a separate set of
+weights for each phase of the game (``PHASES``): placing while either side
+has pieces in hand, flying once either side is down to three pieces, and
+moving otherwise. Weights are in centi-pieces; the defaults reproduce the
+search's original hand-written evaluation.
+
+Weights are kept in JSON files mapping each phase to its weights; phases
+and features left out keep their defaults::
+
+    {"placing": {"material": 100, "mills": 12, "two_piece": 8},
+     "moving": {"mobility": 3, "blocked": 5}}
+
+Fit a weights file offline from self-play outcomes with
+``python -m game_logic.tuning``.
+"""
+import json
+import operator
+
+from .bitboard import get_geometry, iter_bits, popcount
+
+FEATURES = (
+    "material",      # Pieces on the board plus pieces in hand
+    "mills",         # Closed mills
+    "two_piece",     # Mill lines holding two of the player's pieces and none of the opponent's
+    "double_mills",  # Pieces shared by two of the player's closed mills
+    "blocked",       # Opponent pieces with no empty neighbour, minus the player's own
+    "mobility",      # Slides to empty neighbouring points
+    "hand",          # Pieces in hand
+)
+PHASES = ("placing", "moving", "flying")
+# Features counted piece by piece, the slow part of an evaluation
+_PIECE_FEATURES = (FEATURES.index("blocked"), FEATURES.index("mobility"))
+
+DEFAULT_WEIGHTS = {
+    "placing": {"material": 100, "mills": 10, "two_piece": 6},
+    "moving": {"material": 100, "mills": 10, "two_piece": 6, "mobility": 2},
+    "flying": {"material": 100, "mills": 10, "two_piece": 6, "mobility": 2},
+}
+
+
+def phase_of(bits, hand):
+    """Return the phase (a ``PHASES`` entry) of a position."""
+    if hand[1] or hand[2]:
+        return "placing"
+    if popcount(bits[1]) == 3 or popcount(bits[2]) == 3:
+        return "flying"
+    return "moving"
+
+
+class EvaluationWeights:
+    """Integer feature weights for every phase.
+
+    ``weights`` maps phase names to ``{feature: weight}``; anything not
+    given keeps its ``DEFAULT_WEIGHTS`` value (0 if it has none).
+    """
+
+    def __init__(self, weights=None):
+        weights = weights or {}
+        for phase, values in weights.items():
+            if phase not in PHASES:
+                raise ValueError(f"Unknown phase {phase!r}; expected one of {', '.join(PHASES)}")
+            for feature in values:
+                if feature not in FEATURES:
+                    raise ValueError(f"Unknown feature {feature!r}; expected one of {', '.join(FEATURES)}")
+        self.weights = {}
+        for phase in PHASES:
+            values = dict(DEFAULT_WEIGHTS[phase])
+            values.update(weights.get(phase, {}))
+            self.weights[phase] = tuple(int(round(values.get(feature, 0))) for feature in FEATURES)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write("\n")
+
+    def to_dict(self):
+        return {phase: dict(zip(FEATURES, self.weights[phase])) for phase in PHASES}
+
+    def vector(self, phase):
+        """Return the phase's weights as a tuple in ``FEATURES`` order."""
+        return self.weights[phase]
+
+    def __eq__(self, other):
+        if not isinstance(other, EvaluationWeights):
+            return NotImplemented
+        return self.weights == other.weights
+
+    def __hash__(self):
+        return hash(tuple(self.weights[phase] for phase in PHASES))
+
+    def __repr__(self):
+        return f"EvaluationWeights({self.to_dict()!r})"
+
+
+_LOADED_WEIGHTS = {}
+
+
+def load_weights(path):
+    """Return the shared EvaluationWeights for ``path``, reading the file on first use."""
+    weights = _LOADED_WEIGHTS.get(path)
+    if weights is None:
+        weights = _LOADED_WEIGHTS[path] = EvaluationWeights.load(path)
+    return weights
+
+
+class Evaluator:
+    """Scores bitboard positions of one game type with a set of EvaluationWeights."""
+
+    def __init__(self, game_type, weights=None):
+        self.geometry = get_geometry(game_type)
+        self.weights = weights if weights is not None else EvaluationWeights()
+        # phase -> (weights, whether any piece-by-piece feature is weighted)
+        self._vectors = {}
+        for phase in PHASES:
+            vector = self.weights.vector(phase)
+            self._vectors[phase] = (vector, any(vector[i] for i in _PIECE_FEATURES))
+
+    def features(self, bits, hand, player_id):
+        """Return every feature of the position for ``player_id``, in ``FEATURES`` order."""
+        return self._features(bits, hand, player_id, True)
+
+    def evaluate(self, bits, hand, player_id):
+        """Return the weighted score of the position from the point of view of ``player_id``."""
+        weights, with_pieces = self._vectors[phase_of(bits, hand)]
+        return sum(map(operator.mul, weights, self._features(bits, hand, player_id, with_pieces)))
+
+    def _features(self, bits, hand, player_id, with_pieces):
+        opponent_id = 3 - player_id
+        own = bits[player_id]
+        opp = bits[opponent_id]
+
+        mills = two_piece = 0
+        own_closed = opp_closed = own_doubled = opp_doubled = 0
+        for mill in self.geometry.mills:
+            mine = own & mill
+            theirs = opp & mill
+            if mine == mill:
+                mills += 1
+                own_doubled |= own_closed & mill
+                own_closed |= mill
+            elif theirs == mill:
+                mills -= 1
+                opp_doubled |= opp_closed & mill
+                opp_closed |= mill
+            elif not theirs and mine & (mine - 1):
+                two_piece += 1
+            elif not mine and theirs & (theirs - 1):
+                two_piece -= 1
+
+        blocked = mobility = 0
+        if with_pieces:
+            adjacent = self.geometry.adjacent
+            empty = self.geometry.full_mask & ~(own | opp)
+            for index in iter_bits(own):
+                moves = popcount(adjacent[index] & empty)
+                mobility += moves
+                blocked -= not moves
+            for index in iter_bits(opp):
+                moves = popcount(adjacent[index] & empty)
+                mobility -= moves
+                blocked += not moves
+
+        return (
+            popcount(own) + hand[player_id] - popcount(opp) - hand[opponent_id],
+            mills,
+            two_piece,
+            popcount(own_doubled) - popcount(opp_doubled),
+            blocked,
+            mobility,
+            hand[player_id] - hand[opponent_id],
+        )
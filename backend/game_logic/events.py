@@ -0,0 +1,72 @@
+import threading
+from collections import OrderedDict, deque
+
+
+class EventBroker:
+    """Per-game event feeds that clients can wait on.
+
+    Every published event gets an id that is larger than any id handed out
+    before it, so a client resumes a feed by passing the last id it saw. Each
+    game keeps only its ``history`` most recent events, and at most
+    ``max_games`` feeds are kept, dropping the least recently published one.
+    Listeners added with ``add_listener`` are called as ``listener(game_id,
+    event_id)`` after every publish, on the publishing thread.
+    """
+
+    def __init__(self, history=32, max_games=10000):
+        self.history = history
+        self.max_games = max_games
+        self._feeds = OrderedDict()  # game_id -> deque of (event_id, event_type, data)
+        self._last_id = 0
+        self._condition = threading.Condition()
+        self._listeners = []
+
+    def publish(self, game_id, event_type, data):
+        """Append an event to the game's feed, wake everyone waiting on it and return its id."""
+        with self._condition:
+            self._last_id += 1
+            feed = self._feeds.get(game_id)
+            if feed is None:
+                while len(self._feeds) >= self.max_games:
+                    self._feeds.popitem(last=False)
+                feed = self._feeds[game_id] = deque(maxlen=self.history)
+            else:
+                self._feeds.move_to_end(game_id)
+            feed.append((self._last_id, event_type, data))
+            self._condition.notify_all()
+            event_id = self._last_id
+        for listener in self._listeners:
+            listener(game_id, event_id)
+        return event_id
+
+    def add_listener(self, listener):
+        """Call ``listener(game_id, event_id)`` after every publish."""
+        self._listeners.append(listener)
+
+    def last_id(self, game_id):
+        """Return the id of the game's latest event, or 0 if it has none."""
+        with self._condition:
+            return self._last(game_id)
+
+    def events_after(self, game_id, after):
+        """Return the game's retained ``(event_id, event_type, data)`` events newer than ``after``."""
+        with self._condition:
+            return self._newer(game_id, after)
+
+    def wait(self, game_id, after, timeout):
+        """Block until the game has events newer than ``after`` or ``timeout`` seconds pass; return them."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._last(game_id) > after, timeout)
+            return self._newer(game_id, after)
+
+    def discard(self, game_id):
+        """Forget the game's feed."""
+        with self._condition:
+            self._feeds.pop(game_id, None)
+
+    def _last(self, game_id):
+        feed = self._feeds.get(game_id)
+        return feed[-1][0] if feed else 0
+
+    def _newer(self, game_id, after):
+        return [event for event in self._feeds.get(game_id, ()) if event[0] > after]
@@ -1,8 +1,22 @@
+import logging
+import time
+from collections import deque
+
+from . import metrics
 from .player import Player
 from .computerplayer import ComputerPlayer
-from .board import Board
+from .board import Board, BoardStateError
+from . import movegenerator
+
+logger = logging.getLogger(__name__)
+
 
 class GameManager:
+    # When True, every action re-verifies the board's running counts against a full recount
+    debug_checks = False
+    # Actions each game remembers for undo; older ones can no longer be taken back
+    history_limit = 256
+
     def __init__(self, board, player1, player2, game_type, starting_player_id=1, opponent_type="human"):
         """Initialize the game with a board and two players."""
         self.board = board
@@ -13,18 +27,24 @@ class GameManager:
         self.phase = self.determine_phase()
         self.waiting_for_removal = False
         self.opponent_type = opponent_type  # Store the opponent type
+        self.computer_turns_enabled = True  # Off while replaying actions, or when the caller schedules computer turns
+        self.action_listeners = []  # Called as listener(game_manager, action) after each successful action
+        self.version = 0  # Goes up by one with every applied action
+        # Undo records of the latest actions, and the actions undone since, newest last (kept in memory only)
+        self.history = deque(maxlen=self.history_limit)
+        self.redo_actions = deque(maxlen=self.history_limit)
+        self._redoing = False
 
 
     def switch_turn(self):
         """Switch the current player."""
         self.current_player = self.player1 if self.current_player == self.player2 else self.player2
-        print(f"Turn switched to Player {self.current_player.player_id}")
-        print(f"Current player type: {type(self.current_player)}")
-        if isinstance(self.current_player, ComputerPlayer):
-            print("It's the computer's turn. Delegating to handle_computer_turn.")
+        logger.debug("Turn switched to Player %s", self.current_player.player_id)
+        if isinstance(self.current_player, ComputerPlayer) and self.computer_turns_enabled:
+            logger.debug("It's the computer's turn. Delegating to handle_computer_turn.")
             self.handle_computer_turn()
         else:
-            print("It's a human player's turn.")
+            logger.debug("It's a human player's turn.")
 
     def get_current_player(self):
         """Return the ID of the current player."""
@@ -34,26 +54,32 @@ class GameManager:
         """Return the player object based on player_id."""
         return self.player1 if player_id == 1 else self.player2
 
+    def get_opponent(self):
+        """Return the player who is not currently moving."""
+        return self.player1 if self.current_player == self.player2 else self.player2
+
     def place_piece(self, x, y):
         """Handle placing a piece on the board for the current player."""
-        print(f"Attempting to place piece at ({x}, {y}) for Player {self.current_player.player_id}")
+        logger.debug("Attempting to place piece at (%s, %s) for Player %s", x, y, self.current_player.player_id)
         if self.waiting_for_removal:
-            print("Cannot place piece: waiting for opponent piece removal.")
+            logger.debug("Cannot place piece: waiting for opponent piece removal.")
             return {"success": False, "message": "Remove an opponent's piece before placing another."}
 
         if self.phase != 'placing':
-            print("Cannot place piece: not in placing phase.")
+            logger.debug("Cannot place piece: not in placing phase.")
             return {"success": False, "message": "Not in placing phase"}
 
         if self.board.is_valid_position(x, y) and self.board.grid[x][y] is None:
+            undo = self._undo_state(len(self.current_player.placed_pieces))
             if self.current_player.place_piece((x, y)):
                 self.board.grid[x][y] = self.current_player.player_id
                 self.current_player.placed_pieces.append((x, y))
+                self.record_action({"action": "place", "player": self.current_player.player_id, "x": x, "y": y}, undo)
                 mill_formed = self.board.check_for_mill(x, y, self.current_player)
 
                 if mill_formed:
                     self.waiting_for_removal = True
-                    print(f"Mill formed at ({x}, {y}) for Player {self.current_player.player_id}")
+                    logger.debug("Mill formed at (%s, %s) for Player %s", x, y, self.current_player.player_id)
                     return {
                         "success": True,
                         "mill_formed": True,
@@ -74,7 +100,7 @@ class GameManager:
                     "phase": self.phase
                 }
 
-        print(f"Failed to place piece at ({x}, {y}) for Player {self.current_player.player_id}")
+        logger.debug("Failed to place piece at (%s, %s) for Player %s", x, y, self.current_player.player_id)
         return {"success": False, "message": "Invalid position or position already occupied"}
 
     def move_piece(self, from_x, from_y, to_x, to_y):
@@ -92,41 +118,46 @@ class GameManager:
         if not self.board.is_valid_position(to_x, to_y) or self.board.grid[to_x][to_y] is not None:
             return {"success": False, "message": "Invalid move: destination is occupied or out of bounds"}
 
-        print(f"Phase: {self.phase}. Moving piece from ({from_x}, {from_y}) to ({to_x}, {to_y})")
-        print(f"Current player's placed pieces before move: {self.current_player.placed_pieces}")
+        if not self.board.is_valid_position(from_x, from_y) or \
+                self.board.grid[from_x][from_y] != self.current_player.player_id:
+            return {"success": False, "message": "Invalid move: you can only move your own pieces"}
 
-        # Dynamically count the player's pieces on the board
-        actual_piece_count = sum(
-            1 for row in self.board.grid for cell in row if cell == self.current_player.player_id
-        )
-        print(f"Actual piece count for player {self.current_player.player_id}: {actual_piece_count}")
+        logger.debug("Phase: %s. Moving piece from (%s, %s) to (%s, %s)", self.phase, from_x, from_y, to_x, to_y)
 
         # Check adjacency or allow flying if player has exactly 3 pieces on the board
-        if actual_piece_count == 3 or self.board.is_adjacent(from_x, from_y, to_x, to_y):
+        if movegenerator.is_legal_move(self.board, self.current_player.player_id, (from_x, from_y), (to_x, to_y)):
+            placed = self.current_player.placed_pieces
+            undo = self._undo_state([
+                [index for index, piece in enumerate(placed) if piece == (from_x, from_y)], (to_x, to_y) not in placed
+            ])
             # Update the grid
             self.board.grid[to_x][to_y] = self.current_player.player_id
             self.board.grid[from_x][from_y] = None
-            print(f"Updated grid after move: {self.board.grid}")
 
             # Ensure proper removal of `from_x, from_y`
             if (from_x, from_y) in self.current_player.placed_pieces:
-                print(f"Removing ({from_x}, {from_y}) from placed_pieces.")
+                logger.debug("Removing (%s, %s) from placed_pieces.", from_x, from_y)
                 self.current_player.placed_pieces = [
                     piece for piece in self.current_player.placed_pieces if piece != (from_x, from_y)
                 ]
             else:
-                print(f"ERROR: ({from_x}, {from_y}) not found in placed_pieces during move!")
+                logger.error("(%s, %s) not found in placed_pieces during move!", from_x, from_y)
 
             # Ensure no duplicates before adding `to_x, to_y`
             if (to_x, to_y) not in self.current_player.placed_pieces:
-                print(f"Adding ({to_x}, {to_y}) to placed_pieces.")
+                logger.debug("Adding (%s, %s) to placed_pieces.", to_x, to_y)
                 self.current_player.placed_pieces.append((to_x, to_y))
             else:
-                print(f"WARNING: ({to_x}, {to_y}) already exists in placed_pieces!")
+                logger.warning("(%s, %s) already exists in placed_pieces!", to_x, to_y)
+
+            self.record_action({
+                "action": "move", "player": self.current_player.player_id,
+                "from_x": from_x, "from_y": from_y, "to_x": to_x, "to_y": to_y
+            }, undo)
 
             # Check for mill formation
             mill_formed = self.board.check_for_mill(to_x, to_y, self.current_player)
-            print(f"Mill formed at ({to_x}, {to_y}): {mill_formed}")
+            logger.debug("Mill formed at (%s, %s): %s", to_x, to_y, mill_formed)
 
             if mill_formed:
                 self.waiting_for_removal = True
@@ -142,7 +173,7 @@ class GameManager:
             # Switch turn and determine new phase
             self.switch_turn()
             self.phase = self.determine_phase()
-            print(f"Turn switched. New phase: {self.phase}")
+            logger.debug("Turn switched. New phase: %s", self.phase)
 
             return {
                 "success": True,
@@ -167,19 +198,19 @@ class GameManager:
         if self.board.grid[x][y] != opponent.player_id:
             return {"success": False, "message": "Invalid removal: You can only remove the opponent's piece."}
 
-        # Check if the piece is part of a mill
-        if self.board.check_for_mill(x, y, opponent):
-            # Validate if all opponent's pieces are in mills
-            if not self.all_pieces_in_mills(opponent):
-                return {"success": False, "message": "Cannot remove a piece that is part of a mill unless all opponent's pieces are in mills."}
+        # Pieces in a mill are protected unless all of the opponent's pieces are in mills
+        if movegenerator.Move(movegenerator.REMOVE, (x, y)) not in movegenerator.removals(self.board, opponent.player_id):
+            return {"success": False, "message": "Cannot remove a piece that is part of a mill unless all opponent's pieces are in mills."}
 
-        # Perform the removal
+        # Perform the removal (each place lists the piece twice in placed_pieces; both entries go)
+        undo = self._undo_state([index for index, piece in enumerate(opponent.placed_pieces) if piece == (x, y)][:2])
         self.board.grid[x][y] = None
         if (x, y) in opponent.placed_pieces:
             opponent.placed_pieces.remove((x, y))
 
         opponent.remove_piece((x, y))
         self.waiting_for_removal = False  # Reset the flag after removal
+        self.record_action({"action": "remove", "player": self.current_player.player_id, "x": x, "y": y}, undo)
         self.phase = self.determine_phase()
 
         # Re-check if removing this piece results in a game over
@@ -204,40 +235,163 @@ class GameManager:
             "message": "Piece removed successfully. It's now the next player's turn."
         }
 
+    def record_action(self, action, undo=None):
+        """Count an action that was just applied and tell the action listeners about it.
+
+        ``undo`` is the action's undo record from ``_undo_state``, taken before it changed anything.
+        """
+        self.version += 1
+        if self._redoing:
+            # Marked in the log too, so a replica keeps the same redo stack
+            action["redo"] = True
+        if undo is not None:
+            self.history.append([action] + undo)
+            if not self._redoing:
+                self.redo_actions.clear()
+        if self.debug_checks:
+            self.check_consistency()
+        for listener in self.action_listeners:
+            listener(self, action)
+
+    def _undo_state(self, detail):
+        """Return the undo record of an action about to be applied, short of the action itself.
+
+        ``detail`` is what restores the mover's or victim's ``placed_pieces``:
+        its length before a place, the indices the piece is taken from for a
+        remove, and for a move those indices plus whether the destination is
+        appended.
+        """
+        return [self.phase, self.waiting_for_removal, self.current_player.player_id, detail]
+
+    @property
+    def can_undo(self):
+        return bool(self.history)
+
+    @property
+    def can_redo(self):
+        return bool(self.redo_actions)
+
+    def undo(self):
+        """Take back the latest action; returns False if there is none to take back."""
+        if not self.history:
+            return False
+        self._undo(self.history[-1])
+        return True
+
+    def redo(self):
+        """Apply the latest undone action again; returns False if there is none."""
+        if not self.redo_actions:
+            return False
+        return self.apply_action(dict(self.redo_actions[-1], redo=True))["success"]
+
+    def _undo(self, record):
+        """Restore the state from before the action of an undo record, and log the undo as an action."""
+        action, phase, waiting_for_removal, player_id, detail = record
+        player = self.get_player_by_id(action["player"])
+        grid = self.board.grid
+        if action["action"] == "place":
+            grid[action["x"]][action["y"]] = None
+            del player.placed_pieces[detail:]
+            player.pieces += 1
+        elif action["action"] == "move":
+            indices, appended = detail
+            origin = (action["from_x"], action["from_y"])
+            grid[action["to_x"]][action["to_y"]] = None
+            grid[origin[0]][origin[1]] = player.player_id
+            if appended:
+                player.placed_pieces.pop()
+            for index in indices:
+                player.placed_pieces.insert(index, origin)
+        else:
+            victim = self.get_player_by_id(3 - player.player_id)
+            grid[action["x"]][action["y"]] = victim.player_id
+            for index in detail:
+                victim.placed_pieces.insert(index, (action["x"], action["y"]))
+        self.phase = phase
+        self.waiting_for_removal = waiting_for_removal
+        self.current_player = self.get_player_by_id(player_id)
+
+        # An undo replayed from another process's log may be older than this game's history
+        if self.history and self.history[-1] == record:
+            self.history.pop()
+        self.redo_actions.append(action)
+        self.record_action({"action": "undo", "player": player_id, "record": record})
+
+    def apply_action(self, action):
+        """Apply a recorded place/move/remove (or undo) action without triggering computer turns.
+
+        An action marked ``redo`` re-applies the latest undone action and takes it off the redo stack.
+        """
+        if action["action"] == "undo":
+            self._undo(action["record"])
+            return {"success": True}
+        if action.get("player") != self.current_player.player_id:
+            return {"success": False, "message": f"It is not Player {action.get('player')}'s turn"}
+
+        enabled, self.computer_turns_enabled = self.computer_turns_enabled, False
+        self._redoing = bool(action.get("redo"))
+        try:
+            result = self._apply(action)
+        finally:
+            self.computer_turns_enabled = enabled
+            self._redoing = False
+        if action.get("redo") and result["success"] and self.redo_actions:
+            self.redo_actions.pop()
+        return result
+
+    def _apply(self, action):
+        if action["action"] == "place":
+            return self.place_piece(action["x"], action["y"])
+        if action["action"] == "move":
+            return self.move_piece(action["from_x"], action["from_y"], action["to_x"], action["to_y"])
+        if action["action"] == "remove":
+            return self.remove_piece(action["x"], action["y"])
+        return {"success": False, "message": f"Unknown action {action['action']!r}"}
+
     def handle_computer_turn(self):
         """Handle the computer's turn."""
+        if not metrics.enabled:
+            return self._play_computer_turn()
+        phase = "removal" if self.waiting_for_removal else self.phase
+        started = time.perf_counter()
+        try:
+            return self._play_computer_turn()
+        finally:
+            metrics.COMPUTER_TURNS.observe(time.perf_counter() - started, phase)
+
+    def _play_computer_turn(self):
         if not isinstance(self.current_player, ComputerPlayer):
-            print("ERROR: handle_computer_turn called, but current player is not a ComputerPlayer.")
+            logger.error("handle_computer_turn called, but current player is not a ComputerPlayer.")
             return
 
-        print(f"Computer is taking its turn in phase: {self.phase}")
+        logger.debug("Computer is taking its turn in phase: %s", self.phase)
 
         if self.waiting_for_removal:
-            print("Computer needs to remove an opponent's piece.")
+            logger.debug("Computer needs to remove an opponent's piece.")
             self.handle_computer_removal()  # Ensure this is called
             return
 
         if self.phase == "placing":
-            position = self.current_player.decide_placement(self.board)
+            position = self.current_player.decide_placement(self.board, self.get_opponent())
             if position:
-                print(f"Computer decided to place a piece at: {position}")
+                logger.debug("Computer decided to place a piece at: %s", position)
                 result = self.place_piece(*position)
                 if result.get("mill_formed"):
-                    print("Computer formed a mill. Removing an opponent's piece.")
+                    logger.debug("Computer formed a mill. Removing an opponent's piece.")
                     self.handle_computer_removal()
             else:
-                print("Computer failed to decide a valid placement.")
+                logger.debug("Computer failed to decide a valid placement.")
 
         elif self.phase in ["moving", "flying"]:
-            from_pos, to_pos = self.current_player.decide_move(self.board)
+            from_pos, to_pos = self.current_player.decide_move(self.board, self.get_opponent())
             if from_pos and to_pos:
-                print(f"Computer decided to move a piece from {from_pos} to {to_pos}")
+                logger.debug("Computer decided to move a piece from %s to %s", from_pos, to_pos)
                 result = self.move_piece(*from_pos, *to_pos)
                 if result.get("mill_formed"):
-                    print("Computer formed a mill after moving. Removing an opponent's piece.")
+                    logger.debug("Computer formed a mill after moving. Removing an opponent's piece.")
                     self.handle_computer_removal()
             else:
-                print("Computer failed to decide a valid move.")
+                logger.debug("Computer failed to decide a valid move.")
 
     def handle_computer_removal(self):
         """Handle removal of an opponent's piece by the computer."""
@@ -245,26 +399,32 @@ class GameManager:
         position = self.current_player.decide_removal(self.board, opponent)
 
         if position:
-            print(f"Computer decided to remove opponent's piece at: {position}")
+            logger.debug("Computer decided to remove opponent's piece at: %s", position)
             result = self.remove_piece(*position)
             if result["success"]:
-                print(f"Piece at {position} successfully removed by computer.")
+                logger.debug("Piece at %s successfully removed by computer.", position)
             else:
-                print(f"Failed to remove piece at {position}. Error: {result['message']}")
+                logger.debug("Failed to remove piece at %s. Error: %s", position, result['message'])
         else:
-            print("Computer could not decide which piece to remove.")
+            logger.debug("Computer could not decide which piece to remove.")
 
 
     @staticmethod
     def deserialize_player(data):
         player_type = data.get("type", "Player")
         if player_type == "ComputerPlayer":
-            print(f"Deserializing as ComputerPlayer: {data}")
-            player = ComputerPlayer(data["player_id"], data["pieces"])
+            logger.debug("Deserializing as ComputerPlayer: %s", data)
+            player = ComputerPlayer(
+                data["player_id"], data["pieces"],
+                search_depth=data.get("search_depth", 0), time_budget=data.get("time_budget"),
+                table_memory_mb=data.get("table_memory_mb", 16), tablebase_path=data.get("tablebase_path"),
+                opening_book_path=data.get("opening_book_path"), search_workers=data.get("search_workers", 1),
+                weights_path=data.get("weights_path")
+            )
         else:
-            print(f"Deserializing as Player: {data}")
+            logger.debug("Deserializing as Player: %s", data)
             player = Player(data["player_id"], data["pieces"])
-        player.placed_pieces = data["placed_pieces"]
+        player.placed_pieces = [tuple(position) for position in data["placed_pieces"]]
         return player
 
 
@@ -277,6 +437,7 @@ class GameManager:
             "phase": self.phase,
             "opponent_type": self.opponent_type,
             "waiting_for_removal": self.waiting_for_removal,  # Include this flag
+            "version": self.version,
         }
 
     @classmethod
@@ -284,13 +445,15 @@ class GameManager:
         board = Board.from_dict(data["board"])
         player1 = cls.deserialize_player(data["player1"])
         player2 = cls.deserialize_player(data["player2"])
-        print(f"Restoring GameManager: Player 1 type: {type(player1)}, Player 2 type: {type(player2)}")
+        logger.debug("Restoring GameManager: Player 1 type: %s, Player 2 type: %s", type(player1), type(player2))
         game_manager = cls(
             board, player1, player2, data["board"]["game_type"], starting_player_id=data.get("current_player_id")
         )
         game_manager.phase = data["phase"]
+        game_manager.waiting_for_removal = data.get("waiting_for_removal", False)
         game_manager.opponent_type = data.get("opponent_type", "human")
         game_manager.current_player = game_manager.get_player_by_id(data["current_player_id"])
+        game_manager.version = data.get("version", 0)
         return game_manager
 
 
@@ -301,11 +464,12 @@ class GameManager:
             'player1_pieces': self.player1.pieces,
             'player2_pieces': self.player2.pieces,
             'current_turn': self.current_player.player_id,
+            'version': self.version,
         }
 
     def get_pieces_on_board(self, player_id):
         """Return the number of pieces a player has on the board."""
-        return sum(1 for row in self.board.grid for piece in row if piece == player_id)
+        return self.board.count_pieces(player_id)
 
     def determine_phase(self):
         """Determine the current phase of the game."""
@@ -329,29 +493,35 @@ class GameManager:
 
     def all_pieces_in_mills(self, player):
         """Check if all the player's pieces are in mills."""
-        print(f"Checking if all pieces for Player {player.player_id} are in mills.")
-        print(f"Player {player.player_id} placed pieces: {player.placed_pieces}")
         for x, y in player.placed_pieces:
-            is_mill = self.board.check_for_mill(x, y, player)
-            print(f"Piece at ({x}, {y}) is in mill: {is_mill}")
-            if not is_mill:
+            if not self.board.check_for_mill(x, y, player):
                 return False
         return True
 
     def has_valid_moves(self, player):
-        if self.phase == 'flying':
-            for x in range(len(self.board.grid)):
-                for y in range(len(self.board.grid[x])):
-                    if self.board.is_valid_position(x, y) and self.board.grid[x][y] is None:
-                        return True
-        else:
-            for x in range(len(self.board.grid)):
-                for y in range(len(self.board.grid[x])):
-                    if self.board.grid[x][y] == player.player_id:
-                        for nx, ny in self.board.adjacent_positions.get((x, y), []):
-                            if self.board.grid[nx][ny] is None:
-                                return True
-        return False
+        """Check if the player can move, using the board's running counts."""
+        if self.phase == 'flying' or movegenerator.is_flying(self.board, player.player_id):
+            return self.board.empty_points > 0
+        return self.board.mobility_of(player.player_id) > 0
+
+    def legal_moves(self):
+        """Return every action the current player may take next, as movegenerator.Move objects."""
+        return movegenerator.legal_moves(self)
+
+    def check_consistency(self):
+        """Compare the board's running counts and the players' piece lists with a full recount.
+
+        Raises BoardStateError on any mismatch. Only called when ``debug_checks`` is on.
+        """
+        self.board.verify_counts()
+        counts, _, _ = self.board.recount()
+        for player in (self.player1, self.player2):
+            placed = len(set(player.placed_pieces))
+            if placed != counts.get(player.player_id, 0):
+                raise BoardStateError(
+                    f"Player {player.player_id} tracks {placed} placed pieces but has "
+                    f"{counts.get(player.player_id, 0)} on the board"
+                )
 
     def check_game_over(self):
         """Check if the game is over and return the status."""
@@ -0,0 +1,167 @@
+"""Counters and timers for the game engine, exported in Prometheus text format.
+
+Instrumentation is off until ``enable()`` is called. Call sites check the
+module-level ``enabled`` flag before touching a metric, so a disabled build
+pays one attribute lookup per hook and never reads the clock.
+"""
+import functools
+import threading
+import time
+
+enabled = False
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def enable(flag=True):
+    """Turn instrumentation on (or off with ``flag=False``)."""
+    global enabled
+    enabled = flag
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """A monotonically increasing count, optionally split by label values."""
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def reset(self):
+        with self._lock:
+            self._values = {}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Timer:
+    """A latency histogram in seconds, optionally split by label values."""
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += seconds
+
+    def count(self, *label_values):
+        series = self._series.get(label_values)
+        return series[-2] if series else 0
+
+    def total(self, *label_values):
+        series = self._series.get(label_values)
+        return series[-1] if series else 0.0
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self._series.items()):
+            for bound, count in zip(self.buckets, series):
+                labels = _format_labels(self.labels, label_values, [("le", bound)])
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labels, label_values, [("le", "+Inf")])
+            lines.append(f"{self.name}_bucket{labels} {series[-2]}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_count{labels} {series[-2]}")
+            lines.append(f"{self.name}_sum{labels} {series[-1]}")
+        return lines
+
+
+class Registry:
+    """The set of metrics one process exports."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter(name, help_text, labels))
+
+    def timer(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Timer(name, help_text, labels, buckets))
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def reset(self):
+        """Zero every metric (for tests and benchmarks)."""
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+MILL_CHECKS = REGISTRY.counter("morris_mill_checks_total", "Mill checks performed on a board.")
+MOVE_GENERATION = REGISTRY.timer(
+    "morris_move_generation_seconds", "Time spent generating legal moves.", labels=("kind",)
+)
+COMPUTER_TURNS = REGISTRY.timer(
+    "morris_computer_turn_seconds", "Time the computer took to play a turn.", labels=("phase",)
+)
+SEARCH_NODES = REGISTRY.counter("morris_search_nodes_total", "Positions visited by the alpha-beta search.")
+OPENING_BOOK_PROBES = REGISTRY.counter(
+    "morris_opening_book_probes_total", "Opening book lookups by outcome.", labels=("result",)
+)
+REQUESTS = REGISTRY.timer(
+    "morris_request_seconds", "Latency of API requests.", labels=("route", "method", "status")
+)
+
+
+def timed(timer, *label_values):
+    """Decorator that records a function's run time in ``timer`` while instrumentation is enabled."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timer.observe(time.perf_counter() - started, *label_values)
+        return wrapper
+    return decorate
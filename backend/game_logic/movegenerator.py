@@ -0,0 +1,119 @@
+"""Legal move generation shared by GameManager, ComputerPlayer and the API.
+
+All rules about which actions are legal live here: placements onto empty
+points, slides along the board's adjacency (including the 12 Men's Morris
+diagonals), flying once a player is down to three pieces, and removals that
+spare pieces in mills unless every opposing piece is in one.
+"""
+from . import metrics
+
+PLACE = "place"
+MOVE = "move"
+REMOVE = "remove"
+
+
+class Move:
+    """One legal action.
+
+    ``to_pos`` is the point a piece is placed on, moved to or removed from;
+    ``from_pos`` is only set for moves.
+    """
+
+    __slots__ = ("action", "from_pos", "to_pos")
+
+    def __init__(self, action, to_pos, from_pos=None):
+        self.action = action
+        self.to_pos = to_pos
+        self.from_pos = from_pos
+
+    def __eq__(self, other):
+        return (isinstance(other, Move) and self.action == other.action
+                and self.to_pos == other.to_pos and self.from_pos == other.from_pos)
+
+    def __hash__(self):
+        return hash((self.action, self.from_pos, self.to_pos))
+
+    def __repr__(self):
+        if self.action == MOVE:
+            return f"Move({self.action!r}, {self.from_pos} -> {self.to_pos})"
+        return f"Move({self.action!r}, {self.to_pos})"
+
+    def to_dict(self):
+        """Return the move in the same shape as the /api/place, /api/move and /api/remove payloads."""
+        if self.action == MOVE:
+            return {
+                "action": MOVE, "from_x": self.from_pos[0], "from_y": self.from_pos[1],
+                "to_x": self.to_pos[0], "to_y": self.to_pos[1]
+            }
+        return {"action": self.action, "x": self.to_pos[0], "y": self.to_pos[1]}
+
+
+def pieces_of(board, player_id):
+    """Return the playable points the player occupies, in board order."""
+    grid = board.grid
+    return [(x, y) for x, y in board.board_positions if grid[x][y] == player_id]
+
+
+def empty_points(board):
+    """Return the empty playable points, in board order."""
+    grid = board.grid
+    return [(x, y) for x, y in board.board_positions if grid[x][y] is None]
+
+
+def is_flying(board, player_id):
+    """Check if the player is down to three pieces and may fly."""
+    return board.count_pieces(player_id) == 3
+
+
+@metrics.timed(metrics.MOVE_GENERATION, "placements")
+def placements(board):
+    """Return every legal placement."""
+    return [Move(PLACE, pos) for pos in empty_points(board)]
+
+
+@metrics.timed(metrics.MOVE_GENERATION, "moves")
+def moves(board, player_id, flying=None):
+    """Return every legal slide, or every fly when the player is flying."""
+    if flying is None:
+        flying = is_flying(board, player_id)
+    grid = board.grid
+    if flying:
+        targets = empty_points(board)
+        return [Move(MOVE, to_pos, src) for src in pieces_of(board, player_id) for to_pos in targets]
+    neighbors = board.neighbors
+    return [
+        Move(MOVE, (nx, ny), src)
+        for src in pieces_of(board, player_id)
+        for nx, ny in neighbors.get(src, ())
+        if grid[nx][ny] is None
+    ]
+
+
+@metrics.timed(metrics.MOVE_GENERATION, "removals")
+def removals(board, opponent_id):
+    """Return the opponent's removable pieces: those outside mills, or all of them if none are."""
+    pieces = pieces_of(board, opponent_id)
+    outside = [pos for pos in pieces if not board.completes_mill(pos[0], pos[1], opponent_id)]
+    return [Move(REMOVE, pos) for pos in (outside or pieces)]
+
+
+def is_legal_move(board, player_id, from_pos, to_pos):
+    """Check a single slide or fly without generating the full list."""
+    if not board.is_valid_position(*from_pos) or not board.is_valid_position(*to_pos):
+        return False
+    if board.grid[from_pos[0]][from_pos[1]] != player_id or board.grid[to_pos[0]][to_pos[1]] is not None:
+        return False
+    return is_flying(board, player_id) or board.is_adjacent(*from_pos, *to_pos)
+
+
+def legal_moves(game_manager):
+    """Return every action the current player may take next in this game."""
+    if game_manager.check_game_over()["game_over"]:
+        return []
+    board = game_manager.board
+    player = game_manager.current_player
+    if game_manager.waiting_for_removal:
+        return removals(board, game_manager.get_opponent().player_id)
+    if game_manager.phase == "placing":
+        return placements(board) if player.pieces > 0 else []
+    return moves(board, player.player_id)
@@ -0,0 +1,73 @@
+"""Algebraic notation used by downloaded game records.
+
+Points are written as a column letter ``a``-``g`` and a row number ``1``-``7``,
+matching the board drawn by the client: ``a1`` is grid position (0, 0),
+``d1`` is (0, 3) and ``a4`` is (3, 0). A record looks like::
+
+    {"moves": [{"action": "place", "position": "a1", "player": 1},
+               {"action": "move", "from": "d1", "to": "d2", "player": 2},
+               {"action": "remove", "position": "d3", "player": 1}]}
+
+where ``player`` is the player taking the action (for a removal, the one
+who closed the mill).
+"""
+from .board import Board
+
+COLUMNS = "abcdefg"
+
+# Every playable point by name, and the reverse lookup
+POINT_NAMES = {
+    f"{COLUMNS[y]}{x + 1}": (x, y) for x, y in Board.board_positions
+}
+POSITION_NAMES = {position: name for name, position in POINT_NAMES.items()}
+
+
+class NotationError(ValueError):
+    """Raised for a record entry that cannot be parsed."""
+
+
+def parse_point(name):
+    """Return the (x, y) grid position of a point such as ``"d2"``."""
+    position = POINT_NAMES.get(str(name).strip().lower())
+    if position is None:
+        raise NotationError(f"{name!r} is not a point on the board")
+    return position
+
+
+def format_point(position):
+    """Return the algebraic name of an (x, y) grid position."""
+    name = POSITION_NAMES.get(tuple(position))
+    if name is None:
+        raise NotationError(f"{tuple(position)} is not a point on the board")
+    return name
+
+
+def parse_move(entry):
+    """Convert one record entry into the action dict ``GameManager.apply_action`` takes."""
+    if not isinstance(entry, dict):
+        raise NotationError(f"Expected an object, got {entry!r}")
+    action = entry.get("action")
+    player = entry.get("player")
+    if player not in (1, 2):
+        raise NotationError(f"Unknown player {player!r}")
+    try:
+        if action in ("place", "remove"):
+            x, y = parse_point(entry["position"])
+            return {"action": action, "player": player, "x": x, "y": y}
+        if action == "move":
+            from_x, from_y = parse_point(entry["from"])
+            to_x, to_y = parse_point(entry["to"])
+            return {"action": "move", "player": player, "from_x": from_x, "from_y": from_y, "to_x": to_x, "to_y": to_y}
+    except KeyError as error:
+        raise NotationError(f"{action!r} entry is missing {error.args[0]!r}")
+    raise NotationError(f"Unknown action {action!r}")
+
+
+def format_move(action):
+    """Convert an action dict (as recorded by GameManager) back into a record entry."""
+    if action["action"] == "move":
+        return {
+            "action": "move", "from": format_point((action["from_x"], action["from_y"])),
+            "to": format_point((action["to_x"], action["to_y"])), "player": action["player"]
+        }
+    return {"action": action["action"], "position": format_point((action["x"], action["y"])), "player": action["player"]}
@@ -0,0 +1,273 @@
+"""Opening book for the placing phase.
+
+Each entry maps a placing-phase position to the placement (and, when it
+closes a mill, the capture) to play there. Positions are keyed by an exact
+64-bit packing of the side to move's pieces, the opponent's pieces, both
+hands and the game type, taken from the position's canonical image under
+the board symmetries (``BoardGeometry.canonical``), so one entry serves
+every rotated, mirrored or ring-swapped copy of a position. Entries are fixed-width and sorted
+by key, so a lookup is a binary search over a memory-mapped file.
+
+Build a book offline from recorded games, self-play, or both, optionally
+letting the search pick the move in every position it keeps::
+
+    python -m game_logic.openingbook --records archive/ --selfplay 2000 --search-depth 4 --output openings.book
+"""
+import argparse
+import bisect
+import json
+import mmap
+import struct
+import sys
+
+from . import metrics
+from .bitboard import get_geometry
+from .notation import parse_move
+from .recordstats import check_record, iter_records
+from .search import SearchEngine
+
+MAGIC = b"MMOB\x00\x02\x00\x00"
+HEADER = struct.Struct("<8sI")
+ENTRY = struct.Struct("<QBBH")  # key, placement point, capture point (NO_REMOVAL if none), games seen
+NO_REMOVAL = 255
+
+# Positions reached by fewer games than this are left out of a book built from statistics
+MIN_GAMES = 2
+# Points a game is worth to the side that played a move: win, undecided, loss
+RESULT_POINTS = {"win": 2, "undecided": 1, "loss": 0}
+
+
+def book_key(game_type, mover, opponent, mover_hand, opponent_hand):
+    """Return ``(key, transform)``: the canonical key and the board symmetry that produced it."""
+    mover, opponent, transform = get_geometry(game_type).canonical(mover, opponent)
+    key = mover | opponent << 24 | mover_hand << 48 | opponent_hand << 52 | (game_type == "12mm") << 56
+    return key, transform
+
+
+def unpack_key(key):
+    """Return ``(game_type, mover, opponent, mover_hand, opponent_hand)`` for a key."""
+    game_type = "12mm" if key >> 56 & 1 else "9mm"
+    return game_type, key & 0xFFFFFF, key >> 24 & 0xFFFFFF, key >> 48 & 15, key >> 52 & 15
+
+
+def _record_placements(record, game_type):
+    """Yield ``(mover, opponent, mover_hand, opponent_hand, point, capture, player)`` for every placement.
+
+    The record must already have passed ``check_record``.
+    """
+    moves = record.get("moves") if isinstance(record, dict) else record
+    index_of = get_geometry(game_type).index
+    pieces = 12 if game_type == "12mm" else 9
+    bits = [0, 0, 0]
+    hand = [0, pieces, pieces]
+    actions = [parse_move(entry) for entry in moves]
+    for i, action in enumerate(actions):
+        player = action["player"]
+        if action["action"] == "remove":
+            bits[3 - player] &= ~(1 << index_of[(action["x"], action["y"])])
+            continue
+        if action["action"] == "move":
+            return  # The placing phase is over
+        point = index_of[(action["x"], action["y"])]
+        capture = None
+        if i + 1 < len(actions) and actions[i + 1]["action"] == "remove":
+            capture = index_of[(actions[i + 1]["x"], actions[i + 1]["y"])]
+        yield bits[player], bits[3 - player], hand[player], hand[3 - player], point, capture, player
+        bits[player] |= 1 << point
+        hand[player] -= 1
+
+
+class OpeningBookBuilder:
+    """Collects placing-phase statistics from finished games and turns them into book entries."""
+
+    def __init__(self):
+        self.positions = {}  # key -> {(point, capture): [games, points]} in the canonical frame
+        self.games = 0
+
+    def add_record(self, record, game_type="9mm"):
+        """Add a game record; returns False (and adds nothing) if it is not a legal game."""
+        summary = check_record(record, game_type)
+        if not summary["valid"]:
+            return False
+        game_type = summary["game_type"]
+        geometry = get_geometry(game_type)
+        for mover, opponent, mover_hand, opponent_hand, point, capture, player in _record_placements(record, game_type):
+            key, transform = book_key(game_type, mover, opponent, mover_hand, opponent_hand)
+            perm = geometry.symmetries[transform]
+            move = (perm[point], None if capture is None else perm[capture])
+            if summary["winner"] is None:
+                result = "undecided"
+            else:
+                result = "win" if summary["winner"] == player else "loss"
+            totals = self.positions.setdefault(key, {}).setdefault(move, [0, 0])
+            totals[0] += 1
+            totals[1] += RESULT_POINTS[result]
+        self.games += 1
+        return True
+
+    def entries(self, min_games=MIN_GAMES, search_depth=0, time_budget=None, progress=None):
+        """Return sorted ``(key, point, capture, games)`` entries.
+
+        Without a search depth the move with the best average result is
+        kept; with one, the search picks the move in every position that
+        reached ``min_games`` games.
+        """
+        entries = []
+        for key in sorted(self.positions):
+            moves = self.positions[key]
+            games = sum(totals[0] for totals in moves.values())
+            if games < min_games:
+                continue
+            if search_depth:
+                move = self._search(key, search_depth, time_budget)
+                if move is None:
+                    continue
+            else:
+                move = max(moves, key=lambda move: (moves[move][1] / moves[move][0], moves[move][0]))
+            point, capture = move
+            entries.append((key, point, NO_REMOVAL if capture is None else capture, min(games, 0xFFFF)))
+            if progress and len(entries) % 1000 == 0:
+                progress(f"{len(entries)} positions")
+        return entries
+
+    def _search(self, key, depth, time_budget):
+        game_type, mover, opponent, mover_hand, opponent_hand = unpack_key(key)
+        engine = SearchEngine(game_type, max_depth=depth, time_budget=time_budget)
+        result = engine.search([0, mover, opponent], [0, mover_hand, opponent_hand], 1)
+        if result.move is None:
+            return None
+        _, point, capture = result.move
+        return point, None if capture < 0 else capture
+
+
+def write_opening_book(path, entries):
+    """Write sorted ``(key, point, capture, games)`` entries to a book file."""
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(entries)))
+        for entry in entries:
+            f.write(ENTRY.pack(*entry))
+
+
+class OpeningBook:
+    """Read-only, memory-mapped opening book file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.size = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an opening book file")
+        self._keys = _KeyView(self._map, self.size)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __len__(self):
+        return self.size
+
+    def lookup(self, key):
+        """Return the stored ``(point, capture, games)`` for a canonical key, or None."""
+        index = bisect.bisect_left(self._keys, key)
+        if index == self.size or self._keys[index] != key:
+            return None
+        _, point, capture, games = ENTRY.unpack_from(self._map, HEADER.size + index * ENTRY.size)
+        return point, None if capture == NO_REMOVAL else capture, games
+
+    def probe(self, game_type, mover, opponent, mover_hand, opponent_hand):
+        """Return the book's ``(point, capture)`` point indices for a position, or None.
+
+        ``mover`` and ``opponent`` are bitboards of the side to move and the other side.
+        """
+        if not mover_hand:
+            return None
+        key, transform = book_key(game_type, mover, opponent, mover_hand, opponent_hand)
+        hit = self.lookup(key)
+        if metrics.enabled:
+            metrics.OPENING_BOOK_PROBES.inc(1, "hit" if hit else "miss")
+        if hit is None:
+            return None
+        inverse = get_geometry(game_type).inverse_symmetries[transform]
+        point = inverse[hit[0]]
+        capture = None if hit[1] is None else inverse[hit[1]]
+        if (mover | opponent) >> point & 1 or (capture is not None and not opponent >> capture & 1):
+            return None
+        return point, capture
+
+    def probe_board(self, board, player_id, pieces_in_hand, opponent_pieces_in_hand):
+        """Return the book's ``(position, capture position or None)`` on a board, or None."""
+        geometry = get_geometry(board.game_type)
+        bits = geometry.bits_of(board)
+        hit = self.probe(
+            geometry.game_type, bits[player_id], bits[3 - player_id], pieces_in_hand, opponent_pieces_in_hand
+        )
+        if hit is None:
+            return None
+        point, capture = hit
+        return geometry.points[point], None if capture is None else geometry.points[capture]
+
+
+class _KeyView:
+    """Sequence view of the sorted keys in a book, for ``bisect``."""
+
+    def __init__(self, buffer, size):
+        self._buffer = buffer
+        self._size = size
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        return struct.unpack_from("<Q", self._buffer, HEADER.size + index * ENTRY.size)[0]
+
+
+_OPEN_BOOKS = {}
+
+
+def open_opening_book(path):
+    """Return the shared OpeningBook for ``path``, opening it on first use."""
+    book = _OPEN_BOOKS.get(path)
+    if book is None:
+        book = _OPEN_BOOKS[path] = OpeningBook(path)
+    return book
+
+
+def main(argv=None):
+    from .selfplay import parse_agent, play_game
+
+    parser = argparse.ArgumentParser(description="Build an opening book for the placing phase.")
+    parser.add_argument("--records", nargs="*", default=[], help=".json records, .jsonl files or directories")
+    parser.add_argument("--game-type", choices=["9mm", "12mm"], default="9mm",
+                        help="game type for records without one, and for self-play")
+    parser.add_argument("--selfplay", type=int, default=0, help="self-play games to add")
+    parser.add_argument("--agent", default="greedy", help="self-play agent: 'greedy' or 'search:<depth>[:<seconds>]'")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-games", type=int, default=MIN_GAMES)
+    parser.add_argument("--search-depth", type=int, default=0, help="let a search of this depth pick each book move")
+    parser.add_argument("--time-budget", type=float, default=None, help="seconds per searched position")
+    parser.add_argument("--output", required=True, help="book file to write")
+    args = parser.parse_args(argv)
+
+    builder = OpeningBookBuilder()
+    skipped = 0
+    for _, text, game_type in iter_records(args.records, args.game_type):
+        try:
+            added = builder.add_record(json.loads(text), game_type)
+        except ValueError:
+            added = False
+        skipped += not added
+    agent = parse_agent(args.agent)
+    for game in range(args.selfplay):
+        result = play_game(args.game_type, agent, agent, seed=args.seed * 1000003 + game, record=True)
+        builder.add_record({"moves": result["moves"], "game_type": args.game_type})
+    print(f"Collected {len(builder.positions)} positions from {builder.games} games ({skipped} records skipped)")
+
+    entries = builder.entries(args.min_games, args.search_depth, args.time_budget, progress=print)
+    write_opening_book(args.output, entries)
+    print(f"Wrote {len(entries)} positions to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
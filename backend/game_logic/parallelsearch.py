@@ -0,0 +1,191 @@
+"""Root-splitting parallel search.
+
+``ParallelSearchEngine`` runs the same iterative deepening as
+``SearchEngine``, but from ``PARALLEL_MIN_DEPTH`` on it searches the
+previous iteration's best move itself and hands every other root move to a
+pool of worker processes. The best score found so far is kept in shared
+memory, so each worker starts from the tightest bound known when it picks a
+move up and publishes any improvement for the others. A bound set by a move
+later in the root order is loosened by one point, so a move that ties it is
+still scored exactly and wins the tie as it would in the serial search:
+the parallel search picks the same move, not just the same score. Worker
+processes keep their own transposition table across moves and turns.
+"""
+import itertools
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from .search import MATE_SCORE, SearchEngine, SearchTimeout
+from .tablebase import open_tablebase
+from .transposition import TranspositionTable
+
+# Iterations shallower than this are cheaper to search here than to ship to the workers
+PARALLEL_MIN_DEPTH = 3
+# How often (seconds) to look at the stop event while waiting for the workers
+STOP_POLL_INTERVAL = 0.05
+
+_search_ids = itertools.count(1)
+_pools = {}
+_pools_lock = threading.Lock()
+
+# Set in each worker process by _init_worker
+_worker_bound = None  # Shared [bound id, best root score, index of the root move that scored it]
+_worker_table_memory_mb = 0
+_worker_tablebase_path = None
+_worker_weights = None
+_worker_engines = {}  # game_type -> (SearchEngine, id of the search it last served)
+
+
+def _init_worker(bound, table_memory_mb, tablebase_path, weights):
+    global _worker_bound, _worker_table_memory_mb, _worker_tablebase_path, _worker_weights
+    _worker_bound = bound
+    _worker_table_memory_mb = table_memory_mb
+    _worker_tablebase_path = tablebase_path
+    _worker_weights = weights
+
+
+def _worker_engine(game_type, search_id):
+    engine, last_search = _worker_engines.get(game_type, (None, None))
+    if engine is None:
+        engine = SearchEngine(
+            game_type,
+            transposition_table=TranspositionTable(_worker_table_memory_mb) if _worker_table_memory_mb else None,
+            tablebase=open_tablebase(_worker_tablebase_path) if _worker_tablebase_path else None,
+            weights=_worker_weights
+        )
+    if last_search != search_id:
+        engine._history = {}
+        if engine.transposition_table is not None:
+            engine.transposition_table.new_search()
+    _worker_engines[game_type] = (engine, search_id)
+    return engine
+
+
+def _search_root_move(task):
+    """Search one root move in a worker; returns ``(score or None, nodes, timed_out)``.
+
+    The score is None when the move failed low, i.e. is no better than the
+    best found so far among the moves before it in the root order (``index``),
+    nor than the best found among those after it.
+    """
+    search_id, bound_id, game_type, bits, hand, player_id, index, move, depth, alpha, time_left = task
+    engine = _worker_engine(game_type, search_id)
+    with _worker_bound.get_lock():
+        if _worker_bound[0] == bound_id:
+            # Scores are whole points: a later move's bound must let a tie through, as it goes to this move
+            alpha = max(alpha, _worker_bound[1] - (_worker_bound[2] > index))
+    engine.nodes = 0
+    deadline = time.perf_counter() + time_left if time_left is not None else None
+    try:
+        score = engine.search_root_move(bits, hand, player_id, move, depth, alpha, deadline)
+    except SearchTimeout:
+        return None, engine.nodes, True
+    if score <= alpha:
+        return None, engine.nodes, False
+    with _worker_bound.get_lock():
+        if _worker_bound[0] == bound_id and (score, -index) > (_worker_bound[1], -_worker_bound[2]):
+            _worker_bound[1], _worker_bound[2] = score, index
+    return score, engine.nodes, False
+
+
+def _get_pool(workers, table_memory_mb, tablebase_path, weights):
+    """Return the shared ``(executor, bound)`` for a worker configuration, starting it on first use."""
+    key = (workers, table_memory_mb, tablebase_path, weights)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            # Spawned rather than forked: the pool may be started from a threaded web server
+            context = multiprocessing.get_context("spawn")
+            bound = context.Array("q", 3)
+            executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=context, initializer=_init_worker,
+                initargs=(bound, table_memory_mb, tablebase_path, weights)
+            )
+            pool = _pools[key] = (executor, bound)
+        return pool
+
+
+def shutdown_pools():
+    """Stop every worker pool started by ParallelSearchEngine."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for executor, _ in pools:
+        executor.shutdown(cancel_futures=True)
+
+
+class ParallelSearchEngine(SearchEngine):
+    """SearchEngine that splits the root moves of deeper iterations across ``workers`` processes.
+
+    ``table_memory_mb`` sizes each worker's own transposition table and
+    ``tablebase_path`` is opened by every worker, and the workers evaluate
+    with the engine's ``weights``. The worker pool is shared
+    by every engine with the same settings.
+    """
+
+    def __init__(self, game_type, max_depth=4, time_budget=None, transposition_table=None, tablebase=None,
+                 stop_event=None, weights=None, workers=2, table_memory_mb=16, tablebase_path=None):
+        super().__init__(
+            game_type, max_depth=max_depth, time_budget=time_budget, transposition_table=transposition_table,
+            tablebase=tablebase, stop_event=stop_event, weights=weights
+        )
+        self.weights = weights
+        self.workers = workers
+        self.table_memory_mb = table_memory_mb
+        self.tablebase_path = tablebase_path
+        self._search_id = 0
+
+    def search(self, bits, hand, player_id):
+        self._search_id = next(_search_ids)
+        return super().search(bits, hand, player_id)
+
+    def _search_root(self, moves, player_id, depth):
+        if depth < PARALLEL_MIN_DEPTH or len(moves) < 2 or self.workers < 2:
+            return super()._search_root(moves, player_id, depth)
+
+        # Search the previous iteration's best move here to get a bound for the rest
+        bits, hand, key = list(self._bits), list(self._hand), self._key
+        best_move = moves[0]
+        self._make(best_move, player_id)
+        alpha = -self._negamax(3 - player_id, depth - 1, -MATE_SCORE - 1, MATE_SCORE + 1, 1)
+        self._unmake(best_move, player_id)
+        self._key = key
+
+        executor, bound = _get_pool(self.workers, self.table_memory_mb, self.tablebase_path, self.weights)
+        bound_id = self._search_id * 64 + depth
+        with bound.get_lock():
+            bound[0], bound[1], bound[2] = bound_id, alpha, 0
+        time_left = None
+        if self._deadline is not None and not math.isinf(self._deadline):
+            time_left = self._deadline - time.perf_counter()
+        futures = [
+            executor.submit(_search_root_move, (
+                self._search_id, bound_id, self.game_type, bits, hand, player_id, index, move, depth, alpha, time_left
+            ))
+            for index, move in enumerate(moves[1:], 1)
+        ]
+        try:
+            # Taking results in move order keeps the serial search's choice between equal scores
+            for move, future in zip(moves[1:], futures):
+                score, nodes, timed_out = self._wait(future)
+                self.nodes += nodes
+                if timed_out:
+                    raise SearchTimeout()
+                if score is not None and score > alpha:
+                    alpha, best_move = score, move
+        except SearchTimeout:
+            for future in futures:
+                future.cancel()
+            raise
+        return alpha, best_move
+
+    def _wait(self, future):
+        while True:
+            try:
+                return future.result(timeout=STOP_POLL_INTERVAL)
+            except TimeoutError:
+                if self.stop_event is not None and self.stop_event.is_set():
+                    raise SearchTimeout()
@@ -0,0 +1,269 @@
+import json
+import sqlite3
+import threading
+import uuid
+import weakref
+
+from .gamemanager import GameManager
+
+
+class ConcurrentUpdateError(Exception):
+    """Raised when another process appended to a game's log first, or reset or deleted the game."""
+
+
+class MemoryBackend:
+    """Keeps snapshots and action logs in process memory (for tests and single-process use)."""
+
+    def __init__(self):
+        self._snapshots = {}
+        self._actions = {}
+        self._lock = threading.Lock()
+
+    def save_snapshot(self, game_id, seq, data, generation=""):
+        """Store the snapshot taken after ``seq`` actions and drop the log entries it covers.
+
+        ``generation`` tells apart successive games stored under one id (see ``GameRepository.create``).
+        """
+        with self._lock:
+            self._snapshots[game_id] = (seq, json.dumps(data), generation)
+            log = self._actions.get(game_id, {})
+            self._actions[game_id] = {n: action for n, action in log.items() if n > seq}
+
+    def load_snapshot(self, game_id):
+        """Return ``(seq, data, generation)`` for the game's snapshot, or None."""
+        with self._lock:
+            stored = self._snapshots.get(game_id)
+        if stored is None:
+            return None
+        return stored[0], json.loads(stored[1]), stored[2]
+
+    def snapshot_version(self, game_id):
+        """Return ``(seq, generation)`` of the game's snapshot, or None if there is none."""
+        with self._lock:
+            stored = self._snapshots.get(game_id)
+        return None if stored is None else (stored[0], stored[2])
+
+    def append_action(self, game_id, seq, action, generation=""):
+        """Append action number ``seq`` to the log of the game's stored ``generation``."""
+        with self._lock:
+            stored = self._snapshots.get(game_id)
+            if stored is None or stored[2] != generation:
+                raise ConcurrentUpdateError(f"Game {game_id} was reset or deleted")
+            log = self._actions.setdefault(game_id, {})
+            if seq in log:
+                raise ConcurrentUpdateError(f"Action {seq} of game {game_id} already exists")
+            log[seq] = json.dumps(action)
+
+    def load_actions(self, game_id, after_seq):
+        """Return ``[(seq, action), ...]`` for log entries after ``after_seq``, in order."""
+        with self._lock:
+            log = dict(self._actions.get(game_id, {}))
+        return [(seq, json.loads(log[seq])) for seq in sorted(log) if seq > after_seq]
+
+    def delete(self, game_id):
+        """Forget everything stored for the game."""
+        with self._lock:
+            self._snapshots.pop(game_id, None)
+            self._actions.pop(game_id, None)
+
+
+class SQLiteBackend:
+    """Stores snapshots and action logs in a SQLite database shared by every worker process."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                "game_id TEXT PRIMARY KEY, seq INTEGER NOT NULL, data TEXT NOT NULL, "
+                "generation TEXT NOT NULL DEFAULT '')"
+            )
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(snapshots)")]
+            if "generation" not in columns:  # A database from before games had generations
+                connection.execute("ALTER TABLE snapshots ADD COLUMN generation TEXT NOT NULL DEFAULT ''")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS actions ("
+                "game_id TEXT NOT NULL, seq INTEGER NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (game_id, seq))"
+            )
+
+    def _connection(self):
+        """Return this thread's connection, opening it on first use."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            if self.path != ":memory:":
+                connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def save_snapshot(self, game_id, seq, data, generation=""):
+        """Store the snapshot taken after ``seq`` actions and drop the log entries it covers.
+
+        ``generation`` tells apart successive games stored under one id (see ``GameRepository.create``).
+        """
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO snapshots (game_id, seq, data, generation) VALUES (?, ?, ?, ?)",
+                (game_id, seq, json.dumps(data, separators=(",", ":")), generation)
+            )
+            connection.execute("DELETE FROM actions WHERE game_id = ? AND seq <= ?", (game_id, seq))
+
+    def load_snapshot(self, game_id):
+        """Return ``(seq, data, generation)`` for the game's snapshot, or None."""
+        row = self._connection().execute(
+            "SELECT seq, data, generation FROM snapshots WHERE game_id = ?", (game_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2]
+
+    def snapshot_version(self, game_id):
+        """Return ``(seq, generation)`` of the game's snapshot, or None if there is none."""
+        row = self._connection().execute(
+            "SELECT seq, generation FROM snapshots WHERE game_id = ?", (game_id,)
+        ).fetchone()
+        return None if row is None else tuple(row)
+
+    def append_action(self, game_id, seq, action, generation=""):
+        """Append action number ``seq`` to the log of the game's stored ``generation``."""
+        connection = self._connection()
+        try:
+            with connection:
+                # Checked in the same statement, so no action lands in the log of a game reset meanwhile
+                cursor = connection.execute(
+                    "INSERT INTO actions (game_id, seq, data) SELECT ?, ?, ? WHERE EXISTS ("
+                    "SELECT 1 FROM snapshots WHERE game_id = ? AND generation = ?)",
+                    (game_id, seq, json.dumps(action, separators=(",", ":")), game_id, generation)
+                )
+        except sqlite3.IntegrityError:
+            raise ConcurrentUpdateError(f"Action {seq} of game {game_id} already exists")
+        if cursor.rowcount == 0:
+            raise ConcurrentUpdateError(f"Game {game_id} was reset or deleted")
+
+    def load_actions(self, game_id, after_seq):
+        """Return ``[(seq, action), ...]`` for log entries after ``after_seq``, in order."""
+        rows = self._connection().execute(
+            "SELECT seq, data FROM actions WHERE game_id = ? AND seq > ? ORDER BY seq",
+            (game_id, after_seq)
+        ).fetchall()
+        return [(seq, json.loads(data)) for seq, data in rows]
+
+    def delete(self, game_id):
+        """Forget everything stored for the game."""
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM snapshots WHERE game_id = ?", (game_id,))
+            connection.execute("DELETE FROM actions WHERE game_id = ?", (game_id,))
+
+
+class _TrackedGame:
+    """Where a live GameManager stands relative to its stored log."""
+
+    def __init__(self, game_id, seq, generation):
+        self.game_id = game_id
+        self.generation = generation
+        self.seq = seq  # Actions applied to the live game
+        self.snapshot_seq = seq  # Actions folded into the stored snapshot
+        self.replaying = False
+
+
+class GameRepository:
+    """Persists games as a snapshot plus an append-only log of actions.
+
+    Every place/move/remove a GameManager applies is appended to its log as a
+    small JSON record. ``checkpoint`` folds the log into a fresh snapshot once
+    it grows past ``compact_every`` actions, so the full grid is only written
+    occasionally. ``load`` rebuilds a GameManager from the snapshot and log,
+    and ``sync`` replays actions appended by other worker processes.
+
+    Each game ``create`` stores under an id is a new generation, so a worker
+    still holding the game from before a reset reloads it instead of mixing
+    the two games' logs.
+    """
+
+    def __init__(self, backend, compact_every=64):
+        self.backend = backend
+        self.compact_every = compact_every
+        self._tracked = weakref.WeakKeyDictionary()
+
+    def create(self, game_id, game_manager):
+        """Store a new (or reset) game and start logging its actions."""
+        generation = uuid.uuid4().hex
+        self.backend.delete(game_id)
+        self.backend.save_snapshot(game_id, 0, game_manager.to_dict(), generation)
+        self._track(game_id, game_manager, 0, generation)
+
+    def load(self, game_id):
+        """Rebuild the stored game, or return None if there is none."""
+        stored = self.backend.load_snapshot(game_id)
+        if stored is None:
+            return None
+        seq, data, generation = stored
+        game_manager = GameManager.from_dict(data)
+        self._track(game_id, game_manager, seq, generation)
+        return self.sync(game_manager)
+
+    def sync(self, game_manager):
+        """Apply any actions other processes appended since this game was last synced.
+
+        Returns the up-to-date game: ``game_manager`` itself, or a new
+        GameManager loaded from storage when another process has since reset
+        the game or compacted actions this one never saw into a newer snapshot.
+        """
+        tracked = self._tracked[game_manager]
+        actions = self.backend.load_actions(tracked.game_id, tracked.seq)
+        # Read after the actions, so a reset in between is still noticed
+        version = self.backend.snapshot_version(tracked.game_id)
+        if version is not None:
+            seq, generation = version
+            if generation != tracked.generation or (seq > tracked.seq and not actions):
+                return self._reload(game_manager)
+        if actions and actions[0][0] != tracked.seq + 1:
+            return self._reload(game_manager)
+        if not actions:
+            return game_manager
+        tracked.replaying = True
+        try:
+            for seq, action in actions:
+                game_manager.apply_action(action)
+                tracked.seq = seq
+        finally:
+            tracked.replaying = False
+        return game_manager
+
+    def _reload(self, game_manager):
+        return self.load(self._tracked[game_manager].game_id) or game_manager
+
+    def checkpoint(self, game_manager):
+        """Write a new snapshot if the log has grown past ``compact_every`` actions."""
+        tracked = self._tracked[game_manager]
+        if tracked.seq - tracked.snapshot_seq >= self.compact_every:
+            self.backend.save_snapshot(tracked.game_id, tracked.seq, game_manager.to_dict(), tracked.generation)
+            tracked.snapshot_seq = tracked.seq
+
+    def delete(self, game_id):
+        """Forget a stored game."""
+        self.backend.delete(game_id)
+
+    def _track(self, game_id, game_manager, seq, generation):
+        self._tracked[game_manager] = _TrackedGame(game_id, seq, generation)
+        if self._on_action not in game_manager.action_listeners:
+            game_manager.action_listeners.append(self._on_action)
+
+    def _on_action(self, game_manager, action):
+        tracked = self._tracked.get(game_manager)
+        if tracked is None or tracked.replaying:
+            return
+        self.backend.append_action(tracked.game_id, tracked.seq + 1, action, tracked.generation)
+        tracked.seq += 1
+
+
+def create_backend(path=None):
+    """Return a SQLite backend for ``path``, or an in-memory backend when no path is given."""
+    if path:
+        return SQLiteBackend(path)
+    return MemoryBackend()
@@ -0,0 +1,163 @@
+"""Compact, immutable game positions.
+
+A ``Position`` holds what the rules need and nothing more: both players'
+pieces as bitboards, their pieces in hand, the side to move and whether
+that side still owes the capture for a mill it has just closed. It is
+hashable, so positions can key dictionaries and sets, and it costs one
+small slotted object instead of a grid of lists and two Player objects.
+
+Moves are the search's compound ``(src, dst, rem)`` point-index tuples
+(``src`` is -1 for a placement, ``rem`` -1 when nothing is captured); while
+a capture is pending the only moves are ``(-1, -1, rem)``. ``make`` returns
+the position after a move and ``unmake`` the position before it, so a line
+can be explored and retraced without touching any shared game state.
+"""
+from .bitboard import get_geometry, iter_bits, popcount, position_key
+
+
+def removable(geometry, pieces):
+    """Return the pieces outside closed mills, or all of them if every piece is in one."""
+    in_mills = 0
+    for mill in geometry.mills:
+        if pieces & mill == mill:
+            in_mills |= mill
+    outside = pieces & ~in_mills
+    return outside if outside else pieces
+
+
+def generate_moves(geometry, bits, hand, player_id):
+    """Return every legal compound move for ``player_id`` (``bits``/``hand`` are indexed by player id)."""
+    own = bits[player_id]
+    opp = bits[3 - player_id]
+    empty = geometry.full_mask & ~(own | opp)
+
+    if hand[player_id]:
+        steps = [(-1, empty)]
+    elif popcount(own) == 3:
+        steps = [(src, empty) for src in iter_bits(own)]
+    else:
+        adjacent = geometry.adjacent
+        steps = [(src, adjacent[src] & empty) for src in iter_bits(own)]
+
+    moves = []
+    capturable = None
+    mills_at = geometry.mills_at
+    for src, targets in steps:
+        base = own if src < 0 else own & ~(1 << src)
+        for dst in iter_bits(targets):
+            after = base | 1 << dst
+            closes = False
+            for mill in mills_at[dst]:
+                if after & mill == mill:
+                    closes = True
+                    break
+            if closes and opp:
+                if capturable is None:
+                    capturable = removable(geometry, opp)
+                for rem in iter_bits(capturable):
+                    moves.append((src, dst, rem))
+            else:
+                moves.append((src, dst, -1))
+    return moves
+
+
+class Position:
+    """Immutable snapshot of a game; see the module docstring.
+
+    ``bits`` and ``hand`` are ``(0, player 1, player 2)`` tuples so they can
+    be indexed by player id, like the search's lists.
+    """
+
+    __slots__ = ("game_type", "bits", "hand", "side", "removing", "_hash")
+
+    def __init__(self, game_type, bits, hand, side, removing=False):
+        object.__setattr__(self, "game_type", game_type)
+        object.__setattr__(self, "bits", tuple(bits))
+        object.__setattr__(self, "hand", tuple(hand))
+        object.__setattr__(self, "side", side)
+        object.__setattr__(self, "removing", removing)
+        object.__setattr__(self, "_hash", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Position is immutable")
+
+    @classmethod
+    def from_board(cls, board, side, player1_hand, player2_hand, removing=False):
+        """Return the position on a grid-based board or BitBoard."""
+        geometry = get_geometry(board.game_type)
+        return cls(geometry.game_type, geometry.bits_of(board), (0, player1_hand, player2_hand), side, removing)
+
+    @classmethod
+    def from_game(cls, game_manager):
+        """Return the position of a GameManager's game."""
+        return cls.from_board(
+            game_manager.board, game_manager.current_player.player_id,
+            game_manager.player1.pieces, game_manager.player2.pieces, game_manager.waiting_for_removal
+        )
+
+    @property
+    def geometry(self):
+        return get_geometry(self.game_type)
+
+    @property
+    def key(self):
+        """Zobrist key of the position, as used by the search's transposition table."""
+        return position_key(self.bits, self.hand, self.side)
+
+    def pieces(self, player_id):
+        """Return the number of pieces ``player_id`` has on the board."""
+        return popcount(self.bits[player_id])
+
+    def legal_moves(self):
+        """Return every legal move for the side to move."""
+        geometry = self.geometry
+        if self.removing:
+            return [(-1, -1, rem) for rem in iter_bits(removable(geometry, self.bits[3 - self.side]))]
+        return generate_moves(geometry, self.bits, self.hand, self.side)
+
+    def make(self, move):
+        """Return the position after ``move``; the turn passes to the other side."""
+        src, dst, rem = move
+        side = self.side
+        bits = list(self.bits)
+        hand = list(self.hand)
+        if dst >= 0:
+            if src < 0:
+                hand[side] -= 1
+            else:
+                bits[side] &= ~(1 << src)
+            bits[side] |= 1 << dst
+        if rem >= 0:
+            bits[3 - side] &= ~(1 << rem)
+        return Position(self.game_type, bits, hand, 3 - side)
+
+    def unmake(self, move):
+        """Return the position ``move`` was made from (the inverse of ``make``)."""
+        src, dst, rem = move
+        side = 3 - self.side
+        bits = list(self.bits)
+        hand = list(self.hand)
+        if rem >= 0:
+            bits[self.side] |= 1 << rem
+        if dst >= 0:
+            bits[side] &= ~(1 << dst)
+            if src < 0:
+                hand[side] += 1
+            else:
+                bits[side] |= 1 << src
+        return Position(self.game_type, bits, hand, side, removing=dst < 0)
+
+    def __eq__(self, other):
+        if not isinstance(other, Position):
+            return NotImplemented
+        return (self.bits == other.bits and self.hand == other.hand and self.side == other.side
+                and self.removing == other.removing and self.game_type == other.game_type)
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(self, "_hash", hash((self.game_type, self.bits, self.hand, self.side, self.removing)))
+        return self._hash
+
+    def __repr__(self):
+        return (f"Position({self.game_type!r}, bits={self.bits}, hand={self.hand}, side={self.side}, "
+                f"removing={self.removing})")
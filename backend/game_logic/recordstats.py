@@ -0,0 +1,341 @@
+"""Bulk validation and statistics for downloaded game records.
+
+Reads any mix of ``.json`` record files, directories of them (searched
+recursively) and JSON-lines files with one record per line, checks every
+record against the rules in parallel, and prints aggregate statistics::
+
+    python -m game_logic.recordstats archive/ more.jsonl --workers 8 --errors illegal.jsonl
+
+Records are checked with bit masks over the shared board geometry instead
+of by driving GameManager, with the same rules and game-over checks, so a
+record that passes here also passes ``POST /api/replay``. Records are
+streamed through a bounded window of worker tasks, so memory stays flat
+however large the corpus is. Records
+carry no game type, so ``--game-type`` applies unless a record has its own
+``game_type`` field.
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .bitboard import get_geometry, iter_bits, popcount
+from .notation import NotationError, parse_move
+from .position import removable
+
+# Records sent to a worker per task, and tasks kept in flight per worker
+BATCH_SIZE = 64
+TASKS_PER_WORKER = 4
+# How many illegal records are quoted in the report
+MAX_EXAMPLES = 10
+# Opening statistics cover this many placements
+OPENING_PLIES = 2
+
+
+def _can_move(geometry, bits, player_id):
+    own = bits[player_id]
+    empty = geometry.full_mask & ~(bits[1] | bits[2])
+    if popcount(own) == 3:
+        return bool(empty)
+    adjacent = geometry.adjacent
+    return any(adjacent[src] & empty for src in iter_bits(own))
+
+
+def _winner(geometry, bits, hand):
+    """Return the winner by the same checks, in the same order, as ``GameManager.check_game_over``."""
+    for player_id in (1, 2):
+        if not hand[player_id] and popcount(bits[player_id]) < 3:
+            return 3 - player_id
+    for player_id in (1, 2):
+        if not hand[player_id] and not _can_move(geometry, bits, player_id):
+            return 3 - player_id
+    return None
+
+
+def check_record(record, game_type="9mm"):
+    """Check one record and return a small summary dict.
+
+    The summary has ``valid``, ``game_type``, ``first_player``, ``winner``
+    (None while undecided), ``plies`` (turns played, a capture counting with
+    the move that earned it), ``actions``, ``mills`` and ``opening``. An
+    invalid record also has ``error`` and the zero-based ``index`` of the
+    entry at fault.
+    """
+    moves = record.get("moves") if isinstance(record, dict) else record
+    if isinstance(record, dict):
+        game_type = record.get("game_type", record.get("gameType", game_type))
+    game_type = "12mm" if game_type == "12mm" else "9mm"
+    summary = {
+        "valid": True, "game_type": game_type, "first_player": None, "winner": None,
+        "plies": 0, "actions": 0, "mills": 0, "opening": [],
+    }
+    if not isinstance(moves, list):
+        return dict(summary, valid=False, error='no "moves" list', index=None)
+
+    geometry = get_geometry(game_type)
+    index_of = geometry.index
+    pieces = 12 if game_type == "12mm" else 9
+    bits = [0, 0, 0]
+    hand = [0, pieces, pieces]
+    player = None
+    i = 0
+
+    def fail(index, reason):
+        return dict(summary, valid=False, error=reason, index=index)
+
+    while i < len(moves):
+        try:
+            action = parse_move(moves[i])
+        except NotationError as error:
+            return fail(i, str(error))
+        if player is None:
+            player = summary["first_player"] = action["player"]
+        if summary["winner"] is not None:
+            return fail(i, "move after the game is over")
+        if action["player"] != player:
+            return fail(i, f"Player {action['player']} moved out of turn")
+
+        if action["action"] == "place":
+            src, dst = -1, index_of[(action["x"], action["y"])]
+            if len(summary["opening"]) < OPENING_PLIES:
+                summary["opening"].append(moves[i]["position"])
+        elif action["action"] == "move":
+            src = index_of[(action["from_x"], action["from_y"])]
+            dst = index_of[(action["to_x"], action["to_y"])]
+        else:
+            return fail(i, "removal without a mill")
+
+        own, opp = bits[player], bits[3 - player]
+        empty = geometry.full_mask & ~(own | opp)
+        if src < 0:
+            legal = hand[player] and empty >> dst & 1
+        else:
+            legal = (not hand[player] and own >> src & 1 and empty >> dst & 1
+                     and (popcount(own) == 3 or geometry.adjacent[src] >> dst & 1))
+        if not legal:
+            return fail(i, f"illegal {action['action']}")
+        after = (own & ~(1 << src) if src >= 0 else own) | 1 << dst
+        closes = any(after & mill == mill for mill in geometry.mills_at[dst])
+
+        if src < 0:
+            hand[player] -= 1
+        else:
+            bits[player] &= ~(1 << src)
+        bits[player] |= 1 << dst
+        summary["plies"] += 1
+        summary["actions"] = i + 1
+        i += 1
+        if closes:
+            # GameManager looks for a result before the capture too
+            summary["winner"] = _winner(geometry, bits, hand)
+            if summary["winner"] is not None or i == len(moves):
+                continue  # The record stops before the capture
+            try:
+                removal = parse_move(moves[i])
+            except NotationError as error:
+                return fail(i, str(error))
+            if removal["action"] != "remove" or removal["player"] != player:
+                return fail(i, "mill closed without a removal")
+            rem = index_of[(removal["x"], removal["y"])]
+            if not removable(geometry, opp) >> rem & 1:
+                return fail(i, "that piece cannot be removed")
+            bits[3 - player] &= ~(1 << rem)
+            summary["mills"] += 1
+            summary["actions"] = i + 1
+            i += 1
+
+        player = 3 - player
+        summary["winner"] = _winner(geometry, bits, hand)
+    return summary
+
+
+def _check_batch(batch):
+    """Worker entry point: parse and check a batch of ``(source, text, game_type)`` items."""
+    results = []
+    for source, text, game_type in batch:
+        try:
+            record = json.loads(text)
+        except ValueError as error:
+            results.append((source, {"valid": False, "error": f"not JSON: {error}", "index": None}))
+            continue
+        results.append((source, check_record(record, game_type)))
+    return results
+
+
+def iter_records(paths, game_type="9mm"):
+    """Yield ``(source, text, game_type)`` for every record under the given paths, one at a time."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith((".json", ".jsonl")):
+                        yield from iter_records([os.path.join(root, name)], game_type)
+        elif path.endswith(".jsonl"):
+            with open(path) as f:
+                for number, line in enumerate(f, 1):
+                    if line.strip():
+                        yield f"{path}:{number}", line, game_type
+        else:
+            with open(path) as f:
+                yield path, f.read(), game_type
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def check_records(items, workers=None):
+    """Yield ``(source, summary)`` for each item, checking batches in parallel.
+
+    At most ``TASKS_PER_WORKER`` batches per worker are in flight, so the
+    input is consumed lazily. With ``workers`` of 1 everything runs in this
+    process. Results come back in completion order.
+    """
+    batches = _batches(items, BATCH_SIZE)
+    if workers == 1:
+        for batch in batches:
+            yield from _check_batch(batch)
+        return
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for batch in batches:
+            pending.add(executor.submit(_check_batch, batch))
+            if len(pending) >= workers * TASKS_PER_WORKER:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in pending:
+            yield from future.result()
+
+
+class RecordStats:
+    """Running totals over checked records; memory does not grow with the corpus."""
+
+    def __init__(self, max_examples=MAX_EXAMPLES):
+        self.max_examples = max_examples
+        self.records = 0
+        self.invalid = 0
+        self.errors = {}  # Reason -> count
+        self.examples = []  # First few (source, index, reason)
+        self.games = {}  # (game_type, first_player) -> [games, first wins, second wins, undecided]
+        self.plies = 0
+        self.actions = 0
+        self.mills = 0
+        self.openings = {}  # Opening placements -> [games, first-player wins]
+
+    def add(self, source, summary):
+        self.records += 1
+        if not summary["valid"]:
+            self.invalid += 1
+            reason = summary["error"].split(":")[0] if summary["error"].startswith("not JSON") else summary["error"]
+            self.errors[reason] = self.errors.get(reason, 0) + 1
+            if len(self.examples) < self.max_examples:
+                self.examples.append((source, summary["index"], summary["error"]))
+            return
+        self.plies += summary["plies"]
+        self.actions += summary["actions"]
+        self.mills += summary["mills"]
+        first = summary["first_player"]
+        totals = self.games.setdefault((summary["game_type"], first), [0, 0, 0, 0])
+        totals[0] += 1
+        if summary["winner"] is None:
+            totals[3] += 1
+        elif summary["winner"] == first:
+            totals[1] += 1
+        else:
+            totals[2] += 1
+        if summary["opening"]:
+            opening = self.openings.setdefault(" ".join(summary["opening"]), [0, 0])
+            opening[0] += 1
+            opening[1] += summary["winner"] == first
+
+    def to_dict(self):
+        valid = self.records - self.invalid
+        return {
+            "records": self.records,
+            "valid": valid,
+            "invalid": self.invalid,
+            "errors": dict(sorted(self.errors.items(), key=lambda item: -item[1])),
+            "examples": [
+                {"source": source, "index": index, "error": error} for source, index, error in self.examples
+            ],
+            "average_plies": self.plies / valid if valid else 0.0,
+            "average_actions": self.actions / valid if valid else 0.0,
+            "mills_per_game": self.mills / valid if valid else 0.0,
+            "by_first_player": [
+                {
+                    "game_type": game_type, "first_player": first, "games": games,
+                    "first_player_win_rate": first_wins / games, "second_player_win_rate": second_wins / games,
+                    "undecided": undecided,
+                }
+                for (game_type, first), (games, first_wins, second_wins, undecided) in sorted(self.games.items())
+            ],
+            "top_openings": [
+                {"opening": opening, "games": games, "first_player_win_rate": wins / games}
+                for opening, (games, wins) in sorted(self.openings.items(), key=lambda item: -item[1][0])[:10]
+            ],
+        }
+
+
+def format_report(stats):
+    """Render ``RecordStats.to_dict()`` as plain text."""
+    lines = [
+        f"{stats['records']} records: {stats['valid']} valid, {stats['invalid']} invalid",
+        f"average length {stats['average_plies']:.1f} turns ({stats['average_actions']:.1f} actions), "
+        f"{stats['mills_per_game']:.2f} mills per game",
+    ]
+    for row in stats["by_first_player"]:
+        lines.append(
+            f"  {row['game_type']} Player {row['first_player']} first: {row['games']} games, "
+            f"first wins {row['first_player_win_rate']:.1%}, second wins {row['second_player_win_rate']:.1%}, "
+            f"{row['undecided']} undecided"
+        )
+    if stats["top_openings"]:
+        lines.append("top openings:")
+        for row in stats["top_openings"]:
+            lines.append(f"  {row['opening']:<8} {row['games']} games, first player wins {row['first_player_win_rate']:.1%}")
+    if stats["errors"]:
+        lines.append("illegal records:")
+        for reason, count in stats["errors"].items():
+            lines.append(f"  {count:>6}  {reason}")
+        for example in stats["examples"]:
+            lines.append(f"  e.g. {example['source']} move {example['index']}: {example['error']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate game records in bulk and report statistics.")
+    parser.add_argument("paths", nargs="+", help=".json records, .jsonl files or directories")
+    parser.add_argument("--game-type", choices=["9mm", "12mm"], default="9mm")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--errors", help="write every illegal record's source and reason to this JSON-lines file")
+    parser.add_argument("--json", action="store_true", help="print the statistics as JSON")
+    args = parser.parse_args(argv)
+
+    stats = RecordStats()
+    errors = open(args.errors, "w") if args.errors else None
+    try:
+        for source, summary in check_records(iter_records(args.paths, args.game_type), workers=args.workers):
+            stats.add(source, summary)
+            if errors and not summary["valid"]:
+                errors.write(json.dumps({"source": source, "index": summary["index"], "error": summary["error"]}) + "\n")
+    finally:
+        if errors:
+            errors.close()
+    report = stats.to_dict()
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 1 if stats.invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""Replay a whole game record against GameManager in one call, or index it for seeking."""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from .board import Board
+from .gamemanager import GameManager
+from .notation import NotationError, parse_move
+from .player import Player
+
+# Plies between the snapshots of a ReplayIndex; seeking replays fewer moves than this
+KEYFRAME_INTERVAL = 16
+
+
+class ReplayError(Exception):
+    """Raised when a record entry cannot be parsed or is not legal at that point of the game."""
+
+    def __init__(self, index, reason):
+        super().__init__(f"Move {index + 1}: {reason}")
+        self.index = index  # Zero-based position of the offending entry
+        self.reason = reason
+
+
+def new_game(game_type, starting_player_id=1):
+    """Create an empty two-human game of the given type."""
+    pieces = 12 if game_type == "12mm" else 9
+    return GameManager(
+        Board(game_type), Player(1, pieces), Player(2, pieces), game_type, starting_player_id=starting_player_id
+    )
+
+
+def game_state(game_manager):
+    """Return the state of a game in the same shape as the /api/board response."""
+    status = game_manager.check_game_over()
+    board = game_manager.get_board_state()
+    board["grid"] = [list(row) for row in board["grid"]]  # Detach from the live board
+    state = {
+        "board": board,
+        "current_player": game_manager.get_current_player(),
+        "phase": "game_over" if status["game_over"] else game_manager.phase,
+        "game_type": game_manager.game_type,
+        "waiting_for_removal": game_manager.waiting_for_removal,
+        "game_over": status["game_over"],
+    }
+    if status["game_over"]:
+        state["winner"] = status["winner"]
+        state["message"] = status["message"]
+    return state
+
+
+def parse_record(record):
+    """Return the action dicts for a record (``{"moves": [...]}`` or a bare list of entries)."""
+    moves = record.get("moves") if isinstance(record, dict) else record
+    if not isinstance(moves, list):
+        raise ValueError('A record must be a list of moves or an object with a "moves" list')
+    actions = []
+    for index, entry in enumerate(moves):
+        try:
+            actions.append(parse_move(entry))
+        except NotationError as error:
+            raise ReplayError(index, str(error))
+    return actions
+
+
+def _apply_actions(game_manager, actions):
+    """Apply actions in order, yielding the ply count after each; raises ReplayError at the first illegal one."""
+    for index, action in enumerate(actions):
+        if game_manager.check_game_over()["game_over"]:
+            raise ReplayError(index, "the game is already over")
+        result = game_manager.apply_action(action)
+        if not result["success"]:
+            raise ReplayError(index, result["message"])
+        yield index + 1
+
+
+def _check_ply(ply, plies):
+    if not 0 <= ply <= plies:
+        raise ValueError(f"Move index {ply} is outside the record (0..{plies})")
+
+
+def replay_record(record, game_type="9mm", starting_player_id=None, snapshot_at=None):
+    """Validate and apply every move of a record.
+
+    The starting player defaults to whoever makes the first move. Returns
+    ``(game_manager, snapshot)`` where ``snapshot`` is the ``game_state``
+    after the first ``snapshot_at`` moves, or None when no index is asked
+    for. Raises ReplayError at the first illegal entry.
+    """
+    actions = parse_record(record)
+    if snapshot_at is not None:
+        _check_ply(snapshot_at, len(actions))
+    if starting_player_id is None:
+        starting_player_id = actions[0]["player"] if actions else 1
+
+    game_manager = new_game(game_type, starting_player_id)
+    snapshot = game_state(game_manager) if snapshot_at == 0 else None
+    for ply in _apply_actions(game_manager, actions):
+        if snapshot_at == ply:
+            snapshot = game_state(game_manager)
+    return game_manager, snapshot
+
+
+def replay_key(record, game_type="9mm"):
+    """Return the id of a record: the same moves of the same game type always get the same id."""
+    canonical = json.dumps({"game_type": game_type, "moves": parse_record(record)}, sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+
+class ReplayIndex:
+    """A validated record with keyframes, for jumping to the state after any ply.
+
+    The record is replayed once, when the index is built, and every
+    ``interval`` plies the game is kept as a serialized ``GameManager``
+    snapshot. The game after ply N is then rebuilt from the nearest keyframe
+    at or before N by applying fewer than ``interval`` already-validated moves.
+    """
+
+    def __init__(self, record, game_type="9mm", starting_player_id=None, interval=KEYFRAME_INTERVAL):
+        self.actions = parse_record(record)
+        self.game_type = game_type
+        self.interval = interval
+        self.replay_id = replay_key(record, game_type)
+        if starting_player_id is None:
+            starting_player_id = self.actions[0]["player"] if self.actions else 1
+
+        game_manager = new_game(game_type, starting_player_id)
+        self._keyframes = [json.dumps(game_manager.to_dict())]
+        for ply in _apply_actions(game_manager, self.actions):
+            if ply % interval == 0:
+                self._keyframes.append(json.dumps(game_manager.to_dict()))
+        self.final_state = game_state(game_manager)
+
+    @property
+    def plies(self):
+        return len(self.actions)
+
+    def game_at(self, ply):
+        """Return a new GameManager holding the game after the first ``ply`` moves."""
+        _check_ply(ply, self.plies)
+        keyframe = ply // self.interval
+        game_manager = GameManager.from_dict(json.loads(self._keyframes[keyframe]))
+        for action in self.actions[keyframe * self.interval:ply]:
+            game_manager.apply_action(action)
+        return game_manager
+
+    def state_at(self, ply):
+        """Return the ``game_state`` after the first ``ply`` moves."""
+        if ply == self.plies:
+            return self.final_state
+        return game_state(self.game_at(ply))
+
+
+class ReplayCache:
+    """Recently indexed records by replay id; the least recently used one goes first when full."""
+
+    def __init__(self, max_replays=256):
+        self.max_replays = max_replays
+        self._replays = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._replays)
+
+    def index(self, record, game_type="9mm"):
+        """Return the record's ReplayIndex, building (and so validating) it only if it is not cached."""
+        replay_id = replay_key(record, game_type)
+        index = self.get(replay_id)
+        if index is None:
+            index = ReplayIndex(record, game_type)
+            with self._lock:
+                while len(self._replays) >= self.max_replays:
+                    self._replays.popitem(last=False)
+                index = self._replays.setdefault(replay_id, index)
+        return index
+
+    def get(self, replay_id):
+        """Return the ReplayIndex for ``replay_id``, or None if it is unknown or was dropped."""
+        with self._lock:
+            index = self._replays.get(replay_id)
+            if index is not None:
+                self._replays.move_to_end(replay_id)
+            return index
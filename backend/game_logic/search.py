@@ -0,0 +1,348 @@
+import math
+import time
+
+from .bitboard import ZOBRIST_HAND, ZOBRIST_PIECES, ZOBRIST_SIDE, get_geometry, popcount, position_key
+from .evaluation import Evaluator
+from .position import generate_moves
+from .transposition import EXACT, LOWER_BOUND, UPPER_BOUND
+
+# Scores at or beyond this magnitude (minus the ply distance) are forced wins/losses
+MATE_SCORE = 100000
+
+# How many nodes to search between clock checks
+CLOCK_CHECK_INTERVAL = 1024
+
+# Scores beyond this are mate scores and are stored in the transposition table relative to the node
+MATE_THRESHOLD = MATE_SCORE - 1000
+
+# While no more than this many pieces have been placed, positions go into the transposition
+# table under their symmetry-canonical key; later, symmetric transpositions are too rare to
+# pay for canonicalizing every node
+SYMMETRY_MAX_PIECES = 4
+
+
+def _permute_move(move, perm):
+    src, dst, rem = move
+    return (perm[src] if src >= 0 else -1, perm[dst], perm[rem] if rem >= 0 else -1)
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget runs out."""
+
+
+class SearchResult:
+    """Outcome of a search: the best compound move and how it was found.
+
+    ``move`` is a ``(from_index, to_index, remove_index)`` tuple of point
+    indices, where ``from_index`` is -1 for a placement and ``remove_index``
+    is -1 when the move does not close a mill.
+    """
+
+    def __init__(self, move, score, depth, nodes, elapsed):
+        self.move = move
+        self.score = score
+        self.depth = depth
+        self.nodes = nodes
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return (f"SearchResult(move={self.move}, score={self.score}, depth={self.depth}, "
+                f"nodes={self.nodes}, elapsed={self.elapsed:.3f})")
+
+
+class SearchEngine:
+    """Negamax alpha-beta search over compound moves with iterative deepening.
+
+    A compound move is a placement, slide or fly together with the removal it
+    earns when it closes a mill, so every ply hands the turn to the opponent.
+    The search deepens one ply at a time until ``max_depth`` is reached or the
+    ``time_budget`` (seconds, None for unlimited) runs out, and returns the
+    best move of the deepest completed iteration.
+
+    Passing a ``TranspositionTable`` lets results be reused across iterations
+    and, when the same table is handed to later searches, across turns. With
+    a ``Tablebase``, endgame positions it covers are scored exactly instead
+    of searched, and a covered root is settled with a one-ply search. Setting
+    ``stop_event`` (a ``threading.Event``) ends the search like a spent time
+    budget, returning the best move found so far. Early
+    in the placing phase, table entries are shared between symmetric
+    positions (see ``_table_key``). Leaves are scored by an ``Evaluator``
+    with the given ``EvaluationWeights`` (the defaults when None).
+    """
+
+    def __init__(self, game_type, max_depth=4, time_budget=None, transposition_table=None, tablebase=None,
+                 stop_event=None, weights=None):
+        self.game_type = game_type
+        self.geometry = get_geometry(game_type)
+        self.max_depth = max_depth
+        self.time_budget = time_budget
+        self.transposition_table = transposition_table
+        self.tablebase = tablebase
+        self.stop_event = stop_event
+        self.evaluator = Evaluator(game_type, weights)
+        self.nodes = 0
+        self._deadline = None
+        self._bits = [0, 0, 0]
+        self._hand = [0, 0, 0]
+        self._key = 0
+        self._history = {}
+        pieces = 12 if self.geometry.game_type == "12mm" else 9
+        self._symmetric_hand = 2 * pieces - SYMMETRY_MAX_PIECES
+
+    def search_board(self, board, player_id, pieces_in_hand, opponent_pieces_in_hand):
+        """Search the position on a grid-based board for the given player."""
+        bits = self.geometry.bits_of(board)
+        hand = [0, 0, 0]
+        hand[player_id] = pieces_in_hand
+        hand[3 - player_id] = opponent_pieces_in_hand
+        return self.search(bits, hand, player_id)
+
+    def search_position(self, position):
+        """Search a ``Position`` (which must not be waiting for a capture) for its side to move."""
+        return self.search(list(position.bits), list(position.hand), position.side)
+
+    def search(self, bits, hand, player_id):
+        """Search from ``bits``/``hand`` (lists indexed by player id) for ``player_id``."""
+        start = time.perf_counter()
+        self._deadline = start + self.time_budget if self.time_budget else None
+        if self._deadline is None and self.stop_event is not None:
+            self._deadline = math.inf  # Still check the stop event periodically
+        self.nodes = 0
+        self._history = {}
+        if self.transposition_table is not None:
+            self.transposition_table.new_search()
+        root_bits = list(bits)
+        root_hand = list(hand)
+        root_key = position_key(bits, hand, player_id)
+
+        moves = self._ordered(self.generate_moves(bits, hand, player_id))
+        if not moves:
+            return SearchResult(None, -MATE_SCORE, 0, 0, time.perf_counter() - start)
+
+        max_depth = self.max_depth
+        if self._tablebase_score(root_bits, root_hand, player_id, 0) is not None:
+            max_depth = 1  # Every reply is covered too, so one ply is exact
+
+        best_move, best_score, completed = moves[0], None, 0
+        for depth in range(1, max_depth + 1):
+            self._bits = list(root_bits)
+            self._hand = list(root_hand)
+            self._key = root_key
+            try:
+                score, move = self._search_root(moves, player_id, depth)
+            except SearchTimeout:
+                break
+            best_move, best_score, completed = move, score, depth
+            if self.transposition_table is not None:
+                self._key = root_key
+                table_key, to_table, _ = self._table_key(root_bits, root_hand, player_id)
+                stored_move = move if to_table is None else _permute_move(move, to_table)
+                self.transposition_table.store(table_key, depth, score, EXACT, stored_move)
+            # Search the previous best move first on the next iteration
+            moves.remove(move)
+            moves.insert(0, move)
+            if abs(score) >= MATE_SCORE - self.max_depth:
+                break
+
+        self._bits = root_bits
+        self._hand = root_hand
+        if best_score is None:
+            best_score = self.evaluate(root_bits, root_hand, player_id)
+        return SearchResult(best_move, best_score, completed, self.nodes, time.perf_counter() - start)
+
+    def _search_root(self, moves, player_id, depth):
+        alpha, beta = -MATE_SCORE - 1, MATE_SCORE + 1
+        best_move = moves[0]
+        key = self._key
+        for move in moves:
+            self._make(move, player_id)
+            score = -self._negamax(3 - player_id, depth - 1, -beta, -alpha, 1)
+            self._unmake(move, player_id)
+            self._key = key
+            if score > alpha:
+                alpha = score
+                best_move = move
+        return alpha, best_move
+
+    def search_root_move(self, bits, hand, player_id, move, depth, alpha=-MATE_SCORE - 1, deadline=None):
+        """Return the score of one root move searched to ``depth`` plies, or raise SearchTimeout.
+
+        Scores at or below ``alpha`` only bound the move's value from above.
+        ``deadline`` is a ``time.perf_counter()`` value. Used to split the root
+        moves of one search between processes.
+        """
+        self._deadline = deadline
+        self._bits = list(bits)
+        self._hand = list(hand)
+        self._key = position_key(bits, hand, player_id)
+        self._make(move, player_id)
+        return -self._negamax(3 - player_id, depth - 1, -MATE_SCORE - 1, -alpha, 1)
+
+    def _negamax(self, player_id, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self._deadline is not None and self.nodes % CLOCK_CHECK_INTERVAL == 0:
+            if time.perf_counter() > self._deadline or (self.stop_event is not None and self.stop_event.is_set()):
+                raise SearchTimeout()
+
+        bits, hand = self._bits, self._hand
+        if not hand[player_id] and popcount(bits[player_id]) < 3:
+            return -MATE_SCORE + ply
+        if self.tablebase is not None:
+            score = self._tablebase_score(bits, hand, player_id, ply)
+            if score is not None:
+                return score
+
+        table = self.transposition_table
+        key = self._key
+        tt_move = None
+        if table is not None:
+            table_key, to_table, from_table = self._table_key(bits, hand, player_id)
+            entry = table.probe(table_key)
+            if entry is not None:
+                tt_move = entry[4]
+                if from_table is not None and tt_move is not None:
+                    tt_move = _permute_move(tt_move, from_table)
+                if entry[1] >= depth:
+                    score = entry[2]
+                    if score > MATE_THRESHOLD:
+                        score -= ply
+                    elif score < -MATE_THRESHOLD:
+                        score += ply
+                    bound = entry[3]
+                    if bound == EXACT:
+                        return score
+                    if bound == LOWER_BOUND and score >= beta:
+                        return score
+                    if bound == UPPER_BOUND and score <= alpha:
+                        return score
+
+        moves = self.generate_moves(bits, hand, player_id)
+        if not moves:
+            return -MATE_SCORE + ply
+        if depth <= 0:
+            return self.evaluate(bits, hand, player_id)
+
+        original_alpha = alpha
+        best = -MATE_SCORE - 1
+        best_move = None
+        for move in self._ordered(moves, tt_move):
+            self._make(move, player_id)
+            score = -self._negamax(3 - player_id, depth - 1, -beta, -alpha, ply + 1)
+            self._unmake(move, player_id)
+            self._key = key
+            if score > best:
+                best = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        history_key = (move[0], move[1])
+                        self._history[history_key] = self._history.get(history_key, 0) + depth * depth
+                        break
+
+        if table is not None:
+            if best >= beta:
+                bound = LOWER_BOUND
+            elif best <= original_alpha:
+                bound = UPPER_BOUND
+            else:
+                bound = EXACT
+            stored = best
+            if stored > MATE_THRESHOLD:
+                stored += ply
+            elif stored < -MATE_THRESHOLD:
+                stored -= ply
+            if to_table is not None:
+                best_move = _permute_move(best_move, to_table)
+            table.store(table_key, depth, stored, bound, best_move)
+        return best
+
+    def _table_key(self, bits, hand, player_id):
+        """Return ``(key, to_table, from_table)`` for storing a position in the transposition table.
+
+        Once more than ``SYMMETRY_MAX_PIECES`` pieces have been placed the key
+        is the incrementally kept Zobrist key and moves are stored as they are
+        (both permutations None). Before that, the key is the Zobrist key of
+        the position's canonical image, and the permutations map moves into
+        and out of that image's frame.
+        """
+        if hand[1] + hand[2] < self._symmetric_hand:
+            return self._key, None, None
+        geometry = self.geometry
+        mover, opponent, transform = geometry.canonical(bits[player_id], bits[3 - player_id])
+        canonical_bits = [0, 0, 0]
+        canonical_bits[player_id] = mover
+        canonical_bits[3 - player_id] = opponent
+        key = position_key(canonical_bits, hand, player_id)
+        if transform == 0:
+            return key, None, None
+        return key, geometry.symmetries[transform], geometry.inverse_symmetries[transform]
+
+    def _tablebase_score(self, bits, hand, player_id, ply):
+        """Exact score from the tablebase, or None if the position is not covered."""
+        if self.tablebase is None or hand[1] or hand[2]:
+            return None
+        value = self.tablebase.lookup(self.geometry.game_type, bits[player_id], bits[3 - player_id])
+        if value is None:
+            return None
+        if value == 0:
+            return 0
+        distance = value - 1
+        if distance % 2:
+            return MATE_SCORE - ply - distance
+        return -MATE_SCORE + ply + distance
+
+    def _ordered(self, moves, first=None):
+        """Order moves: the transposition-table move, then captures, then by history heuristic."""
+        history = self._history
+        return sorted(
+            moves,
+            key=lambda move: (move != first, move[2] < 0, -history.get((move[0], move[1]), 0))
+        )
+
+    def _make(self, move, player_id):
+        """Apply a compound move; the caller restores ``_key`` after unmaking."""
+        src, dst, rem = move
+        opponent_id = 3 - player_id
+        pieces = ZOBRIST_PIECES[player_id]
+        key = self._key ^ ZOBRIST_SIDE ^ pieces[dst]
+        if src < 0:
+            hand = self._hand[player_id]
+            key ^= ZOBRIST_HAND[player_id][hand] ^ ZOBRIST_HAND[player_id][hand - 1]
+            self._hand[player_id] = hand - 1
+        else:
+            self._bits[player_id] ^= 1 << src
+            key ^= pieces[src]
+        self._bits[player_id] |= 1 << dst
+        if rem >= 0:
+            self._bits[opponent_id] ^= 1 << rem
+            key ^= ZOBRIST_PIECES[opponent_id][rem]
+        self._key = key
+
+    def _unmake(self, move, player_id):
+        src, dst, rem = move
+        if rem >= 0:
+            self._bits[3 - player_id] |= 1 << rem
+        self._bits[player_id] ^= 1 << dst
+        if src < 0:
+            self._hand[player_id] += 1
+        else:
+            self._bits[player_id] |= 1 << src
+
+    def generate_moves(self, bits, hand, player_id):
+        """Return every legal compound move for ``player_id``."""
+        return generate_moves(self.geometry, bits, hand, player_id)
+
+    def evaluate(self, bits, hand, player_id):
+        """Static evaluation from the point of view of ``player_id``."""
+        return self.evaluator.evaluate(bits, hand, player_id)
+
+    def move_to_positions(self, move):
+        """Convert a compound move to ``(from_pos, to_pos, remove_pos)`` coordinates."""
+        points = self.geometry.points
+        src, dst, rem = move
+        return (
+            points[src] if src >= 0 else None,
+            points[dst],
+            points[rem] if rem >= 0 else None,
+        )
@@ -0,0 +1,281 @@
+"""Headless self-play between two computer agents.
+
+Plays many games without the Flask app, spreading them over a process pool,
+and reports win/draw/loss rates with 95% confidence intervals, per-move
+decision times and throughput::
+
+    python -m game_logic.selfplay --games 200 --workers 8 --agent1 search:3 --agent2 greedy
+
+Agents are given as ``greedy`` (the one-ply heuristics) or
+``search:<depth>[:<seconds per move>]``. The two agents swap colours every
+game so neither always moves first.
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .board import Board
+from .computerplayer import ComputerPlayer
+from .gamemanager import GameManager
+from .notation import format_move
+from .position import Position
+
+# Games longer than this many actions are scored as draws
+MAX_PLIES = 500
+# A position (board, side to move, pieces in hand) seen this often is a draw
+REPETITION_LIMIT = 3
+# Two-sided 95% normal quantile for the confidence intervals
+Z_95 = 1.959964
+
+
+def parse_agent(spec):
+    """Turn ``greedy`` or ``search:<depth>[:<seconds>]`` into an agent dict."""
+    parts = spec.split(":")
+    if parts[0] == "greedy" and len(parts) == 1:
+        return {"name": spec, "search_depth": 0, "time_budget": None}
+    if parts[0] == "search" and len(parts) in (2, 3):
+        time_budget = float(parts[2]) if len(parts) == 3 else None
+        return {"name": spec, "search_depth": int(parts[1]), "time_budget": time_budget}
+    raise ValueError(f"Unknown agent {spec!r}; use 'greedy' or 'search:<depth>[:<seconds>]'")
+
+
+def create_agent_player(player_id, pieces, agent):
+    """Create the ComputerPlayer that plays ``agent`` as ``player_id``."""
+    return ComputerPlayer(
+        player_id, pieces, search_depth=agent.get("search_depth", 0), time_budget=agent.get("time_budget"),
+        tablebase_path=agent.get("tablebase_path"), opening_book_path=agent.get("opening_book_path"),
+        weights_path=agent.get("weights_path")
+    )
+
+
+def play_game(game_type, agent1, agent2, seed=None, max_plies=MAX_PLIES, record=False):
+    """Play one game, ``agent1`` as Player 1 (who starts) and ``agent2`` as Player 2.
+
+    Returns a dict with the winner's player id (None for a draw), how the game
+    ended, the number of actions played and each player's decision times.
+    With ``record`` it also has the game's ``moves`` in record notation.
+    """
+    random.seed(seed)
+    pieces = 12 if game_type == "12mm" else 9
+    game_manager = GameManager(
+        Board(game_type), create_agent_player(1, pieces, agent1), create_agent_player(2, pieces, agent2),
+        game_type, starting_player_id=1, opponent_type="computer"
+    )
+    game_manager.computer_turns_enabled = False  # This loop drives both sides
+    moves = []
+    if record:
+        game_manager.action_listeners.append(lambda _, action: moves.append(format_move(action)))
+    board = game_manager.board
+    move_times = {1: [], 2: []}
+    seen = {}
+    plies = 0
+    winner = None
+
+    while True:
+        status = game_manager.check_game_over()
+        if status["game_over"]:
+            winner = 1 if status["winner"] == "Player 1" else 2
+            reason = status["message"]
+            break
+        if plies >= max_plies:
+            reason = f"No result after {max_plies} actions"
+            break
+
+        player = game_manager.current_player
+        opponent = game_manager.get_opponent()
+        started = time.perf_counter()
+        if game_manager.waiting_for_removal:
+            position = player.decide_removal(board, opponent)
+            move_times[player.player_id].append(time.perf_counter() - started)
+            result = game_manager.remove_piece(*position) if position else None
+        elif game_manager.phase == "placing":
+            position = player.decide_placement(board, opponent)
+            move_times[player.player_id].append(time.perf_counter() - started)
+            result = game_manager.place_piece(*position) if position else None
+        else:
+            from_pos, to_pos = player.decide_move(board, opponent)
+            move_times[player.player_id].append(time.perf_counter() - started)
+            result = game_manager.move_piece(*from_pos, *to_pos) if from_pos and to_pos else None
+        plies += 1
+
+        if result is None or not result["success"]:
+            winner = opponent.player_id
+            reason = f"Player {player.player_id} could not make a legal move"
+            break
+
+        if not game_manager.waiting_for_removal:
+            key = Position.from_game(game_manager)
+            seen[key] = seen.get(key, 0) + 1
+            if seen[key] >= REPETITION_LIMIT:
+                reason = "Threefold repetition"
+                break
+
+    result = {"winner": winner, "reason": reason, "plies": plies, "move_times": move_times}
+    if record:
+        result["moves"] = moves
+    return result
+
+
+def _play_match_game(task):
+    """Worker entry point: play game ``index`` of a match and label the result by agent."""
+    index, game_type, agents, seed, max_plies = task
+    # Agent A plays Player 1 in even games and Player 2 in odd ones
+    first, second = (0, 1) if index % 2 == 0 else (1, 0)
+    started = time.perf_counter()
+    result = play_game(game_type, agents[first], agents[second], seed=seed, max_plies=max_plies)
+    agent_of = {1: first, 2: second}
+    return {
+        "game": index,
+        "game_type": game_type,
+        "seed": seed,
+        "player1": agents[first]["name"],
+        "player2": agents[second]["name"],
+        "winner": None if result["winner"] is None else agents[agent_of[result["winner"]]]["name"],
+        "winner_agent": None if result["winner"] is None else agent_of[result["winner"]],
+        "reason": result["reason"],
+        "plies": result["plies"],
+        "move_times": [result["move_times"][1 if agent_of[1] == i else 2] for i in (0, 1)],
+        "elapsed": time.perf_counter() - started,
+    }
+
+
+def run_match(game_type, agent_a, agent_b, games, workers=None, seed=0, max_plies=MAX_PLIES, on_result=None):
+    """Play ``games`` games between two agents and return ``(records, summary)``.
+
+    With ``workers`` of 1 the games run in this process; otherwise they are
+    spread over a pool of that many processes (None means one per CPU).
+    ``on_result`` is called with each game record as it arrives.
+    """
+    agents = (agent_a, agent_b)
+    tasks = [(index, game_type, agents, seed * 1000003 + index, max_plies) for index in range(games)]
+    started = time.perf_counter()
+    records = []
+    with contextlib.ExitStack() as stack:
+        if workers == 1:
+            results = map(_play_match_game, tasks)
+        else:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+            chunksize = max(1, games // (4 * (workers or os.cpu_count() or 1)))
+            results = executor.map(_play_match_game, tasks, chunksize=chunksize)
+        for record in results:
+            records.append(record)
+            if on_result:
+                on_result(record)
+    return records, summarize(records, agents, time.perf_counter() - started)
+
+
+def wilson_interval(successes, trials, z=Z_95):
+    """Return the Wilson score interval ``(low, high)`` for a binomial proportion."""
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(records, agents, elapsed):
+    """Aggregate game records into rates, intervals, timings and throughput."""
+    games = len(records)
+    draws = sum(1 for record in records if record["winner_agent"] is None)
+    summary = {
+        "games": games,
+        "elapsed": elapsed,
+        "games_per_second": games / elapsed if elapsed > 0 else 0.0,
+        "mean_plies": sum(record["plies"] for record in records) / games if games else 0.0,
+        "draws": draws,
+        "draw_rate": draws / games if games else 0.0,
+        "draw_interval": wilson_interval(draws, games),
+        "agents": [],
+    }
+    for index, agent in enumerate(agents):
+        wins = sum(1 for record in records if record["winner_agent"] == index)
+        times = [t for record in records for t in record["move_times"][index]]
+        summary["agents"].append({
+            "name": agent["name"],
+            "wins": wins,
+            "win_rate": wins / games if games else 0.0,
+            "win_interval": wilson_interval(wins, games),
+            # Draws count as half a win
+            "score": (wins + draws / 2) / games if games else 0.0,
+            "moves": len(times),
+            "mean_move_time": sum(times) / len(times) if times else 0.0,
+            "p95_move_time": _percentile(times, 0.95),
+            "max_move_time": max(times) if times else 0.0,
+        })
+    return summary
+
+
+def format_summary(summary):
+    """Render a summary as a short plain-text report."""
+    lines = [
+        f"{summary['games']} games in {summary['elapsed']:.1f}s "
+        f"({summary['games_per_second']:.2f} games/s, {summary['mean_plies']:.0f} actions per game)",
+    ]
+    for agent in summary["agents"]:
+        low, high = agent["win_interval"]
+        lines.append(
+            f"  {agent['name']:>16}: {agent['wins']} wins, {agent['win_rate']:.1%} [{low:.1%}, {high:.1%}], "
+            f"score {agent['score']:.3f}, move time mean {agent['mean_move_time'] * 1000:.1f}ms "
+            f"p95 {agent['p95_move_time'] * 1000:.1f}ms"
+        )
+    low, high = summary["draw_interval"]
+    lines.append(f"  {'draws':>16}: {summary['draws']}, {summary['draw_rate']:.1%} [{low:.1%}, {high:.1%}]")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play computer agents against each other without the web app.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--game-type", choices=["9mm", "12mm"], default="9mm")
+    parser.add_argument("--agent1", default="search:2", help="'greedy' or 'search:<depth>[:<seconds>]'")
+    parser.add_argument("--agent2", default="greedy")
+    parser.add_argument("--weights1", help="evaluation weights file for agent 1's search")
+    parser.add_argument("--weights2", help="evaluation weights file for agent 2's search")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-plies", type=int, default=MAX_PLIES)
+    parser.add_argument("--output", help="write one JSON record per game to this file")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    output = open(args.output, "w") if args.output else None
+    try:
+        def write_record(record):
+            if output:
+                output.write(json.dumps(record) + "\n")
+
+        agent1, agent2 = parse_agent(args.agent1), parse_agent(args.agent2)
+        if args.weights1:
+            agent1["weights_path"] = args.weights1
+            agent1["name"] += f" ({args.weights1})"
+        if args.weights2:
+            agent2["weights_path"] = args.weights2
+            agent2["name"] += f" ({args.weights2})"
+        _, summary = run_match(
+            args.game_type, agent1, agent2, args.games,
+            workers=args.workers, seed=args.seed, max_plies=args.max_plies, on_result=write_record
+        )
+    finally:
+        if output:
+            output.close()
+    print(json.dumps(summary, indent=2) if args.json else format_summary(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
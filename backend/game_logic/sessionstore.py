@@ -0,0 +1,101 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class GameSession:
+    """A game held by the store, with the lock that serializes requests against it."""
+
+    def __init__(self, game_id, game_manager, now):
+        self.game_id = game_id
+        self.game_manager = game_manager
+        self.lock = threading.Lock()
+        self.last_access = now
+
+
+class GameSessionStore:
+    """Registry of running games keyed by game id.
+
+    Games are kept in least-recently-used order. A game that has not been
+    touched for ``idle_ttl`` seconds is dropped, and when more than
+    ``max_games`` games are live the least recently used one is dropped to
+    make room, which bounds the memory one process spends on games.
+
+    ``on_evict``, if given, is called with the id of every game dropped this
+    way (but not for ``remove``), after the store's lock is released.
+    """
+
+    def __init__(self, max_games=10000, idle_ttl=3600, clock=time.monotonic, on_evict=None):
+        self.max_games = max_games
+        self.idle_ttl = idle_ttl
+        self.clock = clock
+        self.on_evict = on_evict
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, game_id):
+        return game_id in self._sessions
+
+    def create(self, game_manager):
+        """Register a new game and return its session."""
+        return self.add(uuid.uuid4().hex, game_manager)
+
+    def add(self, game_id, game_manager):
+        """Register a game under an existing id (e.g. one reloaded from storage).
+
+        If the id is already registered the existing session wins and is returned.
+        """
+        with self._lock:
+            now = self.clock()
+            evicted = self._evict(now)
+            session = self._sessions.get(game_id)
+            if session is None:
+                while len(self._sessions) >= self.max_games:
+                    evicted.append(self._sessions.popitem(last=False)[0])
+                session = GameSession(game_id, game_manager, now)
+                self._sessions[game_id] = session
+        self._notify(evicted)
+        return session
+
+    def get(self, game_id):
+        """Return the session for ``game_id`` and mark it as used, or None if it is unknown or expired."""
+        with self._lock:
+            now = self.clock()
+            evicted = self._evict(now)
+            session = self._sessions.get(game_id)
+            if session is not None:
+                session.last_access = now
+                self._sessions.move_to_end(game_id)
+        self._notify(evicted)
+        return session
+
+    def remove(self, game_id):
+        """Forget a game; returns True if it was present."""
+        with self._lock:
+            return self._sessions.pop(game_id, None) is not None
+
+    def evict_expired(self):
+        """Drop every game idle for longer than ``idle_ttl``."""
+        with self._lock:
+            evicted = self._evict(self.clock())
+        self._notify(evicted)
+
+    def _evict(self, now):
+        # Sessions are in LRU order, so the idle ones are all at the front
+        sessions = self._sessions
+        evicted = []
+        while sessions:
+            session = next(iter(sessions.values()))
+            if now - session.last_access <= self.idle_ttl:
+                break
+            evicted.append(sessions.popitem(last=False)[0])
+        return evicted
+
+    def _notify(self, evicted):
+        if self.on_evict is not None:
+            for game_id in evicted:
+                self.on_evict(game_id)
@@ -0,0 +1,329 @@
+"""Endgame tablebases for the moving and flying phases.
+
+A tablebase class ``(a, b)`` covers every position where the side to move
+has ``a`` pieces on the board, the opponent has ``b``, and neither has
+pieces left to place. Each position is stored as one byte: 0 for a draw,
+otherwise ``distance + 1`` where ``distance`` is the number of plies to the
+end of the game with best play. Odd distances are wins for the side to
+move, even distances are losses.
+
+Build tables offline with::
+
+    python -m game_logic.tablebase --game-type 9mm --max-pieces 3 --output endgames.tb
+
+The build is plain Python; the 3-vs-3 class alone has a few million
+positions per game type and takes a while. Probing is a single byte read
+from a memory-mapped file.
+"""
+import argparse
+import mmap
+import struct
+import sys
+import time
+from array import array
+from itertools import combinations
+from math import comb
+
+from .bitboard import get_geometry, iter_bits
+
+MAGIC = b"MMTB\x00\x02\x00\x00"
+HEADER = struct.Struct("<8sI")
+SECTION = struct.Struct("<BBBxQQ")
+GAME_TYPE_CODES = {"9mm": 9, "12mm": 12}
+GAME_TYPE_NAMES = {code: name for name, code in GAME_TYPE_CODES.items()}
+
+# Smallest piece count a side can have and still be in the game
+MIN_PIECES = 3
+# Largest distance one byte can hold
+MAX_DISTANCE = 254
+
+# Kinds of work items in the retrograde queue
+_SOLVED = 0  # Value already written; propagate to predecessors
+_PENDING_WIN = 1  # Win through a capture, unless a shorter win is found first
+_PENDING_LOSS = 2  # Loss whose longest line goes through a capture
+
+_COMB = [[comb(p, k) for k in range(25)] for p in range(25)]
+
+
+def rank_mask(mask):
+    """Return the colexicographic rank of a set of points among sets of the same size."""
+    rank = 0
+    count = 0
+    for point in iter_bits(mask):
+        count += 1
+        rank += _COMB[point][count]
+    return rank
+
+
+def class_size(points, a, b):
+    """Number of slots in class ``(a, b)`` on a board with ``points`` points."""
+    return _COMB[points][a] * _COMB[points][b]
+
+
+def position_index(points, mover, opponent, b):
+    """Slot of a position in its class; the opponent has ``b`` pieces."""
+    return rank_mask(mover) * _COMB[points][b] + rank_mask(opponent)
+
+
+def decode_value(value):
+    """Turn a stored byte into ``("win" | "loss" | "draw", distance)``."""
+    if value == 0:
+        return "draw", None
+    distance = value - 1
+    return ("win" if distance % 2 else "loss"), distance
+
+
+class TablebaseGenerator:
+    """Retrograde solver for endgame classes on one board geometry.
+
+    Classes are solved in pairs ``(a, b)``/``(b, a)`` because quiet moves
+    hand the turn over without changing material; captures lead to smaller
+    classes that must already be solved. ``build`` takes care of the order.
+    """
+
+    def __init__(self, geometry, tables=None, progress=None):
+        self.geometry = geometry
+        self.points = len(geometry.points)
+        self.tables = dict(tables or {})  # (a, b) -> bytearray
+        self.progress = progress
+
+    def build(self, max_pieces):
+        """Solve every class with 3..max_pieces pieces per side."""
+        for total in range(2 * MIN_PIECES, 2 * max_pieces + 1):
+            for a in range(MIN_PIECES, max_pieces + 1):
+                b = total - a
+                if a <= b <= max_pieces and (a, b) not in self.tables:
+                    self.solve_pair(a, b)
+        return self.tables
+
+    def _closes_mill(self, pieces, point):
+        for mill in self.geometry.mills_at[point]:
+            if pieces & mill == mill:
+                return True
+        return False
+
+    def _removable(self, pieces):
+        in_mills = 0
+        for mill in self.geometry.mills:
+            if pieces & mill == mill:
+                in_mills |= mill
+        outside = pieces & ~in_mills
+        return outside if outside else pieces
+
+    def _positions(self, a, b):
+        """Yield every ``(mover, opponent)`` pair of disjoint point sets of sizes a and b."""
+        masks_b = [sum(1 << p for p in combo) for combo in combinations(range(self.points), b)]
+        for combo in combinations(range(self.points), a):
+            mover = sum(1 << p for p in combo)
+            for opponent in masks_b:
+                if not mover & opponent:
+                    yield mover, opponent
+
+    def solve_pair(self, a, b):
+        """Solve classes ``(a, b)`` and ``(b, a)`` together."""
+        started = time.perf_counter()
+        geometry = self.geometry
+        points = self.points
+        classes = [(a, b)] if a == b else [(a, b), (b, a)]
+        values = {cls: bytearray(class_size(points, *cls)) for cls in classes}
+        counts = {cls: array("H", bytes(2 * class_size(points, *cls))) for cls in classes}
+        longest_loss = {cls: bytearray(class_size(points, *cls)) for cls in classes}
+        buckets = {}
+
+        def push(distance, item):
+            if distance > MAX_DISTANCE:
+                raise ValueError(f"Distance {distance} does not fit in a tablebase byte")
+            buckets.setdefault(distance, []).append(item)
+
+        # Seed: count each position's moves and resolve captures into solved classes
+        for cls in classes:
+            ca, cb = cls
+            flying = ca == MIN_PIECES
+            capture_table = self.tables.get((cb - 1, ca))
+            cls_counts = counts[cls]
+            cls_longest = longest_loss[cls]
+            for mover, opponent in self._positions(ca, cb):
+                empty = geometry.full_mask & ~(mover | opponent)
+                quiet = 0
+                best_win = None
+                longest = 0
+                removable = None
+                for src in iter_bits(mover):
+                    targets = empty if flying else geometry.adjacent[src] & empty
+                    base = mover & ~(1 << src)
+                    for dst in iter_bits(targets):
+                        after = base | 1 << dst
+                        if not self._closes_mill(after, dst):
+                            quiet += 1
+                            continue
+                        if cb - 1 < MIN_PIECES:
+                            best_win = 1
+                            continue
+                        if removable is None:
+                            removable = self._removable(opponent)
+                        for rem in iter_bits(removable):
+                            value = capture_table[position_index(points, opponent & ~(1 << rem), after, ca)]
+                            if value == 0:
+                                quiet += 1  # A drawn line never resolves, so it blocks a loss
+                            elif (value - 1) % 2 == 0:
+                                if best_win is None or value < best_win:
+                                    best_win = value
+                            elif value > longest:
+                                longest = value
+
+                index = position_index(points, mover, opponent, cb)
+                if best_win is not None:
+                    cls_counts[index] = quiet + 1  # Never a loss
+                    push(best_win, (cls, mover, opponent, _PENDING_WIN))
+                elif quiet:
+                    cls_counts[index] = quiet
+                    cls_longest[index] = longest
+                else:
+                    # No quiet moves: either stuck (lost now) or every capture loses
+                    push(longest, (cls, mover, opponent, _PENDING_LOSS))
+
+        # Retrograde: settle positions in order of distance and propagate to predecessors
+        distance = 0
+        while buckets:
+            items = buckets.pop(distance, [])
+            for cls, mover, opponent, kind in items:
+                ca, cb = cls
+                index = position_index(points, mover, opponent, cb)
+                cls_values = values[cls]
+                if kind != _SOLVED:
+                    if cls_values[index]:
+                        continue
+                    cls_values[index] = distance + 1
+
+                # Predecessors: the opponent just made a quiet move into this position
+                previous = (cb, ca)
+                prev_values = values[previous]
+                prev_counts = counts[previous]
+                prev_longest = longest_loss[previous]
+                empty = geometry.full_mask & ~(mover | opponent)
+                flew = cb == MIN_PIECES
+                for dst in iter_bits(opponent):
+                    if self._closes_mill(opponent, dst):
+                        continue
+                    sources = empty if flew else geometry.adjacent[dst] & empty
+                    base = opponent & ~(1 << dst)
+                    for src in iter_bits(sources):
+                        before = base | 1 << src
+                        prev_index = position_index(points, before, mover, ca)
+                        if prev_values[prev_index]:
+                            continue
+                        if distance % 2 == 0:
+                            # This position is lost for the side to move, so the move into it wins
+                            prev_values[prev_index] = distance + 2
+                            push(distance + 1, (previous, before, mover, _SOLVED))
+                        else:
+                            prev_counts[prev_index] -= 1
+                            if prev_counts[prev_index] == 0:
+                                # Every move loses; the longest line decides the distance
+                                longest = max(distance + 1, prev_longest[prev_index])
+                                if longest == distance + 1:
+                                    prev_values[prev_index] = distance + 2
+                                    push(distance + 1, (previous, before, mover, _SOLVED))
+                                else:
+                                    push(longest, (previous, before, mover, _PENDING_LOSS))
+            distance += 1
+
+        self.tables.update(values)
+        if self.progress:
+            self.progress(f"Solved {classes} in {time.perf_counter() - started:.1f}s")
+        return values
+
+
+def write_tablebase(path, sections):
+    """Write ``{(game_type, a, b): bytes}`` sections to a tablebase file."""
+    keys = sorted(sections, key=lambda key: (GAME_TYPE_CODES[key[0]], key[1], key[2]))
+    offset = HEADER.size + SECTION.size * len(keys)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(keys)))
+        for key in keys:
+            game_type, a, b = key
+            f.write(SECTION.pack(GAME_TYPE_CODES[game_type], a, b, offset, len(sections[key])))
+            offset += len(sections[key])
+        for key in keys:
+            f.write(sections[key])
+
+
+class Tablebase:
+    """Read-only, memory-mapped tablebase file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a tablebase file")
+        self._sections = {}
+        for i in range(count):
+            code, a, b, offset, length = SECTION.unpack_from(self._map, HEADER.size + i * SECTION.size)
+            self._sections[(GAME_TYPE_NAMES[code], a, b)] = (offset, length)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def classes(self, game_type):
+        """Return the ``(a, b)`` classes stored for a game type."""
+        return sorted((a, b) for (name, a, b) in self._sections if name == game_type)
+
+    def covers(self, game_type, mover_count, opponent_count):
+        """Check if positions with these piece counts are in the file."""
+        return (game_type, mover_count, opponent_count) in self._sections
+
+    def lookup(self, game_type, mover, opponent):
+        """Return the stored byte for a position, or None if its class is not covered.
+
+        ``mover`` and ``opponent`` are the bitboards of the side to move and the other side.
+        """
+        a = bin(mover).count("1")
+        b = bin(opponent).count("1")
+        section = self._sections.get((game_type, a, b))
+        if section is None:
+            return None
+        return self._map[section[0] + position_index(24, mover, opponent, b)]
+
+    def probe(self, game_type, mover, opponent):
+        """Return ``("win" | "loss" | "draw", distance)`` for a position, or None if not covered."""
+        value = self.lookup(game_type, mover, opponent)
+        if value is None:
+            return None
+        return decode_value(value)
+
+
+_OPEN_TABLEBASES = {}
+
+
+def open_tablebase(path):
+    """Return the shared Tablebase for ``path``, opening it on first use."""
+    tablebase = _OPEN_TABLEBASES.get(path)
+    if tablebase is None:
+        tablebase = _OPEN_TABLEBASES[path] = Tablebase(path)
+    return tablebase
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build endgame tablebases for Nine/Twelve Men's Morris.")
+    parser.add_argument("--game-type", choices=["9mm", "12mm", "both"], default="both")
+    parser.add_argument("--max-pieces", type=int, default=3, help="largest piece count per side to solve")
+    parser.add_argument("--output", required=True, help="tablebase file to write")
+    args = parser.parse_args(argv)
+
+    game_types = ["9mm", "12mm"] if args.game_type == "both" else [args.game_type]
+    sections = {}
+    for game_type in game_types:
+        print(f"Building {game_type} classes up to {args.max_pieces} pieces per side...")
+        generator = TablebaseGenerator(get_geometry(game_type), progress=print)
+        for (a, b), table in generator.build(args.max_pieces).items():
+            sections[(game_type, a, b)] = table
+    write_tablebase(args.output, sections)
+    print(f"Wrote {len(sections)} classes to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+# Bound types stored with each entry
+EXACT = 0
+LOWER_BOUND = 1  # The score failed high: the true value is at least this
+UPPER_BOUND = 2  # The score failed low: the true value is at most this
+
+# Rough size of one stored entry (a 6-tuple of small ints plus its slot) in CPython
+ENTRY_BYTES = 160
+
+
+class TranspositionTable:
+    """Fixed-size table of search results keyed by Zobrist hash.
+
+    The table is split into buckets of two slots. The first slot keeps the
+    deepest result seen for its bucket (ties and entries left over from an
+    earlier search are replaced); the second slot always takes the newest
+    result that did not go into the first. The number of buckets is the
+    largest power of two that fits in ``max_memory_mb``, so memory stays
+    bounded however long the table is kept alive.
+
+    Entries are ``(key, depth, score, bound, move, age)`` tuples.
+    """
+
+    def __init__(self, max_memory_mb=16):
+        buckets = max(1, int(max_memory_mb * 1024 * 1024) // (2 * ENTRY_BYTES))
+        self.buckets = 1 << (buckets.bit_length() - 1)
+        self._mask = self.buckets - 1
+        self._slots = [None] * (2 * self.buckets)
+        self.age = 0
+        self.hits = 0
+        self.stores = 0
+
+    def __len__(self):
+        return sum(1 for entry in self._slots if entry is not None)
+
+    def new_search(self):
+        """Mark the start of a new search so older entries become replaceable."""
+        self.age += 1
+
+    def clear(self):
+        """Drop every entry."""
+        self._slots = [None] * (2 * self.buckets)
+        self.hits = 0
+        self.stores = 0
+
+    def probe(self, key):
+        """Return the entry stored for ``key``, or None."""
+        slot = (key & self._mask) << 1
+        slots = self._slots
+        entry = slots[slot]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        entry = slots[slot + 1]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        """Store a search result, choosing the slot by the replacement policy."""
+        slot = (key & self._mask) << 1
+        slots = self._slots
+        entry = (key, depth, score, bound, move, self.age)
+        self.stores += 1
+        preferred = slots[slot]
+        if preferred is None or preferred[0] == key or depth >= preferred[1] or preferred[5] != self.age:
+            slots[slot] = entry
+        else:
+            slots[slot + 1] = entry
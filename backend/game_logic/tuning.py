@@ -0,0 +1,161 @@
+"""Offline fitting of evaluation weights from self-play outcomes.
+
+Plays self-play games over a process pool, labels every position of a game
+with the game's result from the side to move's view (1 for a win, 0.5 for a
+draw, 0 for a loss), and fits each phase's weights so that
+``sigmoid(score / SCALE)`` predicts those results as well as possible
+(logistic regression over the ``evaluation.FEATURES`` of each position).
+The fitted weights are written as an evaluation weights file::
+
+    python -m game_logic.tuning --games 2000 --workers 8 --agent greedy --output weights.json
+    python -m game_logic.selfplay --agent1 search:2 --agent2 search:2 --weights1 weights.json
+
+Features are computed with ``BatchEvaluator``, so the tuner needs NumPy.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from .batcheval import BatchEvaluator, np
+from .evaluation import FEATURES, PHASES, EvaluationWeights
+from .position import Position
+from .replay import new_game, parse_record
+from .selfplay import MAX_PLIES, parse_agent, play_game
+
+# Scores are in centi-pieces: a one-piece lead predicts a win about 73% of the time
+SCALE = 100.0
+# Phases with fewer labelled positions than this keep their starting weights
+MIN_POSITIONS = 200
+ITERATIONS = 500
+LEARNING_RATE = 0.5
+# L2 penalty on the (standardized) weights, so features that never vary stay put
+REGULARIZATION = 1e-4
+
+
+def _play_training_game(task):
+    """Worker entry point: play one game and return its positions as ``(bits, hand, side, result)`` rows."""
+    game_type, agent, seed, max_plies = task
+    result = play_game(game_type, agent, agent, seed=seed, max_plies=max_plies, record=True)
+    game_manager = new_game(game_type)
+    rows = []
+    for action in parse_record(result["moves"]):
+        game_manager.apply_action(action)
+        if game_manager.waiting_for_removal:
+            continue
+        position = Position.from_game(game_manager)
+        if result["winner"] is None:
+            label = 0.5
+        else:
+            label = 1.0 if result["winner"] == position.side else 0.0
+        rows.append((position.bits, position.hand, position.side, label))
+    return rows
+
+
+def collect_positions(game_type, agent, games, workers=None, seed=0, max_plies=MAX_PLIES):
+    """Play ``games`` self-play games and return ``(own, opp, own_hand, opp_hand, results)`` arrays."""
+    tasks = [(game_type, agent, seed * 1000003 + index, max_plies) for index in range(games)]
+    if workers == 1:
+        games_rows = map(_play_training_game, tasks)
+        return _to_arrays([row for rows in games_rows for row in rows])
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, games // (4 * (workers or os.cpu_count() or 1)))
+        games_rows = executor.map(_play_training_game, tasks, chunksize=chunksize)
+        return _to_arrays([row for rows in games_rows for row in rows])
+
+
+def _to_arrays(rows):
+    own = np.array([bits[side] for bits, _, side, _ in rows], dtype=np.int64)
+    opp = np.array([bits[3 - side] for bits, _, side, _ in rows], dtype=np.int64)
+    own_hand = np.array([hand[side] for _, hand, side, _ in rows], dtype=np.int64)
+    opp_hand = np.array([hand[3 - side] for _, hand, side, _ in rows], dtype=np.int64)
+    results = np.array([label for *_, label in rows], dtype=np.float64)
+    return own, opp, own_hand, opp_hand, results
+
+
+def log_loss(features, results, weights):
+    """Mean cross-entropy between ``sigmoid(features @ weights / SCALE)`` and the results."""
+    predictions = 1 / (1 + np.exp(-(features @ weights) / SCALE))
+    predictions = np.clip(predictions, 1e-9, 1 - 1e-9)
+    return float(-np.mean(results * np.log(predictions) + (1 - results) * np.log(1 - predictions)))
+
+
+def fit_phase(features, results, start, iterations=ITERATIONS, learning_rate=LEARNING_RATE):
+    """Fit one phase's weights by gradient descent from ``start``; returns a float array."""
+    # Descend on standardized features so every weight moves at a comparable rate
+    spread = features.std(axis=0)
+    spread[spread == 0] = 1.0
+    scaled = features / spread
+    weights = np.asarray(start, dtype=np.float64) * spread / SCALE
+    for _ in range(iterations):
+        predictions = 1 / (1 + np.exp(-(scaled @ weights)))
+        gradient = scaled.T @ (predictions - results) / len(results) + REGULARIZATION * weights
+        weights -= learning_rate * gradient
+    return weights * SCALE / spread
+
+
+def tune(game_type, own, opp, own_hand, opp_hand, results, start=None, iterations=ITERATIONS):
+    """Fit every phase's weights to labelled positions; returns ``(EvaluationWeights, report)``.
+
+    The report maps each phase to its position count and its loss before and after fitting.
+    """
+    start = start if start is not None else EvaluationWeights()
+    evaluator = BatchEvaluator(game_type)
+    features = evaluator.features(own, opp, own_hand, opp_hand).astype(np.float64)
+    phases = evaluator.phases(own, opp, own_hand, opp_hand)
+    fitted = {}
+    report = {}
+    for index, phase in enumerate(PHASES):
+        rows = phases == index
+        vector = np.array(start.vector(phase), dtype=np.float64)
+        count = int(rows.sum())
+        report[phase] = {"positions": count}
+        if count < MIN_POSITIONS:
+            fitted[phase] = dict(zip(FEATURES, start.vector(phase)))
+            continue
+        weights = fit_phase(features[rows], results[rows], vector, iterations=iterations)
+        fitted[phase] = dict(zip(FEATURES, weights.tolist()))
+        report[phase]["loss_before"] = log_loss(features[rows], results[rows], vector)
+        report[phase]["loss_after"] = log_loss(
+            features[rows], results[rows], np.array(EvaluationWeights(fitted).vector(phase), dtype=np.float64)
+        )
+    return EvaluationWeights(fitted), report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit evaluation weights to self-play outcomes.")
+    parser.add_argument("--games", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--game-type", choices=["9mm", "12mm"], default="9mm")
+    parser.add_argument("--agent", default="greedy", help="'greedy' or 'search:<depth>[:<seconds>]' for both sides")
+    parser.add_argument("--start", help="weights file to start from (default: the built-in weights)")
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-plies", type=int, default=MAX_PLIES)
+    parser.add_argument("--output", required=True, help="weights file to write")
+    args = parser.parse_args(argv)
+
+    if np is None:
+        parser.error("the tuner needs NumPy: pip install numpy")
+    agent = parse_agent(args.agent)
+    start = EvaluationWeights.load(args.start) if args.start else None
+    if start is not None:
+        agent["weights_path"] = args.start
+    data = collect_positions(
+        args.game_type, agent, args.games, workers=args.workers, seed=args.seed, max_plies=args.max_plies
+    )
+    weights, report = tune(args.game_type, *data, start=start, iterations=args.iterations)
+    weights.save(args.output)
+    for phase in PHASES:
+        entry = report[phase]
+        if "loss_after" in entry:
+            print(f"{phase:>8}: {entry['positions']} positions, "
+                  f"loss {entry['loss_before']:.4f} -> {entry['loss_after']:.4f}")
+        else:
+            print(f"{phase:>8}: {entry['positions']} positions, too few to fit; kept the starting weights")
+    print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
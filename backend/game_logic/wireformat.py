@@ -0,0 +1,122 @@
+"""Compact board payloads for the game API.
+
+The full board payload is the 7x7 ``grid`` of ``get_board_state``, of which
+only 24 cells are playable. The compact payload sends the board as a
+24-character ``points`` string instead, one character per point in
+``Board.board_positions`` order (the playable cells of the grid in row-major
+order): ``.`` for an empty point, ``1`` or ``2`` for a player's piece.
+
+Every game has a ``version`` that goes up with each applied action. A client
+that passes the last version it saw as ``since`` gets only the points that
+changed after it, as ``[index, character]`` pairs, as long as the server
+still remembers that version; otherwise it gets the whole ``points`` string.
+"""
+import threading
+from collections import OrderedDict, deque
+
+from .bitboard import get_geometry
+
+EMPTY = "."
+_SYMBOLS = {None: EMPTY, 1: "1", 2: "2"}
+
+
+def encode_points(board):
+    """Return the board's pieces as a ``points`` string."""
+    return _encode_grid(board.grid, board.game_type)
+
+
+def _encode_grid(grid, game_type):
+    return "".join(_SYMBOLS[grid[x][y]] for x, y in get_geometry(game_type).points)
+
+
+def diff_points(old, new):
+    """Return the ``[index, character]`` changes that turn ``old`` into ``new``."""
+    return [[index, cell] for index, (before, cell) in enumerate(zip(old, new)) if before != cell]
+
+
+def apply_changes(points, changes):
+    """Return ``points`` with ``[index, character]`` changes applied."""
+    cells = list(points)
+    for index, cell in changes:
+        cells[index] = cell
+    return "".join(cells)
+
+
+def compact_board(game_manager, points=None, since=None, previous=None):
+    """Return the compact counterpart of ``get_board_state``.
+
+    With ``previous``, the points string of version ``since``, the board is
+    sent as ``changes`` against it; otherwise as the whole ``points`` string.
+    """
+    if points is None:
+        points = encode_points(game_manager.board)
+    state = {
+        "version": game_manager.version,
+        "player1_pieces": game_manager.player1.pieces,
+        "player2_pieces": game_manager.player2.pieces,
+        "current_turn": game_manager.current_player.player_id,
+    }
+    if previous is not None:
+        state["since"] = since
+        state["changes"] = diff_points(previous, points)
+    else:
+        state["points"] = points
+    return state
+
+
+def compact_state(state):
+    """Return a ``replay.game_state`` dict with its board in compact form."""
+    board = {key: value for key, value in state["board"].items() if key != "grid"}
+    board["points"] = _encode_grid(state["board"]["grid"], state["game_type"])
+    return dict(state, board=board)
+
+
+class BoardVersions:
+    """Recently sent ``points`` strings of every game, by version, to diff later boards against.
+
+    Each game keeps its ``history`` most recent versions, and at most
+    ``max_games`` games are kept, dropping the least recently updated one.
+    """
+
+    def __init__(self, history=64, max_games=10000):
+        self.history = history
+        self.max_games = max_games
+        self._games = OrderedDict()  # game_id -> deque of (version, points)
+        self._lock = threading.Lock()
+
+    def record(self, game_id, version, points):
+        """Remember the game's points at ``version``."""
+        with self._lock:
+            versions = self._games.get(game_id)
+            if versions is None:
+                while len(self._games) >= self.max_games:
+                    self._games.popitem(last=False)
+                versions = self._games[game_id] = deque(maxlen=self.history)
+            else:
+                self._games.move_to_end(game_id)
+            if not versions or versions[-1][0] < version:
+                versions.append((version, points))
+            elif versions[-1][0] > version:
+                # The game was replaced by one at an earlier version; start over
+                versions.clear()
+                versions.append((version, points))
+
+    def points_at(self, game_id, version):
+        """Return the game's points at ``version``, or None if it is not remembered."""
+        with self._lock:
+            for known, points in reversed(self._games.get(game_id, ())):
+                if known == version:
+                    return points
+            return None
+
+    def discard(self, game_id):
+        """Forget the game."""
+        with self._lock:
+            self._games.pop(game_id, None)
+
+    def board(self, game_id, game_manager, since=None):
+        """Return the game's compact board, as changes since ``since`` when that version is remembered."""
+        points = encode_points(game_manager.board)
+        self.record(game_id, game_manager.version, points)
+        previous = self.points_at(game_id, since) if since is not None else None
+        return compact_board(game_manager, points, since, previous)
@@ -0,0 +1,392 @@
+"""Load test of the game API with in-process stand-in clients.
+
+Plays many games at once against the threaded Flask app (one thread per
+client, like the threaded development server), against the ASGI app of
+``asgi.py`` (one coroutine per client on a single event loop) and over that
+app's per-game WebSocket channel, and reports throughput, latency and how
+many games each finished per CPU-second::
+
+    python loadtest.py --games 200 --concurrency 50                       # human vs human placements
+    python loadtest.py --games 100 --concurrency 100 --opponent computer  # waits on /api/events too
+    python loadtest.py --mode asgi --json
+
+Every client runs the same scenario: set up a game, then place pieces (and
+remove one whenever a mill closes) until the placing phase ends or
+``--moves`` placements were made. Against the computer, the client waits for
+each reply on the ``/api/events`` long poll, or for it to be pushed on the
+WebSocket. Requests are made in process, so the numbers measure the
+serving path, not the network.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from game_logic.board import Board
+
+MODES = ("flask", "asgi", "websocket")
+DEFAULT_MOVES = 9
+# Longest wait for the computer's reply on one long poll
+REPLY_TIMEOUT = 10
+
+
+class ASGIClient:
+    """Calls an ASGI app in process, the way a server would, with no network in between."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method, path, query=None, json_body=None, headers=()):
+        """Make one request; returns ``(status, headers, body bytes)``."""
+        body = json.dumps(json_body).encode() if json_body is not None else b""
+        request_headers = [(name.lower().encode(), value.encode()) for name, value in headers]
+        if json_body is not None:
+            request_headers.append((b"content-type", b"application/json"))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": urlencode(query or {}).encode(),
+            "headers": request_headers,
+            "server": ("localhost", 80),
+            "client": ("127.0.0.1", 0),
+        }
+        pending = [{"type": "http.request", "body": body, "more_body": False}]
+        response = {"status": None, "headers": [], "body": []}
+
+        async def receive():
+            if pending:
+                return pending.pop(0)
+            await asyncio.Event().wait()  # The client never disconnects
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return response["status"], response["headers"], b"".join(response["body"])
+
+    async def json(self, method, path, query=None, json_body=None):
+        """Make one request and return ``(status, decoded JSON body)``."""
+        status, _, body = await self.request(method, path, query, json_body)
+        return status, json.loads(body) if body else None
+
+
+class ASGIWebSocket:
+    """An in-process WebSocket connection to an ASGI app."""
+
+    def __init__(self, app, path, query=None):
+        self.app = app
+        self.path = path
+        self.query = query or {}
+        self._to_app = asyncio.Queue()
+        self._from_app = asyncio.Queue()
+        self._task = None
+
+    async def connect(self):
+        """Open the connection; raises ConnectionRefusedError if the app closes it instead."""
+        scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "scheme": "ws",
+            "path": self.path,
+            "raw_path": self.path.encode(),
+            "root_path": "",
+            "query_string": urlencode(self.query).encode(),
+            "headers": [],
+            "server": ("localhost", 80),
+            "client": ("127.0.0.1", 0),
+            "subprotocols": [],
+        }
+        self._task = asyncio.ensure_future(self.app(scope, self._to_app.get, self._from_app.put))
+        await self._to_app.put({"type": "websocket.connect"})
+        message = await self._from_app.get()
+        if message["type"] != "websocket.accept":
+            await self._task
+            raise ConnectionRefusedError(f"closed with code {message.get('code')}")
+        return self
+
+    async def send_json(self, data):
+        await self._to_app.put({"type": "websocket.receive", "text": json.dumps(data)})
+
+    async def receive_json(self, timeout=None):
+        """Return the next message from the app, waiting up to ``timeout`` seconds."""
+        message = await asyncio.wait_for(self._from_app.get(), timeout)
+        if message["type"] == "websocket.close":
+            raise ConnectionError(f"closed with code {message.get('code')}")
+        return json.loads(message["text"])
+
+    async def close(self):
+        await self._to_app.put({"type": "websocket.disconnect", "code": 1000})
+        await self._task
+
+
+def play(opponent, moves, rng):
+    """One client's scenario, as a generator.
+
+    It yields ``(method, path, query, json body)`` requests and is sent each
+    response's ``(status, JSON)`` in return.
+    """
+    _, data = yield "POST", "/api/setup", None, {
+        "firstPlayer": "player1", "opponentType": opponent, "gameType": "9mm"
+    }
+    game_id = data["game_id"]
+    grid = data["board"]["grid"]
+    for _ in range(moves):
+        if data.get("phase") != "placing" or data.get("game_over"):
+            break
+        player = data["current_player"]
+        empty = [(x, y) for x, y in Board.board_positions if grid[x][y] is None]
+        x, y = rng.choice(empty)
+        _, data = yield "POST", "/api/place", None, {"game_id": game_id, "x": x, "y": y}
+        grid = data["board"]["grid"]
+        if data.get("waiting_for_removal"):
+            targets = [(x, y) for x, y in Board.board_positions if grid[x][y] == 3 - player]
+            rng.shuffle(targets)
+            for x, y in targets:
+                _, data = yield "POST", "/api/remove", None, {"game_id": game_id, "x": x, "y": y}
+                if data.get("success"):
+                    break
+            grid = data["board"]["grid"] if "board" in data else grid
+        if data.get("computer_thinking"):
+            after = data["event_id"]
+            while True:
+                _, events = yield "GET", "/api/events", {
+                    "game_id": game_id, "after": after, "timeout": REPLY_TIMEOUT
+                }, None
+                after = events["last_event_id"]
+                states = [event["data"] for event in events["events"] if event["type"] == "state"]
+                if states and (states[-1]["current_player"] == 1 or states[-1]["game_over"]):
+                    data = states[-1]
+                    grid = data["board"]["grid"]
+                    break
+        elif data.get("current_player") is None:
+            break
+
+
+class _Recorder:
+    """Collects request latencies and failures from every client."""
+
+    def __init__(self):
+        self.latencies = []
+        self.failures = 0
+        self.games = 0
+        self.active = 0
+        self.peak_active = 0
+        self._lock = threading.Lock()
+
+    def request(self, seconds, status):
+        with self._lock:
+            self.latencies.append(seconds)
+            if status >= 500:
+                self.failures += 1
+
+    def game_started(self):
+        with self._lock:
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+
+    def game_finished(self):
+        with self._lock:
+            self.active -= 1
+            self.games += 1
+
+
+def run_flask(games, concurrency, opponent, moves, seed=0):
+    """Play ``games`` games against the Flask app from ``concurrency`` client threads."""
+    from app import app
+    recorder = _Recorder()
+    local = threading.local()
+
+    def client_game(index):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        recorder.game_started()
+        scenario = play(opponent, moves, random.Random(seed * 1000003 + index))
+        response = None
+        try:
+            while True:
+                method, path, query, body = scenario.send(response)
+                started = time.perf_counter()
+                result = client.open(path, method=method, query_string=query, json=body)
+                recorder.request(time.perf_counter() - started, result.status_code)
+                response = (result.status_code, result.get_json())
+        except StopIteration:
+            pass
+        finally:
+            recorder.game_finished()
+
+    started, cpu = time.perf_counter(), time.process_time()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(client_game, range(games)))
+    return _summary("flask", recorder, time.perf_counter() - started, time.process_time() - cpu, concurrency)
+
+
+def run_asgi(games, concurrency, opponent, moves, seed=0):
+    """Play ``games`` games against the ASGI app from ``concurrency`` client coroutines."""
+    from asgi import app
+    recorder = _Recorder()
+    client = ASGIClient(app)
+
+    async def client_game(index, slots):
+        async with slots:
+            recorder.game_started()
+            scenario = play(opponent, moves, random.Random(seed * 1000003 + index))
+            response = None
+            try:
+                while True:
+                    method, path, query, body = scenario.send(response)
+                    started = time.perf_counter()
+                    response = await client.json(method, path, query, body)
+                    recorder.request(time.perf_counter() - started, response[0])
+            except StopIteration:
+                pass
+            finally:
+                recorder.game_finished()
+
+    async def main():
+        slots = asyncio.Semaphore(concurrency)
+        await asyncio.gather(*(client_game(index, slots) for index in range(games)))
+
+    started, cpu = time.perf_counter(), time.process_time()
+    asyncio.run(main())
+    return _summary("asgi", recorder, time.perf_counter() - started, time.process_time() - cpu, 1)
+
+
+def run_websocket(games, concurrency, opponent, moves, seed=0):
+    """Play ``games`` games over the ASGI app's WebSocket channel from ``concurrency`` client coroutines.
+
+    Games are set up over HTTP; every later request of the scenario becomes a
+    message on the game's socket, and its event polls wait for pushed events.
+    """
+    from asgi import app
+    recorder = _Recorder()
+    client = ASGIClient(app)
+
+    async def exchange(socket, events, method, path, query, body, message_id):
+        if method == "GET":  # /api/events: wait for the next pushed event
+            while not events:
+                message = await socket.receive_json(REPLY_TIMEOUT)
+                if message["type"] == "event":
+                    events.append(message)
+            pushed = [{"id": event["id"], "type": event["event"], "data": event["data"]} for event in events]
+            events.clear()
+            return 200, {"success": True, "events": pushed, "last_event_id": pushed[-1]["id"]}
+        await socket.send_json(dict(body, type=path.rsplit("/", 1)[1], id=message_id))
+        while True:
+            message = await socket.receive_json(REPLY_TIMEOUT)
+            if message["type"] == "event":
+                events.append(message)
+            elif message.get("id") == message_id:
+                return message.get("status", 200), message.get("data")
+
+    async def client_game(index, slots):
+        async with slots:
+            recorder.game_started()
+            scenario = play(opponent, moves, random.Random(seed * 1000003 + index))
+            socket = None
+            try:
+                method, path, query, body = scenario.send(None)
+                started = time.perf_counter()
+                response = await client.json(method, path, query, body)
+                recorder.request(time.perf_counter() - started, response[0])
+                socket = await ASGIWebSocket(app, "/api/ws", {"game_id": response[1]["game_id"]}).connect()
+                await socket.receive_json(REPLY_TIMEOUT)  # The current state, which setup already returned
+                events = []
+                for message_id in itertools.count(1):
+                    method, path, query, body = scenario.send(response)
+                    started = time.perf_counter()
+                    response = await exchange(socket, events, method, path, query, body, message_id)
+                    recorder.request(time.perf_counter() - started, response[0])
+            except StopIteration:
+                pass
+            finally:
+                if socket is not None:
+                    await socket.close()
+                recorder.game_finished()
+
+    async def main():
+        slots = asyncio.Semaphore(concurrency)
+        await asyncio.gather(*(client_game(index, slots) for index in range(games)))
+
+    started, cpu = time.perf_counter(), time.process_time()
+    asyncio.run(main())
+    return _summary("websocket", recorder, time.perf_counter() - started, time.process_time() - cpu, 1)
+
+
+def _summary(mode, recorder, elapsed, cpu_seconds, client_threads):
+    latencies = sorted(recorder.latencies)
+    requests = len(latencies)
+    return {
+        "mode": mode,
+        "games": recorder.games,
+        "requests": requests,
+        "failures": recorder.failures,
+        "elapsed": elapsed,
+        "cpu_seconds": cpu_seconds,
+        "requests_per_second": requests / elapsed if elapsed else 0.0,
+        "games_per_second": recorder.games / elapsed if elapsed else 0.0,
+        "games_per_cpu_second": recorder.games / cpu_seconds if cpu_seconds else 0.0,
+        "peak_concurrent_games": recorder.peak_active,
+        "client_threads": client_threads,
+        "latency_p50": statistics.median(latencies) if latencies else 0.0,
+        "latency_p95": latencies[min(requests - 1, int(0.95 * requests))] if latencies else 0.0,
+        "latency_max": latencies[-1] if latencies else 0.0,
+    }
+
+
+def format_summary(summary):
+    return (
+        f"{summary['mode']:>9}: {summary['games']} games, {summary['requests']} requests "
+        f"({summary['failures']} failed) in {summary['elapsed']:.2f}s; "
+        f"{summary['requests_per_second']:.0f} req/s, {summary['games_per_cpu_second']:.1f} games per CPU-second, "
+        f"{summary['peak_concurrent_games']} games at once on {summary['client_threads']} client thread(s); "
+        f"latency p50 {summary['latency_p50'] * 1000:.1f}ms p95 {summary['latency_p95'] * 1000:.1f}ms "
+        f"max {summary['latency_max'] * 1000:.1f}ms"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the game API with in-process clients.")
+    parser.add_argument("--mode", choices=MODES + ("all",), default="all")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=25, help="games played at the same time")
+    parser.add_argument("--opponent", choices=["human", "computer"], default="human")
+    parser.add_argument("--moves", type=int, default=DEFAULT_MOVES, help="placements per game")
+    parser.add_argument("--search-depth", type=int, default=1, help="computer search depth")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the summaries as JSON")
+    args = parser.parse_args(argv)
+
+    from app import app
+    app.config["COMPUTER_SEARCH_DEPTH"] = args.search_depth
+    runners = {"flask": run_flask, "asgi": run_asgi, "websocket": run_websocket}
+    summaries = []
+    for mode in MODES if args.mode == "all" else (args.mode,):
+        summaries.append(runners[mode](args.games, args.concurrency, args.opponent, args.moves, seed=args.seed))
+        if not args.json:
+            print(format_summary(summaries[-1]))
+    if args.json:
+        print(json.dumps(summaries, indent=2))
+    return 1 if any(summary["failures"] for summary in summaries) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
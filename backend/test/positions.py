@@ -0,0 +1,19 @@
+import random
+
+from game_logic.position import Position
+from game_logic.replay import new_game
+
+
+def random_positions(game_type, count, seed):
+    """Return positions met along seeded random games."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        position = Position.from_game(new_game(game_type))
+        for _ in range(150):
+            positions.append(position)
+            moves = position.legal_moves()
+            if not moves:
+                break
+            position = position.make(rng.choice(moves))
+    return positions[:count]
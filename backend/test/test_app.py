@@ -0,0 +1,302 @@
+import json
+import threading
+
+import pytest
+from app import app
+from game_logic.board import Board
+from game_logic.computerturns import ComputerTurn
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    return app.test_client()
+
+def setup_game(client, opponent_type="human", game_type="9mm"):
+    response = client.post('/api/setup', json={
+        'firstPlayer': 'player1', 'opponentType': opponent_type, 'gameType': game_type
+    })
+    data = response.get_json()
+    assert data['success'] is True
+    return data['game_id']
+
+def wait_for_turn(client, game_id, after, player=1):
+    """Long-poll /api/events until it is ``player``'s turn again; returns that state."""
+    for _ in range(20):
+        data = client.get('/api/events', query_string={'game_id': game_id, 'after': after, 'timeout': 5}).get_json()
+        for event in data['events']:
+            if event['data']['current_player'] == player:
+                return event['data']
+        after = data['last_event_id']
+    raise AssertionError("the computer never replied")
+
+def test_setup_returns_game_id(client):
+    game_id = setup_game(client)
+    response = client.get('/api/board', query_string={'game_id': game_id})
+    assert response.status_code == 200
+    assert response.get_json()['current_player'] == 1
+
+def test_games_are_independent(client):
+    first = setup_game(client)
+    second = setup_game(client)
+    client.post('/api/place', json={'game_id': first, 'x': 0, 'y': 0})
+    first_board = client.get('/api/board', query_string={'game_id': first}).get_json()
+    second_board = client.get('/api/board', query_string={'game_id': second}).get_json()
+    assert first_board['board']['grid'][0][0] == 1
+    assert second_board['board']['grid'][0][0] is None
+
+def test_unknown_game_is_rejected(client):
+    response = client.post('/api/place', json={'game_id': 'nope', 'x': 0, 'y': 0})
+    assert response.status_code == 404
+    assert client.get('/api/board').status_code == 404
+
+def test_reset_keeps_game_id(client):
+    game_id = setup_game(client)
+    client.post('/api/place', json={'game_id': game_id, 'x': 0, 'y': 0})
+    data = client.post('/api/reset', json={'game_id': game_id}).get_json()
+    assert data['game_id'] == game_id
+    assert data['board']['grid'][0][0] is None
+
+def test_computer_replies_to_placement(client):
+    game_id = setup_game(client, opponent_type="computer")
+    data = client.post('/api/place', json={'game_id': game_id, 'x': 0, 'y': 0}).get_json()
+    assert data['success'] is True
+    assert data['computer_thinking'] is True
+    assert data['current_player'] == 2  # Returned before the computer moved
+    state = wait_for_turn(client, game_id, data['event_id'])
+    assert sum(cell == 2 for row in state['board']['grid'] for cell in row) == 1
+    board = client.get('/api/board', query_string={'game_id': game_id}).get_json()
+    assert board['board'] == state['board'] and board['computer_thinking'] is False
+
+def test_computer_turns_can_be_played_inside_the_request(client):
+    app.config["ASYNC_COMPUTER_TURNS"] = False
+    try:
+        game_id = setup_game(client, opponent_type="computer")
+        data = client.post('/api/place', json={'game_id': game_id, 'x': 0, 'y': 0}).get_json()
+    finally:
+        app.config["ASYNC_COMPUTER_TURNS"] = True
+    assert data['computer_thinking'] is False
+    assert data['current_player'] == 1
+    assert sum(cell == 2 for row in data['board']['grid'] for cell in row) == 1
+
+def test_computer_opens_when_it_moves_first(client):
+    response = client.post('/api/setup', json={
+        'firstPlayer': 'player2', 'opponentType': 'computer', 'gameType': '9mm'
+    })
+    data = response.get_json()
+    assert data['computer_thinking'] is True
+    state = wait_for_turn(client, data['game_id'], data['event_id'])
+    assert state['board']['player2_pieces'] == 8
+
+def test_stale_computer_turn_is_planned_again(client, monkeypatch):
+    stale = []
+    is_stale = ComputerTurn.is_stale
+    def first_turn_is_stale(turn, game_manager):
+        if not stale:  # As if another worker had changed the game while it was planned
+            stale.append(turn)
+            return True
+        return is_stale(turn, game_manager)
+    monkeypatch.setattr(ComputerTurn, 'is_stale', first_turn_is_stale)
+    game_id = setup_game(client, opponent_type="computer")
+    data = client.post('/api/place', json={'game_id': game_id, 'x': 0, 'y': 0}).get_json()
+    state = wait_for_turn(client, game_id, data['event_id'])
+    assert stale and state['board']['player2_pieces'] == 8
+
+def test_reset_cancels_a_pending_computer_turn(client):
+    from app import computer_turns
+    game_id = setup_game(client, opponent_type="computer")
+    release = threading.Event()
+    original = ComputerTurn.plan
+    def slow_plan(turn):
+        release.wait(5)
+        return original(turn)
+    ComputerTurn.plan = slow_plan
+    try:
+        data = client.post('/api/place', json={'game_id': game_id, 'x': 0, 'y': 0}).get_json()
+        assert computer_turns.pending(game_id)
+        reset = client.post('/api/reset', json={'game_id': game_id}).get_json()
+        assert not computer_turns.pending(game_id)
+    finally:
+        ComputerTurn.plan = original
+        release.set()
+    events = client.get('/api/events', query_string={'game_id': game_id, 'after': data['event_id'], 'timeout': 1}).get_json()
+    assert [event['id'] for event in events['events']] == [reset['event_id']]
+    board = client.get('/api/board', query_string={'game_id': game_id}).get_json()
+    assert all(cell is None for row in board['board']['grid'] for cell in row)
+
+def test_events_stream(client):
+    app.config["EVENT_STREAM_SECONDS"] = 0.5
+    try:
+        game_id = setup_game(client)
+        placed = client.post('/api/place', json={'game_id': game_id, 'x': 0, 'y': 0}).get_json()
+        response = client.get('/api/events', query_string={'game_id': game_id, 'after': placed['event_id'] - 1},
+                              headers={'Accept': 'text/event-stream'})
+        body = response.get_data(as_text=True)
+    finally:
+        app.config["EVENT_STREAM_SECONDS"] = 300
+    assert response.mimetype == "text/event-stream"
+    assert f"id: {placed['event_id']}\nevent: state\n" in body
+    data = json.loads(body.split("data: ", 1)[1].split("\n", 1)[0])
+    assert data['board']['grid'][0][0] == 1 and data['current_player'] == 2
+
+def test_game_survives_losing_the_in_memory_copy(client):
+    from app import game_store
+    game_id = setup_game(client)
+    client.post('/api/place', json={'game_id': game_id, 'x': 0, 'y': 0})
+    game_store.remove(game_id)  # As if this worker had never seen it
+    data = client.get('/api/board', query_string={'game_id': game_id}).get_json()
+    assert data['board']['grid'][0][0] == 1
+    assert data['current_player'] == 2
+
+def test_evicted_game_is_gone_from_memory_storage(client, monkeypatch):
+    from app import game_repository, game_store
+    evicted = setup_game(client)
+    monkeypatch.setattr(game_store, 'max_games', 1)
+    setup_game(client)  # Pushes the first game out of the store
+    response = client.get('/api/board', query_string={'game_id': evicted})
+    assert response.status_code == 404
+    assert game_repository.backend.load_snapshot(evicted) is None
+
+def test_legal_moves_lists_placements_then_removals(client):
+    game_id = setup_game(client)
+    data = client.get('/api/legal-moves', query_string={'game_id': game_id}).get_json()
+    assert data['success'] is True
+    assert len(data['moves']) == 24
+    assert data['moves'][0] == {'action': 'place', 'x': 0, 'y': 0}
+
+    for x, y in [(0, 0), (1, 1), (0, 3), (1, 3), (0, 6)]:  # Player 1 closes the top row
+        client.post('/api/place', json={'game_id': game_id, 'x': x, 'y': y})
+    data = client.get('/api/legal-moves', query_string={'game_id': game_id}).get_json()
+    assert data['waiting_for_removal'] is True
+    assert sorted((move['x'], move['y']) for move in data['moves']) == [(1, 1), (1, 3)]
+
+def test_metrics_endpoint(client):
+    from game_logic import metrics
+    assert client.get('/api/metrics').status_code == 404  # Off by default
+    metrics.enable()
+    try:
+        game_id = setup_game(client, opponent_type="computer")
+        placed = client.post('/api/place', json={'game_id': game_id, 'x': 0, 'y': 0}).get_json()
+        wait_for_turn(client, game_id, placed['event_id'])
+        response = client.get('/api/metrics')
+        text = response.get_data(as_text=True)
+    finally:
+        metrics.enable(False)
+        metrics.REGISTRY.reset()
+    assert response.mimetype == "text/plain"
+    assert 'morris_request_seconds_count{route="/api/place",method="POST",status="200"} 1' in text
+    assert 'morris_computer_turn_seconds_count{phase="placing"} 1' in text
+
+def test_replay_returns_final_and_intermediate_state(client):
+    moves = [
+        {"action": "place", "position": "a1", "player": 1},
+        {"action": "place", "position": "b2", "player": 2},
+        {"action": "place", "position": "d1", "player": 1},
+    ]
+    data = client.post('/api/replay', json={'moves': moves, 'ply': 1}).get_json()
+    assert data['success'] is True
+    assert data['moves_applied'] == 3
+    assert data['board']['grid'][0][3] == 1
+    assert data['current_player'] == 2
+    assert data['state_at_ply']['board']['grid'][1][1] is None
+
+    response = client.post('/api/replay', json={'moves': moves + [{"action": "place", "position": "z9", "player": 2}]})
+    assert response.status_code == 400
+    assert response.get_json()['move_index'] == 3
+
+def test_undo_and_redo(client):
+    game_id = setup_game(client)
+    for x, y in [(0, 0), (1, 1)]:
+        client.post('/api/place', json={'game_id': game_id, 'x': x, 'y': y})
+    undone = client.post('/api/undo', json={'game_id': game_id}).get_json()
+    assert undone['success'] is True and undone['steps'] == 1
+    assert undone['board']['grid'][1][1] is None and undone['current_player'] == 2
+    assert undone['can_undo'] is True and undone['can_redo'] is True
+    events = client.get('/api/events', query_string={'game_id': game_id, 'after': undone['event_id'] - 1}).get_json()
+    assert events['events'][0]['data']['board']['grid'][1][1] is None
+
+    redone = client.post('/api/redo', json={'game_id': game_id}).get_json()
+    assert redone['board']['grid'][1][1] == 2 and redone['can_redo'] is False
+    nothing = client.post('/api/redo', json={'game_id': game_id}).get_json()
+    assert nothing['success'] is False and nothing['message'] == "Nothing to redo"
+    assert client.post('/api/undo', json={'game_id': 'nope'}).status_code == 404
+
+def test_undo_takes_back_the_computer_reply_too(client):
+    app.config["ASYNC_COMPUTER_TURNS"] = False
+    try:
+        game_id = setup_game(client, opponent_type="computer")
+        client.post('/api/place', json={'game_id': game_id, 'x': 0, 'y': 0})
+        undone = client.post('/api/undo', json={'game_id': game_id}).get_json()
+        redone = client.post('/api/redo', json={'game_id': game_id}).get_json()
+    finally:
+        app.config["ASYNC_COMPUTER_TURNS"] = True
+    assert undone['steps'] == 2 and undone['current_player'] == 1
+    assert all(cell is None for row in undone['board']['grid'] for cell in row)
+    assert redone['steps'] == 2 and redone['current_player'] == 1
+    assert sum(cell == 2 for row in redone['board']['grid'] for cell in row) == 1
+
+def test_replay_seeks_to_any_ply(client):
+    moves = [
+        {"action": "place", "position": "a1", "player": 1},
+        {"action": "place", "position": "b2", "player": 2},
+        {"action": "place", "position": "d1", "player": 1},
+    ]
+    replay_id = client.post('/api/replay', json={'moves': moves}).get_json()['replay_id']
+    assert client.post('/api/replay', json={'moves': moves}).get_json()['replay_id'] == replay_id
+
+    data = client.get(f'/api/replay/{replay_id}', query_string={'ply': 2}).get_json()
+    assert data['success'] is True and data['ply'] == 2 and data['plies'] == 3
+    assert data['board']['grid'][1][1] == 2 and data['board']['grid'][0][3] is None
+    assert data['current_player'] == 1
+    final = client.get(f'/api/replay/{replay_id}', query_string={'format': 'compact'}).get_json()
+    assert final['ply'] == 3 and final['board']['points'].startswith('11.2')
+
+    assert client.get(f'/api/replay/{replay_id}', query_string={'ply': 4}).status_code == 400
+    assert client.get('/api/replay/nope').status_code == 404
+
+def test_compact_boards_and_changes_since_a_version(client):
+    game_id = setup_game(client)
+    board = client.get('/api/board', query_string={'game_id': game_id, 'format': 'compact'}).get_json()['board']
+    assert board['points'] == '.' * 24 and board['version'] == 0
+    data = client.post('/api/place', json={
+        'game_id': game_id, 'x': 0, 'y': 3, 'format': 'compact', 'since': board['version']
+    }).get_json()
+    assert data['board']['changes'] == [[1, '1']]
+    assert data['board']['since'] == 0 and data['board']['version'] == 1
+    assert 'grid' not in data['board'] and 'points' not in data['board']
+    # A version the server does not know gets the whole board
+    data = client.get('/api/board', query_string={'game_id': game_id, 'format': 'compact', 'since': 99}).get_json()
+    assert data['board']['points'] == '.1' + '.' * 22
+
+def test_compact_changes_include_the_computer_reply_and_a_reset(client):
+    app.config["ASYNC_COMPUTER_TURNS"] = False
+    try:
+        game_id = setup_game(client, opponent_type="computer")
+        data = client.post('/api/place', json={
+            'game_id': game_id, 'x': 0, 'y': 0, 'format': 'compact', 'since': 0
+        }).get_json()
+    finally:
+        app.config["ASYNC_COMPUTER_TURNS"] = True
+    changes = dict(data['board']['changes'])
+    assert data['board']['version'] == 2
+    assert changes.pop(0) == '1' and list(changes.values()) == ['2']
+    reset = client.post('/api/reset', json={'game_id': game_id, 'format': 'compact', 'since': 2}).get_json()
+    assert reset['board']['version'] == 3
+    assert sorted(reset['board']['changes']) == sorted([index, '.'] for index in [0, *changes])
+
+def test_compact_events(client):
+    game_id = setup_game(client, opponent_type="computer")
+    data = client.post('/api/place', json={'game_id': game_id, 'x': 0, 'y': 0}).get_json()
+    for _ in range(20):
+        events = client.get('/api/events', query_string={
+            'game_id': game_id, 'after': data['event_id'], 'timeout': 5, 'format': 'compact'
+        }).get_json()['events']
+        if events:
+            break
+    board = events[-1]['data']['board']
+    assert 'grid' not in board and board['points'].count('2') == 1 and board['version'] == 2
+    index = board['points'].index('.')
+    x, y = Board.board_positions[index]
+    follow = client.post('/api/place', json={
+        'game_id': game_id, 'x': x, 'y': y, 'format': 'compact', 'since': board['version']
+    }).get_json()
+    assert follow['board']['changes'] == [[index, '1']]
@@ -0,0 +1,211 @@
+import asyncio
+import json
+import threading
+
+import asgi
+from app import app as flask_app
+from app import load_session
+from asgi import app
+from loadtest import ASGIClient, ASGIWebSocket
+
+client = ASGIClient(app)
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+async def setup_game(opponent_type="human"):
+    status, data = await client.json('POST', '/api/setup', json_body={
+        'firstPlayer': 'player1', 'opponentType': opponent_type, 'gameType': '9mm'
+    })
+    assert status == 200 and data['success'] is True
+    return data
+
+def test_serves_the_flask_routes():
+    async def scenario():
+        game_id = (await setup_game())['game_id']
+        status, placed = await client.json('POST', '/api/place', json_body={'game_id': game_id, 'x': 0, 'y': 0})
+        assert status == 200 and placed['success'] is True
+        status, board = await client.json('GET', '/api/board', query={'game_id': game_id})
+        return game_id, status, board
+    game_id, status, board = run(scenario())
+    assert status == 200
+    assert board['board']['grid'][0][0] == 1 and board['current_player'] == 2
+    wsgi_board = flask_app.test_client().get('/api/board', query_string={'game_id': game_id}).get_json()
+    assert wsgi_board == board
+
+def test_unknown_game_is_rejected():
+    async def scenario():
+        return (await client.json('GET', '/api/board', query={'game_id': 'nope'}),
+                await client.json('GET', '/api/events', query={'game_id': 'nope', 'timeout': 0}))
+    (status, _), (events_status, events) = run(scenario())
+    assert status == 404 and events_status == 404
+    assert events['success'] is False
+
+def test_long_poll_wakes_on_another_requests_action():
+    async def scenario():
+        game = await setup_game()
+        poll = asyncio.ensure_future(client.json('GET', '/api/events', query={
+            'game_id': game['game_id'], 'after': game['event_id'], 'timeout': 5
+        }))
+        await asyncio.sleep(0.05)
+        assert not poll.done()
+        _, placed = await client.json('POST', '/api/place', json_body={'game_id': game['game_id'], 'x': 0, 'y': 0})
+        return placed, await asyncio.wait_for(poll, 2)
+    placed, (status, events) = run(scenario())
+    assert status == 200
+    assert [event['id'] for event in events['events']] == [placed['event_id']]
+    assert events['last_event_id'] == placed['event_id']
+
+def test_long_poll_wakes_on_computer_reply():
+    async def scenario():
+        game_id = (await setup_game('computer'))['game_id']
+        _, placed = await client.json('POST', '/api/place', json_body={'game_id': game_id, 'x': 0, 'y': 0})
+        assert placed['computer_thinking'] is True
+        _, events = await client.json('GET', '/api/events', query={
+            'game_id': game_id, 'after': placed['event_id'], 'timeout': 5, 'format': 'compact'
+        })
+        return events
+    events = run(scenario())
+    state = events['events'][-1]['data']
+    assert state['current_player'] == 1
+    assert state['board']['points'].count('2') == 1 and 'grid' not in state['board']
+
+def test_events_stream():
+    flask_app.config["EVENT_STREAM_SECONDS"] = 0.3
+    try:
+        async def scenario():
+            game_id = (await setup_game())['game_id']
+            _, placed = await client.json('POST', '/api/place', json_body={'game_id': game_id, 'x': 0, 'y': 0})
+            status, headers, body = await client.request('GET', '/api/events', query={
+                'game_id': game_id, 'after': placed['event_id'] - 1
+            }, headers=[('Accept', 'text/event-stream')])
+            return placed, status, dict(headers), body.decode()
+        placed, status, headers, body = run(scenario())
+    finally:
+        flask_app.config["EVENT_STREAM_SECONDS"] = 300
+    assert status == 200 and headers[b'content-type'].startswith(b'text/event-stream')
+    assert f"id: {placed['event_id']}\nevent: state\n" in body
+    data = json.loads(body.split("data: ", 1)[1].split("\n", 1)[0])
+    assert data['board']['grid'][0][0] == 1 and data['current_player'] == 2
+
+def test_lifespan(monkeypatch):
+    stopped = []
+    monkeypatch.setattr(asgi.computer_turns, 'shutdown', lambda: stopped.append(True))
+    messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message['type'])
+
+    run(app({'type': 'lifespan'}, receive, send))
+    assert sent == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+    assert stopped == [True]
+
+def test_game_locks_are_waited_for_off_the_loop():
+    async def scenario():
+        game_id = (await setup_game())['game_id']
+        session = load_session(game_id)
+        session.lock.acquire()
+        threading.Timer(0.2, session.lock.release).start()
+        board = asyncio.ensure_future(client.json('GET', '/api/board', query={'game_id': game_id}))
+        ticks = 0
+        while not board.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        return ticks, board.result()
+    ticks, (status, _) = run(scenario())
+    assert status == 200
+    assert ticks > 5  # The loop kept running while the request waited for the game
+
+async def open_channel(game_id, **query):
+    socket = await ASGIWebSocket(app, '/api/ws', dict(query, game_id=game_id)).connect()
+    first = await socket.receive_json(2)
+    assert first['type'] == 'event' and first['event'] == 'state'
+    return socket, first
+
+async def next_message(socket, kind):
+    while True:
+        message = await socket.receive_json(5)
+        if message['type'] == kind:
+            return message
+
+def test_websocket_plays_and_pushes_to_spectators():
+    async def scenario():
+        game_id = (await setup_game())['game_id']
+        player, _ = await open_channel(game_id)
+        spectator, first = await open_channel(game_id, role='spectator')
+        await player.send_json({'type': 'place', 'x': 0, 'y': 0, 'id': 1})
+        result = await next_message(player, 'result')
+        pushed = await next_message(spectator, 'event')
+        await spectator.send_json({'type': 'place', 'x': 0, 'y': 3, 'id': 2})
+        refused = await next_message(spectator, 'error')
+        await player.send_json({'type': 'place', 'x': 0, 'y': 0, 'id': 3})
+        occupied = await next_message(player, 'result')
+        await player.close()
+        await spectator.close()
+        return first, result, pushed, refused, occupied
+    first, result, pushed, refused, occupied = run(scenario())
+    assert first['data']['current_player'] == 1
+    assert result['id'] == 1 and result['status'] == 200 and result['data']['success'] is True
+    assert pushed['id'] == result['data']['event_id']
+    assert pushed['data']['board']['grid'][0][0] == 1 and pushed['data']['current_player'] == 2
+    assert refused['id'] == 2 and refused['message'] == 'Spectators cannot play'
+    assert occupied['id'] == 3 and occupied['data']['success'] is False
+
+def test_websocket_pushes_computer_moves_as_compact_changes():
+    async def scenario():
+        game_id = (await setup_game('computer'))['game_id']
+        socket, first = await open_channel(game_id, format='compact')
+        await socket.send_json({'type': 'place', 'x': 0, 'y': 0, 'id': 1})
+        states = []
+        while not states or states[-1]['data']['current_player'] != 1:
+            states.append(await next_message(socket, 'event'))
+        await socket.close()
+        return first, states
+    first, states = run(scenario())
+    assert first['data']['board']['points'] == '.' * 24
+    own, reply = states[0]['data']['board'], states[-1]['data']['board']
+    assert own['since'] == first['data']['board']['version'] and own['changes'] == [[0, '1']]
+    assert 'points' not in reply and [cell for _, cell in reply['changes']] == ['2']
+
+def test_websocket_rejects_unknown_games_and_messages():
+    async def scenario():
+        try:
+            await ASGIWebSocket(app, '/api/ws', {'game_id': 'nope'}).connect()
+        except ConnectionRefusedError as error:
+            refused = str(error)
+        socket, _ = await open_channel((await setup_game())['game_id'])
+        await socket.send_json({'type': 'ping', 'id': 1})
+        pong = await next_message(socket, 'pong')
+        await socket.send_json({'type': 'jump', 'id': 2})
+        unknown = await next_message(socket, 'error')
+        await socket.close()
+        return refused, pong, unknown
+    refused, pong, unknown = run(scenario())
+    assert refused == 'closed with code 4404'
+    assert pong['id'] == 1
+    assert unknown['id'] == 2 and 'jump' in unknown['message']
+
+def test_websocket_actions_skip_the_wsgi_bridge(monkeypatch):
+    def no_flask(scope, body):
+        raise AssertionError("WebSocket actions should not go through Flask")
+
+    async def scenario():
+        game_id = (await setup_game())['game_id']
+        monkeypatch.setattr(asgi, '_call_flask', no_flask)
+        socket, _ = await open_channel(game_id, format='compact')
+        await socket.send_json({'type': 'place', 'x': 0, 'y': 0, 'id': 1})
+        placed = await next_message(socket, 'result')
+        await socket.send_json({'type': 'place', 'y': 3, 'id': 2})
+        invalid = await next_message(socket, 'result')
+        await socket.send_json({'type': 'undo', 'id': 3})
+        undone = await next_message(socket, 'result')
+        await socket.close()
+        return placed, invalid, undone
+    placed, invalid, undone = run(scenario())
+    assert placed['status'] == 200 and placed['data']['board']['points'][0] == '1'
+    assert invalid['status'] == 400 and invalid['data'] == {'success': False, 'message': 'Invalid action'}
+    assert undone['data']['steps'] == 1 and undone['data']['board']['points'] == '.' * 24
@@ -0,0 +1,72 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from game_logic import batcheval
+from game_logic.batcheval import FEATURES, BatchEvaluator, positions_to_arrays
+from game_logic.evaluation import PHASES, EvaluationWeights, Evaluator
+from game_logic.position import Position
+from game_logic.search import SearchEngine
+
+from .positions import random_positions
+
+
+def test_scores_match_search_evaluate():
+    for game_type in ("9mm", "12mm"):
+        engine = SearchEngine(game_type)
+        positions = random_positions(game_type, 600, game_type)
+        assert any(p.hand == (0, 0, 0) for p in positions)
+        scores = BatchEvaluator(game_type).evaluate_positions(positions)
+        expected = [engine.evaluate(list(p.bits), list(p.hand), p.side) for p in positions]
+        assert scores.tolist() == expected
+
+
+def test_features_of_a_known_position():
+    evaluator = BatchEvaluator("9mm")
+    geometry = Position("9mm", (0, 0, 0), (0, 0, 0), 1).geometry
+    own = geometry.mills[0]
+    # A lone opponent piece away from the side to move's closed mill
+    opp_point = next(i for i in range(24) if not own >> i & 1 and not geometry.adjacent[i] & own)
+    opp = 1 << opp_point
+    values = dict(zip(FEATURES, evaluator.features([own], [opp], [0], [0])[0].tolist()))
+    empty = geometry.full_mask & ~(own | opp)
+    own_moves = sum(bin(geometry.adjacent[i] & empty).count("1") for i in range(24) if own >> i & 1)
+    assert values == {
+        "material": 2,
+        "mills": 1,
+        "two_piece": 0,
+        "double_mills": 0,
+        "mobility": own_moves - bin(geometry.adjacent[opp_point]).count("1"),
+        "blocked": 0,
+        "hand": 0,
+    }
+
+
+def test_phases_select_the_weights():
+    evaluator = BatchEvaluator("9mm")
+    own, opp = [0b111, 0b111, 0b1111], [0b111 << 8, 0b1111 << 8, 0b1111 << 8]
+    phases = evaluator.phases(own, opp, [1, 0, 0], [0, 0, 0])
+    assert [PHASES[i] for i in phases] == ["placing", "flying", "moving"]
+
+
+def test_scores_with_custom_weights():
+    weights = EvaluationWeights({phase: {"double_mills": 7, "blocked": 3, "hand": 5} for phase in PHASES})
+    positions = random_positions("12mm", 300, 3)
+    evaluator = Evaluator("12mm", weights)
+    expected = [evaluator.evaluate(list(p.bits), list(p.hand), p.side) for p in positions]
+    assert BatchEvaluator("12mm", weights).evaluate_positions(positions).tolist() == expected
+    assert BatchEvaluator("12mm").evaluate_positions(positions, weights=weights).tolist() == expected
+
+
+def test_features_match_the_scalar_evaluator():
+    for game_type in ("9mm", "12mm"):
+        evaluator = Evaluator(game_type)
+        positions = random_positions(game_type, 300, 4)
+        expected = [list(evaluator.features(list(p.bits), list(p.hand), p.side)) for p in positions]
+        assert BatchEvaluator(game_type).features(*positions_to_arrays(positions)).tolist() == expected
+
+
+def test_requires_numpy(monkeypatch):
+    monkeypatch.setattr(batcheval, "np", None)
+    with pytest.raises(ImportError):
+        BatchEvaluator("9mm")
@@ -0,0 +1,38 @@
+import json
+
+import benchmark
+
+
+def test_measures_per_operation_time():
+    calls = []
+    result = benchmark.measure(lambda: calls.append(1), per_call=2, repeat=3, min_time=0.001)
+    assert result["repeat"] == 3
+    assert len(calls) >= result["calls"] * 3  # Plus the shorter calibration runs
+    assert 0 < result["seconds"] <= result["median"]
+
+def test_every_benchmark_sets_up():
+    names = [name for name, _, _ in benchmark.BENCHMARKS]
+    assert len(names) == len(set(names))
+    for group in ("rules.", "ai.", "selfplay.", "http."):
+        assert any(name.startswith(group) for name in names)
+    for name, setup, _ in benchmark.BENCHMARKS:
+        if not name.startswith(("ai.turn.placing.depth4", "ai.turn.moving.depth4", "selfplay.")):
+            assert callable(setup()), name
+
+def test_compares_against_a_baseline(tmp_path):
+    baseline = {"results": {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}, "gone": {"seconds": 1.0}}}
+    results = {"results": {"a": {"seconds": 1.2}, "b": {"seconds": 1.5}, "new": {"seconds": 1.0}}}
+    rows = benchmark.compare(results, baseline, tolerance=0.3)
+    assert [(name, regressed) for name, _, _, _, regressed in rows] == [("a", False), ("b", True)]
+
+    path = tmp_path / "baseline.json"
+    output = tmp_path / "results.json"
+    assert benchmark.main(["--filter", "rules.check_game_over", "--repeat", "2", "--min-time", "0.001",
+                           "--save-baseline", str(path)]) == 0
+    assert list(json.loads(path.read_text())["results"]) == ["rules.check_game_over"]
+    slower = json.loads(path.read_text())
+    slower["results"]["rules.check_game_over"]["seconds"] /= 1000  # As if it used to be much faster
+    path.write_text(json.dumps(slower))
+    assert benchmark.main(["--filter", "rules.check_game_over", "--repeat", "2", "--min-time", "0.001",
+                           "--baseline", str(path), "--output", str(output)]) == 1
+    assert output.exists()
@@ -0,0 +1,118 @@
+import json
+import random
+
+import pytest
+from game_logic.bitboard import BitBoard, get_geometry, iter_bits, popcount
+from game_logic.board import Board
+from game_logic.player import Player
+from game_logic.gamemanager import GameManager
+
+@pytest.fixture
+def board():
+    return BitBoard(game_type="9mm")
+
+def test_geometry_tables():
+    nine = get_geometry("9mm")
+    twelve = get_geometry("12mm")
+    assert len(nine.points) == 24
+    assert len(nine.mills) == 16
+    assert len(twelve.mills) == 20  # Four extra diagonal mills
+    assert all(popcount(mill) == 3 for mill in twelve.mills)
+    # Every point sits on exactly two 9mm mills
+    assert all(len(mills) == 2 for mills in nine.mills_at)
+
+def test_adjacency_matches_board():
+    for game_type in ("9mm", "12mm"):
+        board = Board(game_type)
+        bitboard = BitBoard(game_type)
+        for a in board.valid_positions:
+            for b in board.valid_positions:
+                assert bitboard.is_adjacent(*a, *b) == bool(board.is_adjacent(*a, *b))
+
+def test_symmetry_tables_match_board():
+    geometry = get_geometry("9mm")
+    board = Board(game_type="9mm")
+    board.grid[0][0] = 1
+    board.grid[1][3] = 1
+    board.grid[3][2] = 2
+    bits = geometry.bits_of(board)
+    first, second, transform = geometry.canonical(bits[1], bits[2])
+    assert (first, second) == (geometry.permute(bits[1], transform), geometry.permute(bits[2], transform))
+    cells, board_transform = board.canonical_form()
+    assert transform == board_transform
+    assert geometry.mask_of([p for p, owner in zip(geometry.points, cells) if owner == 1]) == first
+    for transform, perm in enumerate(geometry.symmetries):
+        assert geometry.permute(bits[1], transform) == sum(1 << perm[i] for i in iter_bits(bits[1]))
+        assert all(geometry.inverse_symmetries[transform][perm[i]] == i for i in range(24))
+
+def test_grid_writes_update_bits(board):
+    board.grid[0][0] = 1
+    board.grid[6][6] = 2
+    assert board.pieces(1) == 1 << board.geometry.index[(0, 0)]
+    assert board.count_pieces(2) == 1
+    board.grid[0][0] = None
+    assert board.pieces(1) == 0
+    assert board.grid[6][6] == 2
+
+def test_grid_rejects_invalid_points(board):
+    with pytest.raises(ValueError):
+        board.grid[3][3] = 1
+    with pytest.raises(ValueError):
+        board.grid[0][0] = "X"
+
+def test_check_for_mill_matches_board():
+    rng = random.Random(7)
+    for game_type in ("9mm", "12mm"):
+        for _ in range(50):
+            board = Board(game_type)
+            bitboard = BitBoard(game_type)
+            for x, y in board.valid_positions:
+                value = rng.choice([None, None, 1, 2])
+                board.grid[x][y] = value
+                bitboard.grid[x][y] = value
+            for player in (Player(1, 0), Player(2, 0)):
+                for x, y in board.valid_positions:
+                    assert bitboard.check_for_mill(x, y, player) == board.check_for_mill(x, y, player)
+
+def test_removable_mask_respects_mills(board):
+    for pos in [(0, 0), (0, 3), (0, 6), (3, 4)]:
+        board.grid[pos[0]][pos[1]] = 2
+    assert board.geometry.positions_of(board.removable_mask(2)) == [(3, 4)]
+    board.grid[3][4] = None
+    assert popcount(board.removable_mask(2)) == 3  # All pieces are in mills
+
+def test_legal_moves_and_flying(board):
+    board.grid[0][0] = 1
+    board.grid[0][3] = 2
+    assert board.legal_moves(1) == [((0, 0), (3, 0))]
+    assert len(board.legal_moves(1, flying=True)) == 22
+
+def test_iter_bits():
+    assert list(iter_bits(0b101001)) == [0, 3, 5]
+
+def test_to_dict_round_trip(board):
+    board.grid[1][3] = 1
+    board.grid[5][5] = 2
+    data = json.loads(json.dumps(board.to_dict()))
+    restored = BitBoard.from_dict(data)
+    assert restored.bits == board.bits
+    assert restored.grid == board.grid
+
+def test_copy_is_independent(board):
+    board.grid[0][0] = 1
+    copy = board.copy()
+    copy.grid[0][3] = 1
+    assert board.grid[0][3] is None
+    assert copy.count_pieces(1) == 2
+
+def test_game_manager_accepts_bitboard():
+    board = BitBoard(game_type="9mm")
+    game_manager = GameManager(board, Player(1, 9), Player(2, 9), starting_player_id=1, game_type="9mm")
+    for pos in [(0, 0), (1, 1), (0, 3), (1, 3)]:
+        assert game_manager.place_piece(*pos)["success"]
+    result = game_manager.place_piece(0, 6)
+    assert result["mill_formed"] is True
+    assert game_manager.remove_piece(1, 1)["success"]
+    assert board.count_pieces(1) == 3
+    assert board.count_pieces(2) == 1
+    assert json.loads(json.dumps(game_manager.get_board_state()))["grid"][0][6] == 1
@@ -29,6 +29,7 @@ def test_is_adjacent(board):
     # Test positions that are not adjacent
     assert board.is_adjacent(0, 0, 1, 1) is False
     assert board.is_adjacent(0, 3, 3, 6) is False
+    assert board.is_adjacent(3, 2, 3, 4) is False  # c4 and e4 face each other across the centre
 
 def test_check_for_mill(board):
     class MockPlayer:
@@ -82,3 +83,88 @@ def test_12mm_valid_positions():
     assert (1, 1) in valid_positions
     assert (3, 3) not in valid_positions  # Still invalid center position
 
+def test_counts_follow_grid_writes():
+    board = Board(game_type="9mm")
+    board.grid[0][0] = 1
+    board.grid[0][3] = 2
+    assert board.count_pieces(1) == 1
+    assert board.count_pieces(2) == 1
+    assert board.empty_points == 22
+    assert board.mobility_of(1) == 1  # (0, 3) is taken, only (3, 0) is free
+    assert board.mobility_of(2) == 2
+
+    board.grid[0][3] = None
+    assert board.count_pieces(2) == 0
+    assert board.mobility_of(1) == 2
+    board.verify_counts()
+
+def test_12mm_mobility_includes_diagonals():
+    board = Board(game_type="12mm")
+    board.grid[1][1] = 1
+    assert board.mobility_of(1) == 4
+
+def test_counts_survive_random_writes():
+    import random
+    rng = random.Random(7)
+    board = Board(game_type="9mm")
+    for _ in range(500):
+        x, y = rng.choice(board.board_positions)
+        board.grid[x][y] = rng.choice([None, 1, 2])
+        board.verify_counts()
+    restored = Board.from_dict(board.to_dict())
+    assert restored.piece_counts == board.recount()[0]
+
+def test_custom_adjacency_rebuilds_neighbors_and_mobility():
+    board = Board(game_type="9mm")
+    board.grid[0][3] = 1
+    adjacency = dict(Board.default_adjacent_positions)
+    adjacency[(0, 3)] = adjacency[(0, 3)] + [(3, 3)]  # A link to the centre, which is never occupied
+    board.adjacent_positions = adjacency
+    assert board.neighbors == board.get_neighbors()
+    assert board.mobility_of(1) == 4
+    board.grid[0][0] = 2
+    assert board.mobility_of(1) == 3
+    board.verify_counts()
+    assert Board("9mm").adjacent_positions is Board.default_adjacent_positions
+
+def test_verify_counts_detects_drift():
+    from game_logic.board import BoardStateError
+    board = Board(game_type="9mm")
+    board.grid[0][0] = 1
+    board.piece_counts[1] = 5
+    with pytest.raises(BoardStateError):
+        board.verify_counts()
+
+@pytest.mark.parametrize("game_type", ["9mm", "12mm"])
+def test_symmetries_map_the_board_onto_itself(game_type):
+    symmetries = Board.symmetries(game_type)
+    assert len(symmetries) == 16
+    assert symmetries[0] == tuple(range(24))
+    assert len(set(symmetries)) == 16
+    board = Board(game_type)
+    positions = board.board_positions
+    for perm in symmetries:
+        image = {pos: positions[perm[i]] for i, pos in enumerate(positions)}
+        for pos, neighbors in board.neighbors.items():
+            assert sorted(image[n] for n in neighbors) == sorted(board.neighbors[image[pos]])
+
+def test_canonical_form_is_shared_by_symmetric_boards():
+    import random
+    rng = random.Random(11)
+    for _ in range(20):
+        board = Board(game_type="12mm")
+        for pos in rng.sample(board.board_positions, 10):
+            board.grid[pos[0]][pos[1]] = rng.choice([1, 2])
+        cells, transform = board.canonical_form()
+        for index in range(16):
+            image = Board(game_type="12mm")
+            for x, y in board.board_positions:
+                if board.grid[x][y] is not None:
+                    tx, ty = board.transform_position((x, y), index)
+                    image.grid[tx][ty] = board.grid[x][y]
+            assert image.canonical_form()[0] == cells
+        # The transform takes the board to its canonical cells, and back
+        for i, (x, y) in enumerate(board.board_positions):
+            tx, ty = board.transform_position((x, y), transform)
+            assert cells[board.board_positions.index((tx, ty))] == (board.grid[x][y] or 0)
+            assert board.transform_position((tx, ty), transform, inverse=True) == (x, y)
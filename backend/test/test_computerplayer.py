@@ -97,3 +97,26 @@ def test_flying_phase(board, computer_player):
     board.grid[6][6] = 2
     move = computer_player.decide_move(board)
     assert move is not None, "Computer should be able to fly during the flying phase."
+
+def test_search_player_places_and_removes(board, opponent):
+    computer = ComputerPlayer(player_id=2, pieces=7, search_depth=2)
+    board.grid[0][0] = 2
+    board.grid[0][3] = 2
+    board.grid[3][4] = 1
+    opponent.placed_pieces = [(3, 4)]
+    assert computer.decide_placement(board, opponent) == (0, 6)
+    assert computer.decide_removal(board, opponent) == (3, 4)
+
+def test_search_player_serializes_settings():
+    computer = ComputerPlayer(player_id=2, pieces=9, search_depth=3, time_budget=0.2)
+    data = computer.to_dict()
+    assert data["search_depth"] == 3
+    assert data["time_budget"] == 0.2
+
+def test_mill_probes_leave_the_board_alone(board, computer_player):
+    board.grid[0][0] = 1
+    board.grid[0][3] = 1
+    before = [list(row) for row in board.grid]
+    assert computer_player.blocks_opponent_mill(0, 6, board, 1)
+    assert not computer_player.forms_mill(0, 6, board)
+    assert [list(row) for row in board.grid] == before
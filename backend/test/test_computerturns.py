@@ -0,0 +1,83 @@
+import threading
+
+from game_logic.board import Board
+from game_logic.computerplayer import ComputerPlayer
+from game_logic.computerturns import ComputerTurn, ComputerTurnScheduler
+from game_logic.gamemanager import GameManager
+from game_logic.player import Player
+
+
+def computer_game(search_depth=0):
+    game_manager = GameManager(
+        Board("9mm"), Player(1, 9), ComputerPlayer(2, 9, search_depth=search_depth), "9mm", opponent_type="computer"
+    )
+    game_manager.computer_turns_enabled = False
+    game_manager.place_piece(0, 0)
+    return game_manager
+
+def test_plans_on_a_copy_and_applies_to_the_live_game():
+    game_manager = computer_game(search_depth=2)
+    turn = ComputerTurn(game_manager)
+    actions = turn.plan()
+    assert [action["action"] for action in actions] == ["place"]
+    assert game_manager.current_player.player_id == 2  # Untouched until applied
+    assert game_manager.player2.transposition_table is not None
+    assert turn.apply(game_manager)
+    assert game_manager.current_player.player_id == 1
+    assert game_manager.board.grid[actions[0]["x"]][actions[0]["y"]] == 2
+
+def test_stale_or_cancelled_turns_are_not_applied():
+    game_manager = computer_game()
+    turn = ComputerTurn(game_manager)
+    turn.plan()
+    game_manager.current_player = game_manager.player1  # The game moved on meanwhile
+    assert not turn.apply(game_manager)
+
+    game_manager = computer_game()
+    turn = ComputerTurn(game_manager)
+    turn.plan()
+    turn.cancelled.set()
+    assert not turn.apply(game_manager)
+
+def test_empty_search_falls_back_to_the_heuristics(monkeypatch):
+    monkeypatch.setattr(ComputerPlayer, "search_move", lambda self, board, opponent=None: (None, None))
+    game_manager = computer_game(search_depth=2)
+    actions = ComputerTurn(game_manager).plan()
+    assert [action["action"] for action in actions] == ["place"]
+
+def test_overlapping_turns_do_not_share_a_table():
+    game_manager = computer_game(search_depth=2)
+    ComputerTurn(game_manager).plan()
+    table = game_manager.player2.transposition_table
+    first = ComputerTurn(game_manager)
+    second = ComputerTurn(game_manager)  # Planned while the first is still searching
+    assert first.table is table and second.table is None
+    second.plan()
+    first.plan()
+    assert game_manager.player2.transposition_table is not table  # Whichever finished first returns its table
+    assert second.apply(game_manager)
+
+def test_scheduler_runs_one_turn_per_game():
+    scheduler = ComputerTurnScheduler(workers=2)
+    game_manager = computer_game()
+    lock = threading.Lock()
+    done = threading.Event()
+    applied = []
+
+    def finish(turn):
+        with lock:
+            if scheduler.complete("g", turn) and turn.apply(game_manager):
+                applied.append(turn)
+                done.set()
+
+    try:
+        with lock:
+            first = scheduler.schedule("g", game_manager, finish)
+            second = scheduler.schedule("g", game_manager, finish)
+            assert first.cancelled.is_set() and scheduler.pending("g")
+        assert done.wait(5)
+    finally:
+        scheduler.shutdown()
+    assert applied == [second]
+    assert not scheduler.pending("g")
+    assert scheduler.cancel("g") is False
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+from game_logic.bitboard import get_geometry
+from game_logic.board import Board
+from game_logic.computerplayer import ComputerPlayer
+from game_logic.evaluation import FEATURES, PHASES, EvaluationWeights, Evaluator, load_weights, phase_of
+from game_logic.gamemanager import GameManager
+from game_logic.player import Player
+from game_logic.search import SearchEngine
+
+from .positions import random_positions
+
+
+def mask(geometry, points):
+    return sum(1 << geometry.index[point] for point in points)
+
+
+def test_default_weights_score_material_mills_and_mobility():
+    geometry = get_geometry("9mm")
+    own = mask(geometry, [(0, 0), (0, 3), (0, 6), (1, 1), (2, 2)])  # A closed mill
+    opp = mask(geometry, [(6, 0), (6, 3), (3, 5), (4, 4)])  # Two in a line with the third point free
+    evaluator = Evaluator("9mm")
+    features = dict(zip(FEATURES, evaluator.features([0, own, opp], [0, 0, 0], 1)))
+    assert features["material"] == 1 and features["mills"] == 1 and features["two_piece"] == -1
+    assert phase_of([0, own, opp], [0, 0, 0]) == "moving"
+    expected = 100 * 1 + 10 * 1 - 6 * 1 + 2 * features["mobility"]
+    assert evaluator.evaluate([0, own, opp], [0, 0, 0], 1) == expected
+    # While placing, mobility does not count
+    assert evaluator.evaluate([0, own, opp], [0, 2, 2], 1) == 100 * 1 + 10 * 1 - 6 * 1
+    assert evaluator.evaluate([0, own, opp], [0, 0, 0], 2) == -expected
+
+
+def test_double_mills_and_blocked_pieces():
+    geometry = get_geometry("9mm")
+    # Two closed mills sharing the corner (0, 0), and an opponent piece hemmed in by its own
+    own = mask(geometry, [(0, 0), (0, 3), (0, 6), (3, 0), (6, 0)])
+    opp = mask(geometry, [(1, 1), (1, 3), (3, 1)])
+    features = dict(zip(FEATURES, Evaluator("9mm").features([0, own, opp], [0, 0, 0], 1)))
+    assert features["mills"] == 2
+    assert features["double_mills"] == 1
+    empty = geometry.full_mask & ~(own | opp)
+    blocked = [i for i in range(24) if (own | opp) >> i & 1 and not geometry.adjacent[i] & empty]
+    assert geometry.index[(1, 1)] in blocked
+    assert features["blocked"] == sum(1 if opp >> i & 1 else -1 for i in blocked)
+
+
+def test_phases():
+    assert phase_of([0, 0b111, 0b1111 << 8], [0, 1, 0]) == "placing"
+    assert phase_of([0, 0b111, 0b1111 << 8], [0, 0, 0]) == "flying"
+    assert phase_of([0, 0b1111, 0b1111 << 8], [0, 0, 0]) == "moving"
+
+
+def test_evaluate_is_the_weighted_sum_of_the_features():
+    weights = EvaluationWeights({
+        "placing": {"hand": 4, "double_mills": 9},
+        "moving": {"blocked": 7, "mobility": 0},
+        "flying": {"mills": 30},
+    })
+    for game_type in ("9mm", "12mm"):
+        evaluator = Evaluator(game_type, weights)
+        for position in random_positions(game_type, 300, game_type):
+            bits, hand = list(position.bits), list(position.hand)
+            vector = weights.vector(phase_of(bits, hand))
+            features = evaluator.features(bits, hand, position.side)
+            assert evaluator.evaluate(bits, hand, position.side) == sum(w * f for w, f in zip(vector, features))
+
+
+def test_weights_files(tmp_path):
+    path = tmp_path / "weights.json"
+    path.write_text(json.dumps({"moving": {"mobility": 5, "blocked": 3}}))
+    weights = EvaluationWeights.load(path)
+    assert dict(zip(FEATURES, weights.vector("moving")))["mobility"] == 5
+    assert weights.vector("placing") == EvaluationWeights().vector("placing")
+    saved = tmp_path / "saved.json"
+    weights.save(saved)
+    assert EvaluationWeights.load(saved) == weights
+    assert load_weights(str(saved)) is load_weights(str(saved))
+    with pytest.raises(ValueError):
+        EvaluationWeights({"moving": {"tempo": 1}})
+    with pytest.raises(ValueError):
+        EvaluationWeights({"endgame": {}})
+
+
+def test_search_and_computer_player_use_the_weights(tmp_path):
+    weights = EvaluationWeights({phase: {"material": 0, "two_piece": -50} for phase in PHASES})
+    bits, hand = [0, mask(get_geometry("9mm"), [(0, 0), (0, 3)]), 0], [0, 7, 9]
+    assert SearchEngine("9mm").evaluate(bits, hand, 1) == 6
+    assert SearchEngine("9mm", weights=weights).evaluate(bits, hand, 1) == -50
+    path = tmp_path / "weights.json"
+    weights.save(path)
+    computer = ComputerPlayer(2, 9, search_depth=1, weights_path=str(path))
+    assert computer.decide_placement(Board("9mm"), Player(1, 9)) is not None
+    restored = GameManager.deserialize_player(computer.to_dict())
+    assert restored.weights_path == str(path)
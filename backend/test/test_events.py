@@ -0,0 +1,42 @@
+import threading
+
+from game_logic.events import EventBroker
+
+
+def test_publishes_and_resumes_after_an_id():
+    broker = EventBroker(history=3)
+    assert broker.last_id("a") == 0
+    first = broker.publish("a", "state", {"n": 1})
+    broker.publish("b", "state", {"n": 2})
+    third = broker.publish("a", "state", {"n": 3})
+    assert first < third and broker.last_id("a") == third
+    assert broker.events_after("a", 0) == [(first, "state", {"n": 1}), (third, "state", {"n": 3})]
+    assert broker.events_after("a", first) == [(third, "state", {"n": 3})]
+    for n in range(5):
+        broker.publish("a", "state", {"n": n})
+    assert len(broker.events_after("a", 0)) == 3  # Only the history is kept
+
+def test_wait_wakes_on_publish_or_times_out():
+    broker = EventBroker()
+    assert broker.wait("a", 0, 0.01) == []
+    timer = threading.Timer(0.05, broker.publish, ("a", "state", {}))
+    timer.start()
+    events = broker.wait("a", 0, 5)
+    timer.join()
+    assert [event[1] for event in events] == ["state"]
+
+def test_bounds_the_number_of_feeds():
+    broker = EventBroker(max_games=2)
+    for game_id in "abc":
+        broker.publish(game_id, "state", {})
+    assert broker.last_id("a") == 0 and broker.last_id("c") == 3
+    broker.discard("c")
+    assert broker.events_after("c", 0) == []
+
+def test_listeners_hear_every_publish():
+    broker = EventBroker()
+    heard = []
+    broker.add_listener(lambda game_id, event_id: heard.append((game_id, event_id, broker.last_id(game_id))))
+    broker.publish("a", "state", {})
+    broker.publish("b", "state", {})
+    assert heard == [("a", 1, 1), ("b", 2, 2)]
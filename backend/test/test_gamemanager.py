@@ -338,3 +338,83 @@ class TestGameManager:
         player2.placed_pieces = [(1, 1), (1, 3), (4, 2)]  # Not all form a mill
         board.grid[1][1] = 2
         board.grid[1]
+
+
+def test_random_game_keeps_counts_consistent():
+    import random
+    rng = random.Random(3)
+    board = Board(game_type="9mm")
+    game_manager = GameManager(board, Player(1, 9), Player(2, 9), starting_player_id=1, game_type="9mm")
+    game_manager.debug_checks = True  # Every action is re-checked against a full recount
+
+    for _ in range(300):
+        if game_manager.check_game_over()["game_over"]:
+            break
+        player_id = game_manager.get_current_player()
+        if game_manager.waiting_for_removal:
+            targets = [pos for pos in board.board_positions if board.grid[pos[0]][pos[1]] == 3 - player_id]
+            rng.shuffle(targets)
+            assert any(game_manager.remove_piece(*pos)["success"] for pos in targets)
+        elif game_manager.phase == "placing":
+            empty = [pos for pos in board.board_positions if board.grid[pos[0]][pos[1]] is None]
+            assert game_manager.place_piece(*rng.choice(empty))["success"]
+        else:
+            own = [pos for pos in board.board_positions if board.grid[pos[0]][pos[1]] == player_id]
+            flying = board.count_pieces(player_id) == 3
+            moves = [(src, dst) for src in own for dst in board.board_positions
+                     if board.grid[dst[0]][dst[1]] is None and (flying or board.is_adjacent(*src, *dst))]
+            src, dst = rng.choice(moves)
+            assert game_manager.move_piece(*src, *dst)["success"]
+        assert game_manager.get_pieces_on_board(player_id) == board.recount()[0].get(player_id, 0)
+
+def test_version_counts_actions_and_survives_serialization():
+    game_manager = GameManager(Board("9mm"), Player(1, 9), Player(2, 9), "9mm")
+    assert game_manager.version == 0
+    game_manager.place_piece(0, 0)
+    assert not game_manager.place_piece(0, 0)["success"]  # Failed actions do not count
+    game_manager.place_piece(0, 3)
+    assert game_manager.version == 2
+    assert game_manager.get_board_state()["version"] == 2
+    assert GameManager.from_dict(game_manager.to_dict()).version == 2
+
+def _snapshot(game_manager):
+    import copy
+    state = copy.deepcopy(game_manager.to_dict())  # to_dict shares the live grid and piece lists
+    del state["version"]
+    return state
+
+def test_undo_and_redo_restore_every_position():
+    import random
+    rng = random.Random(11)
+    game_manager = GameManager(Board("9mm"), Player(1, 9), Player(2, 9), "9mm")
+    snapshots = [_snapshot(game_manager)]
+    while not game_manager.check_game_over()["game_over"] and len(snapshots) < 120:
+        move = rng.choice(game_manager.legal_moves())
+        assert game_manager.apply_action(dict(move.to_dict(), player=game_manager.get_current_player()))["success"]
+        snapshots.append(_snapshot(game_manager))
+    assert any(record[0]["action"] == "remove" for record in game_manager.history)
+
+    for expected in reversed(snapshots[:-1]):
+        assert game_manager.undo()
+        assert _snapshot(game_manager) == expected
+        game_manager.check_consistency()
+    assert not game_manager.undo() and game_manager.can_redo
+    for expected in snapshots[1:]:
+        assert game_manager.redo()
+        assert _snapshot(game_manager) == expected
+    assert not game_manager.redo()
+    assert game_manager.version == 3 * (len(snapshots) - 1)  # Undos and redos are versions too
+
+def test_new_action_clears_redo_and_history_is_bounded():
+    from collections import deque
+    game_manager = GameManager(Board("9mm"), Player(1, 9), Player(2, 9), "9mm")
+    game_manager.history = deque(maxlen=2)
+    for x, y in [(0, 0), (0, 3), (1, 1)]:
+        game_manager.place_piece(x, y)
+    assert [(record[0]["x"], record[0]["y"]) for record in game_manager.history] == [(0, 3), (1, 1)]
+    assert game_manager.undo() and game_manager.can_redo
+    game_manager.place_piece(2, 2)
+    assert not game_manager.can_redo
+    assert game_manager.undo() and game_manager.undo()
+    assert not game_manager.undo()  # The first placement fell out of the history
+    assert game_manager.board.grid[0][0] == 1 and game_manager.get_current_player() == 2
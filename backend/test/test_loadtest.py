@@ -0,0 +1,19 @@
+import loadtest
+
+
+def test_runs_games_on_both_paths():
+    for run in (loadtest.run_flask, loadtest.run_asgi):
+        summary = run(4, 2, "human", 4)
+        assert summary["games"] == 4 and summary["failures"] == 0
+        assert summary["requests"] >= 4 * 5  # Setup plus four placements per game
+        assert 0 < summary["latency_p50"] <= summary["latency_p95"] <= summary["latency_max"]
+
+def test_waits_for_computer_replies():
+    summary = loadtest.run_asgi(3, 3, "computer", 3)
+    assert summary["games"] == 3 and summary["failures"] == 0
+    assert summary["peak_concurrent_games"] == 3
+    assert loadtest.format_summary(summary).startswith("     asgi: 3 games")
+def test_plays_over_websockets():
+    summary = loadtest.run_websocket(3, 3, "computer", 3)
+    assert summary["games"] == 3 and summary["failures"] == 0
+    assert summary["mode"] == "websocket"
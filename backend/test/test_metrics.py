@@ -0,0 +1,50 @@
+import pytest
+
+from game_logic import metrics, movegenerator
+from game_logic.board import Board
+from game_logic.metrics import Registry
+
+
+@pytest.fixture
+def instrumentation():
+    metrics.REGISTRY.reset()
+    metrics.enable()
+    yield metrics
+    metrics.enable(False)
+    metrics.REGISTRY.reset()
+
+
+def test_counter_and_timer_render_as_prometheus_text():
+    registry = Registry()
+    checks = registry.counter("checks_total", "Checks.", labels=("kind",))
+    latency = registry.timer("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    checks.inc(2, "mill")
+    latency.observe(0.5)
+    text = registry.render()
+    assert '# TYPE checks_total counter' in text
+    assert 'checks_total{kind="mill"} 2' in text
+    assert 'latency_seconds_bucket{le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{le="1.0"} 1' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 1' in text
+    assert 'latency_seconds_count 1' in text
+
+def test_duplicate_metric_names_are_rejected():
+    registry = Registry()
+    registry.counter("a_total", "A.")
+    with pytest.raises(ValueError):
+        registry.counter("a_total", "A again.")
+
+def test_hooks_do_nothing_while_disabled():
+    metrics.REGISTRY.reset()
+    board = Board(game_type="9mm")
+    board.completes_mill(0, 0, 1)
+    movegenerator.placements(board)
+    assert metrics.MILL_CHECKS.value() == 0
+    assert metrics.MOVE_GENERATION.count("placements") == 0
+
+def test_hooks_record_when_enabled(instrumentation):
+    board = Board(game_type="9mm")
+    board.grid[0][0] = 1
+    movegenerator.removals(board, 1)
+    assert metrics.MILL_CHECKS.value() == 1
+    assert metrics.MOVE_GENERATION.count("removals") == 1
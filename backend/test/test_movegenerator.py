@@ -0,0 +1,67 @@
+from game_logic import movegenerator
+from game_logic.board import Board
+from game_logic.gamemanager import GameManager
+from game_logic.movegenerator import MOVE, PLACE, REMOVE, Move
+from game_logic.player import Player
+
+
+def test_placements_cover_empty_points():
+    board = Board(game_type="9mm")
+    board.grid[0][0] = 1
+    moves = movegenerator.placements(board)
+    assert len(moves) == 23
+    assert Move(PLACE, (0, 0)) not in moves
+
+def test_slides_follow_adjacency():
+    board = Board(game_type="9mm")
+    for pos in [(0, 0), (1, 3), (5, 5), (6, 6)]:
+        board.grid[pos[0]][pos[1]] = 1
+    board.grid[0][3] = 2
+    moves = movegenerator.moves(board, 1)
+    assert Move(MOVE, (3, 0), (0, 0)) in moves
+    assert Move(MOVE, (0, 3), (0, 0)) not in moves  # Occupied
+    assert Move(MOVE, (1, 1), (0, 0)) not in moves  # Diagonal only in 12mm
+    assert all(board.is_adjacent(*move.from_pos, *move.to_pos) for move in moves)
+
+def test_12mm_slides_include_diagonals():
+    board = Board(game_type="12mm")
+    board.grid[0][0] = 1
+    assert Move(MOVE, (1, 1), (0, 0)) in movegenerator.moves(board, 1, flying=False)
+
+def test_three_pieces_fly_anywhere():
+    board = Board(game_type="9mm")
+    for pos in [(0, 0), (3, 4), (6, 6)]:
+        board.grid[pos[0]][pos[1]] = 1
+    moves = movegenerator.moves(board, 1)
+    assert len(moves) == 3 * 21
+    assert movegenerator.is_legal_move(board, 1, (0, 0), (4, 3))
+    assert not movegenerator.is_legal_move(board, 1, (0, 3), (4, 3))  # Not the player's piece
+
+def test_removals_spare_mills_unless_all_in_mills():
+    board = Board(game_type="9mm")
+    for pos in [(0, 0), (0, 3), (0, 6), (3, 4)]:
+        board.grid[pos[0]][pos[1]] = 2
+    assert movegenerator.removals(board, 2) == [Move(REMOVE, (3, 4))]
+    board.grid[3][4] = None
+    assert len(movegenerator.removals(board, 2)) == 3
+
+def test_move_to_dict_matches_api_payloads():
+    assert Move(PLACE, (0, 3)).to_dict() == {"action": "place", "x": 0, "y": 3}
+    assert Move(MOVE, (3, 0), (0, 0)).to_dict() == {
+        "action": "move", "from_x": 0, "from_y": 0, "to_x": 3, "to_y": 0
+    }
+
+def test_game_manager_accepts_exactly_the_generated_moves():
+    board = Board(game_type="9mm")
+    game_manager = GameManager(board, Player(1, 4), Player(2, 4), starting_player_id=1, game_type="9mm")
+    for pos in [(0, 0), (1, 1), (0, 3), (1, 3), (6, 0), (5, 1), (6, 6), (5, 5)]:
+        game_manager.place_piece(*pos)
+    assert game_manager.phase == "moving"
+
+    generated = set(game_manager.legal_moves())
+    for x, y in board.board_positions:
+        for to_x, to_y in board.board_positions:
+            candidate = Move(MOVE, (to_x, to_y), (x, y))
+            probe = GameManager.from_dict(game_manager.to_dict())
+            probe.computer_turns_enabled = False
+            assert probe.move_piece(x, y, to_x, to_y)["success"] == (candidate in generated)
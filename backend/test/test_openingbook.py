@@ -0,0 +1,87 @@
+import random
+
+from game_logic.bitboard import get_geometry
+from game_logic.board import Board
+from game_logic.computerplayer import ComputerPlayer
+from game_logic.openingbook import (
+    NO_REMOVAL, OpeningBook, OpeningBookBuilder, book_key, unpack_key, write_opening_book
+)
+from game_logic.player import Player
+from game_logic.recordstats import check_record
+from game_logic.selfplay import parse_agent, play_game
+
+
+def test_symmetric_positions_share_a_key():
+    rng = random.Random(5)
+    geometry = get_geometry("9mm")
+    for _ in range(50):
+        points = rng.sample(range(24), 8)
+        mover = sum(1 << p for p in points[:4])
+        opponent = sum(1 << p for p in points[4:])
+        key, _ = book_key("9mm", mover, opponent, 5, 5)
+        assert unpack_key(key)[0] == "9mm" and unpack_key(key)[3:] == (5, 5)
+        for transform in range(len(geometry.symmetries)):
+            image = geometry.permute(mover, transform), geometry.permute(opponent, transform)
+            assert book_key("9mm", *image, 5, 5)[0] == key
+    assert book_key("9mm", 1, 0, 8, 9)[0] != book_key("12mm", 1, 0, 8, 9)[0]
+
+def test_builds_and_probes_a_book(tmp_path):
+    builder = OpeningBookBuilder()
+    opening = [
+        {"action": "place", "position": "a1", "player": 1},
+        {"action": "place", "position": "d2", "player": 2},
+    ]
+    for reply in ("d1", "d1", "a4"):
+        assert builder.add_record({"moves": opening + [{"action": "place", "position": reply, "player": 1}]})
+    assert not builder.add_record({"moves": [{"action": "place", "position": "a1", "player": 2}] * 2})
+    assert builder.games == 3
+
+    entries = builder.entries(min_games=2)
+    path = str(tmp_path / "openings.book")
+    write_opening_book(path, entries)
+    book = OpeningBook(path)
+    try:
+        assert len(book) == len(entries) == 3
+        geometry = get_geometry("9mm")
+        a1, d1, d2 = (geometry.index[p] for p in [(0, 0), (0, 3), (1, 3)])
+        assert book.probe("9mm", 0, 0, 9, 9) == (a1, None)
+        # Every game is undecided, so the more frequent reply wins
+        assert book.probe("9mm", 1 << a1, 1 << d2, 8, 8) == (d1, None)
+        assert book.probe("9mm", 1 << a1, 0, 8, 9) is None
+        assert book.probe("9mm", 0, 0, 0, 9) is None
+    finally:
+        book.close()
+
+def test_search_picks_book_moves():
+    builder = OpeningBookBuilder()
+    agent = parse_agent("greedy")
+    for seed in range(6):
+        result = play_game("9mm", agent, agent, seed=seed, record=True)
+        assert check_record({"moves": result["moves"]})["valid"]
+        builder.add_record({"moves": result["moves"]})
+    for key, point, capture, games in builder.entries(min_games=6, search_depth=1):
+        _, mover, opponent, mover_hand, _ = unpack_key(key)
+        assert games >= 6 and mover_hand
+        assert not (mover | opponent) >> point & 1
+        assert capture == NO_REMOVAL or opponent >> capture & 1
+
+def test_computer_player_plays_from_the_book(tmp_path):
+    geometry = get_geometry("9mm")
+    a1, d1, g1, b2 = (geometry.index[p] for p in [(0, 0), (0, 3), (0, 6), (1, 1)])
+    mover, opponent = 1 << a1 | 1 << d1, 1 << b2
+    key, transform = book_key("9mm", mover, opponent, 7, 8)
+    perm = geometry.symmetries[transform]
+    path = str(tmp_path / "openings.book")
+    write_opening_book(path, [(key, perm[g1], perm[b2], 1)])
+
+    board = Board("9mm")
+    board.grid[0][0] = board.grid[0][3] = 2
+    board.grid[1][1] = 1
+    opponent_player = Player(1, 8)
+    computer = ComputerPlayer(2, 7, search_depth=6, opening_book_path=path)
+    assert computer.decide_placement(board, opponent_player) == (0, 6)
+    assert computer.planned_removal == (1, 1)
+    assert computer.to_dict()["opening_book_path"] == path
+    board.grid[1][1] = None
+    board.grid[3][0] = 1  # Off the book: falls back to the search
+    assert computer.book_move(board, opponent_player) is None
@@ -0,0 +1,81 @@
+import multiprocessing
+import random
+import threading
+
+import pytest
+from game_logic.board import Board
+from game_logic import parallelsearch
+from game_logic.computerplayer import ComputerPlayer
+from game_logic.gamemanager import GameManager
+from game_logic.parallelsearch import ParallelSearchEngine, shutdown_pools
+from game_logic.player import Player
+from game_logic.replay import new_game
+from game_logic.search import MATE_SCORE, SearchEngine
+
+
+@pytest.fixture(scope="module", autouse=True)
+def worker_pools():
+    yield
+    shutdown_pools()
+
+def random_positions(count, seed):
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        game_manager = new_game("9mm")
+        for _ in range(rng.randrange(4, 40)):
+            options = game_manager.legal_moves()
+            if not options:
+                break
+            move = rng.choice(options).to_dict()
+            move["player"] = game_manager.current_player.player_id
+            game_manager.apply_action(move)
+        if game_manager.waiting_for_removal or game_manager.check_game_over()["game_over"]:
+            continue
+        positions.append((
+            game_manager.board, game_manager.current_player.player_id,
+            game_manager.current_player.pieces, game_manager.get_opponent().pieces
+        ))
+    return positions
+
+def test_matches_the_serial_search():
+    for position in random_positions(5, seed=2):
+        serial = SearchEngine("9mm", max_depth=4).search_board(*position)
+        parallel = ParallelSearchEngine("9mm", max_depth=4, workers=2).search_board(*position)
+        assert (parallel.move, parallel.score, parallel.depth) == (serial.move, serial.score, serial.depth)
+
+def test_ties_with_later_moves_are_not_pruned(monkeypatch):
+    board, player_id, pieces, opponent_pieces = random_positions(1, seed=5)[0]
+    engine = SearchEngine("9mm")
+    bits = engine.geometry.bits_of(board)
+    hand = [0, 0, 0]
+    hand[player_id], hand[3 - player_id] = pieces, opponent_pieces
+    move = engine.generate_moves(bits, hand, player_id)[0]
+    score = engine.search_root_move(bits, hand, player_id, move, 3)
+    bound = multiprocessing.Array("q", 3)
+    monkeypatch.setattr(parallelsearch, "_worker_bound", bound)
+    monkeypatch.setattr(parallelsearch, "_worker_engines", {})
+
+    def search(index, bound_index):
+        bound[:] = [1, score, bound_index]
+        task = (1, 1, "9mm", bits, hand, player_id, index, move, 3, -MATE_SCORE - 1, None)
+        return parallelsearch._search_root_move(task)[0]
+    assert search(2, bound_index=4) == score  # Tied by a later move: this one wins the tie
+    assert search(2, bound_index=1) is None  # Tied by an earlier move, which keeps it
+
+def test_stop_event_ends_the_search():
+    stop = threading.Event()
+    stop.set()
+    engine = ParallelSearchEngine("12mm", max_depth=30, workers=2, stop_event=stop)
+    result = engine.search_board(Board("12mm"), 1, 12, 12)
+    assert result.move is not None and result.depth < 30
+
+def test_computer_player_searches_in_parallel():
+    computer = ComputerPlayer(2, 9, search_depth=3, search_workers=2)
+    board = Board("9mm")
+    board.grid[0][0] = board.grid[0][3] = 2
+    board.grid[1][1] = 1
+    assert computer.decide_placement(board, Player(1, 8)) == (0, 6)  # Closes the top row
+    assert computer.planned_removal == (1, 1)
+    restored = GameManager.deserialize_player(computer.to_dict())
+    assert restored.search_workers == 2
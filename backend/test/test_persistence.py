@@ -0,0 +1,168 @@
+import sqlite3
+
+import pytest
+from game_logic.board import Board
+from game_logic.computerplayer import ComputerPlayer
+from game_logic.gamemanager import GameManager
+from game_logic.persistence import ConcurrentUpdateError, GameRepository, MemoryBackend, SQLiteBackend
+from game_logic.player import Player
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend()
+    return SQLiteBackend(str(tmp_path / "games.sqlite3"))
+
+def new_game(opponent=Player):
+    return GameManager(Board("9mm"), Player(1, 9), opponent(2, 9), "9mm", starting_player_id=1)
+
+def play(game_manager, moves):
+    for x, y in moves:
+        assert game_manager.place_piece(x, y)["success"]
+
+def test_actions_are_logged(backend):
+    repository = GameRepository(backend)
+    game_manager = new_game()
+    repository.create("g1", game_manager)
+    play(game_manager, [(0, 0), (1, 1), (0, 3)])
+    actions = backend.load_actions("g1", 0)
+    assert [seq for seq, _ in actions] == [1, 2, 3]
+    assert actions[0][1] == {"action": "place", "player": 1, "x": 0, "y": 0}
+
+def test_load_rebuilds_game(backend):
+    repository = GameRepository(backend)
+    game_manager = new_game()
+    repository.create("g1", game_manager)
+    play(game_manager, [(0, 0), (1, 1), (0, 3), (1, 3), (0, 6)])
+    assert game_manager.waiting_for_removal
+    game_manager.remove_piece(1, 1)
+
+    restored = GameRepository(backend).load("g1")
+    assert restored.board.grid == game_manager.board.grid
+    assert restored.get_current_player() == game_manager.get_current_player()
+    assert restored.player1.pieces == 6
+    assert restored.phase == game_manager.phase
+    assert restored.waiting_for_removal is False
+
+def test_checkpoint_compacts_log(backend):
+    repository = GameRepository(backend, compact_every=4)
+    game_manager = new_game()
+    repository.create("g1", game_manager)
+    play(game_manager, [(0, 0), (1, 1), (0, 3), (1, 3)])
+    repository.checkpoint(game_manager)
+    assert backend.load_actions("g1", 0) == []
+    assert backend.load_snapshot("g1")[0] == 4
+    play(game_manager, [(3, 0)])
+    restored = GameRepository(backend).load("g1")
+    assert restored.board.grid == game_manager.board.grid
+
+def test_sync_applies_actions_from_another_worker(backend):
+    game_manager = new_game()
+    GameRepository(backend).create("g1", game_manager)
+    play(game_manager, [(0, 0), (1, 1)])
+    other_repository = GameRepository(backend)
+    other = other_repository.load("g1")
+    assert other.board.grid[1][1] == 2
+    play(game_manager, [(2, 2)])
+    other_repository.sync(other)
+    assert other.board.grid[2][2] == 1
+    assert other.get_current_player() == 2
+
+def test_sync_reloads_past_a_compacted_log(backend):
+    first = GameRepository(backend, compact_every=2)
+    game_manager = new_game()
+    first.create("g1", game_manager)
+    second = GameRepository(backend, compact_every=2)
+    other = second.load("g1")
+    play(game_manager, [(0, 0), (1, 1), (0, 3)])
+    first.checkpoint(game_manager)  # Folds the three actions into the snapshot; the log is empty
+    other = second.sync(other)
+    assert other.board.grid == game_manager.board.grid
+    play(game_manager, [(1, 3), (6, 0)])
+    first.checkpoint(game_manager)
+    play(game_manager, [(2, 2)])  # Only this one is left in the log, after a gap
+    other = second.sync(other)
+    assert other.board.grid == game_manager.board.grid
+    assert not other.place_piece(1, 1)["success"]
+    assert other.place_piece(6, 6)["success"] and first.sync(game_manager).board.grid[6][6] == 1
+
+def test_reset_game_is_reloaded_by_other_workers(backend):
+    first = GameRepository(backend)
+    game_manager = new_game()
+    first.create("g1", game_manager)
+    second = GameRepository(backend)
+    other, stale = second.load("g1"), GameRepository(backend).load("g1")
+    play(game_manager, [(0, 0), (1, 1), (0, 3)])
+    other = second.sync(other)
+    reset = new_game()
+    first.create("g1", reset)  # Starts over under the same id
+    play(reset, [(6, 6)])
+    with pytest.raises(ConcurrentUpdateError):
+        stale.place_piece(6, 0)  # Its action 1 belongs to the old game's log
+    other = second.sync(other)
+    assert other.board.grid == reset.board.grid and other.board.grid[0][0] is None
+    assert other.place_piece(1, 1)["success"]
+    assert GameRepository(backend).load("g1").board.grid == other.board.grid
+
+def test_database_without_generations_is_upgraded(tmp_path):
+    path = str(tmp_path / "games.sqlite3")
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute("CREATE TABLE snapshots (game_id TEXT PRIMARY KEY, seq INTEGER NOT NULL, data TEXT NOT NULL)")
+    connection.close()
+    game_manager = new_game()
+    GameRepository(SQLiteBackend(path)).create("g1", game_manager)
+    play(game_manager, [(0, 0)])
+    assert GameRepository(SQLiteBackend(path)).load("g1").board.grid[0][0] == 1
+
+def test_conflicting_append_is_detected(backend):
+    first = GameRepository(backend)
+    game_manager = new_game()
+    first.create("g1", game_manager)
+    stale = GameRepository(backend).load("g1")
+    play(game_manager, [(0, 0)])
+    with pytest.raises(ConcurrentUpdateError):
+        stale.place_piece(6, 6)
+
+def test_computer_moves_are_replayed_not_recomputed(backend):
+    repository = GameRepository(backend)
+    game_manager = new_game(opponent=ComputerPlayer)
+    repository.create("g1", game_manager)
+    for _ in range(3):
+        # The computer replies inside each placement
+        x, y = next((x, y) for x, y in game_manager.board.valid_positions if game_manager.board.grid[x][y] is None)
+        play(game_manager, [(x, y)])
+    restored = GameRepository(backend).load("g1")
+    assert restored.board.grid == game_manager.board.grid
+    assert isinstance(restored.player2, ComputerPlayer)
+
+def test_missing_game_loads_as_none(backend):
+    assert GameRepository(backend).load("nope") is None
+
+def test_undo_is_logged_and_replayed(backend):
+    game_manager = new_game()
+    GameRepository(backend).create("g1", game_manager)
+    play(game_manager, [(0, 0), (1, 1)])
+    other_repository = GameRepository(backend)
+    other = other_repository.load("g1")
+    assert game_manager.undo()
+    other_repository.sync(other)
+    assert other.board.grid[1][1] is None and other.get_current_player() == 2
+    assert other.can_redo and other.version == game_manager.version
+    assert GameRepository(backend).load("g1").board.grid == game_manager.board.grid
+
+def test_replica_keeps_the_redo_stack(backend):
+    game_manager = new_game()
+    GameRepository(backend).create("g1", game_manager)
+    play(game_manager, [(0, 0), (1, 1)])
+    other_repository = GameRepository(backend)
+    other = other_repository.load("g1")
+    assert game_manager.undo() and game_manager.undo()
+    assert game_manager.redo()
+    other_repository.sync(other)
+    assert other.can_redo and list(other.redo_actions) == list(game_manager.redo_actions)
+    assert game_manager.redo() and not game_manager.can_redo
+    other_repository.sync(other)
+    assert not other.can_redo and other.board.grid == game_manager.board.grid
+    assert other.undo()  # The replica can take the redone move back itself
+    assert other.board.grid[1][1] is None and other.can_redo
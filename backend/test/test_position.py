@@ -0,0 +1,83 @@
+import random
+
+import pytest
+from game_logic.bitboard import get_geometry
+from game_logic.board import Board
+from game_logic.position import Position
+from game_logic.replay import new_game
+from game_logic.search import SearchEngine
+
+
+def apply_compound_move(game_manager, move, geometry):
+    """Play a compound move through GameManager as its place/move/remove actions."""
+    src, dst, rem = move
+    player = game_manager.current_player.player_id
+    if src < 0:
+        x, y = geometry.points[dst]
+        action = {"action": "place", "player": player, "x": x, "y": y}
+    else:
+        (from_x, from_y), (to_x, to_y) = geometry.points[src], geometry.points[dst]
+        action = {"action": "move", "player": player, "from_x": from_x, "from_y": from_y, "to_x": to_x, "to_y": to_y}
+    assert game_manager.apply_action(action)["success"]
+    if rem >= 0:
+        assert game_manager.waiting_for_removal
+        assert Position.from_game(game_manager).removing
+        x, y = geometry.points[rem]
+        assert game_manager.apply_action({"action": "remove", "player": player, "x": x, "y": y})["success"]
+
+def test_make_follows_the_game_and_unmake_retraces_it():
+    for game_type in ("9mm", "12mm"):
+        geometry = get_geometry(game_type)
+        rng = random.Random(game_type)
+        for _ in range(10):
+            game_manager = new_game(game_type)
+            position = Position.from_game(game_manager)
+            line = []
+            for _ in range(60):
+                moves = position.legal_moves()
+                if not moves:
+                    break
+                move = rng.choice(moves)
+                apply_compound_move(game_manager, move, geometry)
+                position = position.make(move)
+                line.append(move)
+                played = Position.from_game(game_manager)
+                if game_manager.check_game_over()["game_over"]:
+                    # GameManager keeps the winner to move once the game is over
+                    assert (position.bits, position.hand) == (played.bits, played.hand)
+                    break
+                assert position == played
+            for move in reversed(line):
+                position = position.unmake(move)
+            assert position == Position.from_game(new_game(game_type))
+
+def test_positions_are_hashable_and_immutable():
+    board = Board("9mm")
+    start = Position.from_board(board, 1, 9, 9)
+    first = start.make((-1, 0, -1))
+    again = Position.from_board(board, 1, 9, 9).make((-1, 0, -1))
+    assert first == again and hash(first) == hash(again)
+    assert len({start, first, again}) == 2
+    assert first.key == again.key != start.key
+    with pytest.raises(AttributeError):
+        first.side = 1
+
+def test_pending_capture_offers_only_removals():
+    board = Board("9mm")
+    for x, y in [(0, 0), (0, 3), (0, 6)]:
+        board.grid[x][y] = 1
+    board.grid[1][1] = board.grid[3][0] = 2
+    position = Position.from_board(board, 1, 6, 7, removing=True)
+    moves = position.legal_moves()
+    index = get_geometry("9mm").index
+    assert sorted(moves) == sorted([(-1, -1, index[(1, 1)]), (-1, -1, index[(3, 0)])])
+    after = position.make(moves[0])
+    assert after.side == 2 and not after.removing and after.pieces(2) == 1
+    assert after.unmake(moves[0]) == position
+
+def test_search_accepts_positions():
+    board = Board("9mm")
+    board.grid[0][0] = board.grid[0][3] = 2
+    position = Position.from_board(board, 2, 1, 7, 7)
+    result = SearchEngine("9mm", max_depth=2).search_position(position)
+    assert result.move[1] == get_geometry("9mm").index[(0, 6)]
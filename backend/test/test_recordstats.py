@@ -0,0 +1,147 @@
+import json
+import os
+import random
+
+from game_logic.notation import POINT_NAMES, format_move
+from game_logic.recordstats import RecordStats, check_record, check_records, iter_records, main
+from game_logic.replay import ReplayError, new_game, replay_record
+
+RECORD_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "game_record.json")
+
+
+def random_record(game_type, seed, max_actions=300):
+    """Play random legal actions through GameManager and return the record it produced."""
+    rng = random.Random(seed)
+    game_manager = new_game(game_type)
+    entries = []
+    game_manager.action_listeners.append(lambda gm, action: entries.append(format_move(action)))
+    for _ in range(max_actions):
+        options = game_manager.legal_moves()
+        if not options:
+            break
+        move = rng.choice(options).to_dict()
+        move["player"] = game_manager.current_player.player_id
+        assert game_manager.apply_action(move)["success"]
+    status = game_manager.check_game_over()
+    winner = int(status["winner"][-1]) if status["game_over"] else None
+    return {"moves": entries}, winner
+
+
+def test_bundled_record():
+    with open(RECORD_PATH) as f:
+        summary = check_record(json.load(f))
+    assert summary["valid"]
+    assert summary["winner"] == 2
+    assert summary["first_player"] == 1
+    assert summary["mills"] == 10
+    assert summary["actions"] == summary["plies"] + summary["mills"]
+    assert summary["opening"] == ["a1", "b2"]
+
+def test_agrees_with_game_manager():
+    for game_type in ("9mm", "12mm"):
+        for seed in range(15):
+            record, winner = random_record(game_type, seed)
+            summary = check_record(record, game_type)
+            assert summary["valid"], summary
+            assert summary["winner"] == winner
+            assert summary["actions"] == len(record["moves"])
+
+def test_rejects_what_replay_rejects():
+    rng = random.Random(1)
+    names = list(POINT_NAMES)
+    for seed in range(40):
+        game_type = "12mm" if seed % 2 else "9mm"
+        record, _ = random_record(game_type, seed)
+        index = rng.randrange(len(record["moves"]))
+        entry = dict(record["moves"][index])
+        entry["position" if "position" in entry else rng.choice(["from", "to"])] = rng.choice(names)
+        record["moves"][index] = entry
+        try:
+            replay_record(record, game_type)
+            expected = None
+        except ReplayError as error:
+            expected = error.index
+        summary = check_record(record, game_type)
+        assert summary["valid"] == (expected is None)
+        assert summary.get("index") == expected
+
+def test_reports_illegal_entries():
+    summary = check_record({"moves": [
+        {"action": "place", "position": "a1", "player": 1},
+        {"action": "place", "position": "a1", "player": 2},
+    ]})
+    assert not summary["valid"]
+    assert summary["index"] == 1
+    assert summary["error"] == "illegal place"
+
+    summary = check_record({"moves": [
+        {"action": "place", "position": "a1", "player": 1},
+        {"action": "place", "position": "b2", "player": 1},
+    ]})
+    assert summary["index"] == 1 and "out of turn" in summary["error"]
+
+    summary = check_record({"moves": [{"action": "remove", "position": "a1", "player": 1}]})
+    assert summary["error"] == "removal without a mill"
+    assert check_record({"moves": [{"action": "fly", "player": 1}]})["index"] == 0
+    assert not check_record({"turns": []})["valid"]
+
+def test_mill_must_be_followed_by_a_removal():
+    moves = [
+        {"action": "place", "position": "a1", "player": 1},
+        {"action": "place", "position": "b2", "player": 2},
+        {"action": "place", "position": "d1", "player": 1},
+        {"action": "place", "position": "b4", "player": 2},
+        {"action": "place", "position": "g1", "player": 1},
+    ]
+    summary = check_record({"moves": moves})
+    assert summary["valid"] and summary["mills"] == 0  # Stops before the capture
+
+    skipped = check_record({"moves": moves + [{"action": "place", "position": "c3", "player": 2}]})
+    assert skipped["index"] == 5 and skipped["error"] == "mill closed without a removal"
+
+    captured = check_record({"moves": moves + [{"action": "remove", "position": "b4", "player": 1}]})
+    assert captured["valid"] and captured["mills"] == 1 and captured["plies"] == 5
+
+def test_streams_directories_and_json_lines(tmp_path):
+    records = [random_record("9mm", seed)[0] for seed in range(5)]
+    with open(tmp_path / "games.jsonl", "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+        f.write("\n{not json\n")
+    nested = tmp_path / "nested"
+    nested.mkdir()
+    (nested / "one.json").write_text(json.dumps(records[0]))
+    (nested / "notes.txt").write_text("ignored")
+
+    items = list(iter_records([str(tmp_path)]))
+    assert [source.rsplit(os.sep, 1)[-1] for source, _, _ in items] == [
+        "games.jsonl:1", "games.jsonl:2", "games.jsonl:3", "games.jsonl:4", "games.jsonl:5",
+        "games.jsonl:7", "one.json"
+    ]
+
+    serial = sorted(check_records(items, workers=1), key=lambda item: item[0])
+    parallel = sorted(check_records(items, workers=2), key=lambda item: item[0])
+    assert serial == parallel
+    assert [summary["valid"] for _, summary in serial].count(False) == 1
+
+def test_stats_and_cli(tmp_path, capsys):
+    stats = RecordStats(max_examples=1)
+    for seed in range(4):
+        record, _ = random_record("9mm", seed)
+        stats.add(f"game{seed}", check_record(record))
+    stats.add("bad1", {"valid": False, "error": "illegal move", "index": 3})
+    stats.add("bad2", {"valid": False, "error": "illegal move", "index": 9})
+    report = stats.to_dict()
+    assert report["records"] == 6 and report["valid"] == 4 and report["invalid"] == 2
+    assert report["errors"] == {"illegal move": 2}
+    assert report["examples"] == [{"source": "bad1", "index": 3, "error": "illegal move"}]
+    row = report["by_first_player"][0]
+    assert row["games"] == 4
+    assert row["first_player_win_rate"] + row["second_player_win_rate"] + row["undecided"] / 4 == 1
+    assert sum(opening["games"] for opening in report["top_openings"]) == 4
+
+    errors = tmp_path / "errors.jsonl"
+    assert main([RECORD_PATH, "--workers", "1", "--json", "--errors", str(errors)]) == 0
+    printed = json.loads(capsys.readouterr().out)
+    assert printed["valid"] == 1 and printed["mills_per_game"] == 10
+    assert errors.read_text() == ""
@@ -0,0 +1,81 @@
+import json
+import os
+
+import pytest
+
+from game_logic.notation import NotationError, format_move, format_point, parse_move, parse_point
+from game_logic.replay import ReplayCache, ReplayError, ReplayIndex, replay_key, replay_record
+
+RECORD_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "game_record.json")
+
+
+def test_points_match_the_client_layout():
+    assert parse_point("a1") == (0, 0)
+    assert parse_point("d1") == (0, 3)
+    assert parse_point("a4") == (3, 0)
+    assert parse_point("G7") == (6, 6)
+    assert format_point((4, 2)) == "c5"
+    with pytest.raises(NotationError):
+        parse_point("d4")  # The centre is not a point
+
+def test_moves_round_trip():
+    entry = {"action": "move", "from": "d1", "to": "d2", "player": 2}
+    action = parse_move(entry)
+    assert action == {"action": "move", "player": 2, "from_x": 0, "from_y": 3, "to_x": 1, "to_y": 3}
+    assert format_move(action) == entry
+    with pytest.raises(NotationError):
+        parse_move({"action": "fly", "position": "a1", "player": 1})
+
+def test_replays_the_bundled_record():
+    with open(RECORD_PATH) as f:
+        record = json.load(f)
+    game_manager, snapshot = replay_record(record, snapshot_at=3)
+    assert game_manager.check_game_over()["game_over"]
+    assert snapshot["board"]["grid"][0][0] == 1  # a1, the first placement
+    assert snapshot["current_player"] == 2
+
+def test_illegal_move_reports_its_index():
+    record = {"moves": [
+        {"action": "place", "position": "a1", "player": 1},
+        {"action": "place", "position": "a1", "player": 2},
+    ]}
+    with pytest.raises(ReplayError) as error:
+        replay_record(record)
+    assert error.value.index == 1
+
+def test_out_of_turn_move_is_rejected():
+    record = [
+        {"action": "place", "position": "a1", "player": 1},
+        {"action": "place", "position": "d1", "player": 1},
+    ]
+    with pytest.raises(ReplayError):
+        replay_record(record)
+
+def test_index_seeks_to_every_ply():
+    with open(RECORD_PATH) as f:
+        record = json.load(f)
+    for interval in (16, 5):
+        index = ReplayIndex(record, interval=interval)
+        assert index.plies == len(record["moves"])
+        for ply in range(index.plies + 1):
+            assert index.state_at(ply) == replay_record(record, snapshot_at=ply)[1], (interval, ply)
+    assert index.game_at(index.plies).check_game_over()["game_over"]
+    with pytest.raises(ValueError):
+        index.state_at(index.plies + 1)
+
+def test_index_validates_the_record():
+    with pytest.raises(ReplayError) as error:
+        ReplayIndex([{"action": "place", "position": "a1", "player": 1},
+                     {"action": "place", "position": "a1", "player": 2}])
+    assert error.value.index == 1
+
+def test_cache_indexes_each_record_once():
+    record = {"moves": [{"action": "place", "position": "a1", "player": 1}]}
+    other = {"moves": [{"action": "place", "position": "d1", "player": 1}]}
+    cache = ReplayCache(max_replays=1)
+    index = cache.index(record)
+    assert index.replay_id == replay_key(record) != replay_key(record, "12mm")
+    assert cache.index(dict(record)) is index
+    assert cache.get(index.replay_id) is index
+    cache.index(other)
+    assert len(cache) == 1 and cache.get(index.replay_id) is None
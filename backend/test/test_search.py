@@ -0,0 +1,118 @@
+import threading
+import time
+
+import pytest
+from game_logic.board import Board
+from game_logic.search import MATE_SCORE, SearchEngine
+from game_logic.transposition import TranspositionTable
+
+def positions(engine, result):
+    return engine.move_to_positions(result.move)
+
+@pytest.fixture
+def engine():
+    return SearchEngine("9mm", max_depth=3)
+
+def test_placement_closes_mill_and_removes(engine):
+    board = Board(game_type="9mm")
+    board.grid[0][0] = 2
+    board.grid[0][3] = 2
+    board.grid[6][6] = 1
+    result = engine.search_board(board, 2, 7, 8)
+    assert positions(engine, result) == (None, (0, 6), (6, 6))
+
+def test_placement_blocks_opponent_mill(engine):
+    board = Board(game_type="9mm")
+    board.grid[0][0] = 1
+    board.grid[0][3] = 1
+    board.grid[6][6] = 2
+    result = engine.search_board(board, 2, 8, 7)
+    assert positions(engine, result)[1] == (0, 6)
+
+def test_moves_respect_adjacency(engine):
+    bits = [0, 0, 0]
+    geometry = engine.geometry
+    bits[1] = geometry.mask_of([(0, 0), (0, 3), (1, 1), (1, 5)])
+    bits[2] = geometry.mask_of([(6, 0), (6, 3), (6, 6), (5, 3)])
+    moves = engine.generate_moves(bits, [0, 0, 0], 1)
+    assert all(geometry.adjacent[src] >> dst & 1 for src, dst, _ in moves)
+    # Sliding (0, 3) down to (1, 3) closes a mill; only the piece outside the bottom mill may go
+    slide = (geometry.index[(0, 3)], geometry.index[(1, 3)])
+    assert {rem for src, dst, rem in moves if (src, dst) == slide} == {geometry.index[(5, 3)]}
+
+def test_flying_with_three_pieces(engine):
+    geometry = engine.geometry
+    bits = [0, geometry.mask_of([(0, 0), (3, 6), (6, 3)]), geometry.mask_of([(1, 1), (2, 2), (5, 5), (4, 3)])]
+    moves = engine.generate_moves(bits, [0, 0, 0], 1)
+    assert len({move[1] for move in moves}) == 17  # Every empty point is reachable
+
+def test_removal_skips_pieces_in_mills(engine):
+    geometry = engine.geometry
+    bits = [0, geometry.mask_of([(0, 0), (0, 3)]), geometry.mask_of([(6, 0), (6, 3), (6, 6), (3, 4)])]
+    captures = {move[2] for move in engine.generate_moves(bits, [0, 5, 5], 1) if move[2] >= 0}
+    assert captures == {geometry.index[(3, 4)]}
+
+def test_finds_forced_win(engine):
+    geometry = engine.geometry
+    # Player 1 can fly into a mill and reduce player 2 to two pieces
+    bits = [0, geometry.mask_of([(0, 0), (0, 3), (5, 5)]), geometry.mask_of([(1, 1), (2, 2), (4, 3)])]
+    result = engine.search(bits, [0, 0, 0], 1)
+    assert result.score >= MATE_SCORE - 3
+    assert engine.move_to_positions(result.move)[1] == (0, 6)
+
+def test_no_moves_is_a_loss(engine):
+    geometry = engine.geometry
+    bits = [0, geometry.mask_of([(0, 0), (0, 6), (6, 0), (6, 6)]),
+            geometry.mask_of([(0, 3), (3, 0), (3, 6), (6, 3), (1, 1)])]
+    result = engine.search(bits, [0, 0, 0], 1)
+    assert result.move is None
+    assert result.score == -MATE_SCORE
+
+def test_time_budget_is_respected():
+    board = Board(game_type="12mm")
+    engine = SearchEngine("12mm", max_depth=30, time_budget=0.1)
+    start = time.perf_counter()
+    result = engine.search_board(board, 1, 12, 12)
+    assert time.perf_counter() - start < 1.0
+    assert result.move is not None
+    assert 1 <= result.depth < 30
+
+def test_stop_event_ends_the_search():
+    stop = threading.Event()
+    engine = SearchEngine("12mm", max_depth=30, stop_event=stop)
+    threading.Timer(0.1, stop.set).start()
+    start = time.perf_counter()
+    result = engine.search_board(Board(game_type="12mm"), 1, 12, 12)
+    assert time.perf_counter() - start < 1.0
+    assert result.move is not None and result.depth < 30
+
+def test_search_does_not_change_board(engine):
+    board = Board(game_type="9mm")
+    board.grid[0][0] = 2
+    board.grid[3][6] = 1
+    before = [row[:] for row in board.grid]
+    engine.search_board(board, 2, 8, 8)
+    assert board.grid == before
+
+def test_early_positions_share_table_entries_with_their_mirror_images():
+    symmetric = SearchEngine("9mm", max_depth=4, transposition_table=TranspositionTable(8))
+    plain = SearchEngine("9mm", max_depth=4, transposition_table=TranspositionTable(8))
+    plain._symmetric_hand = 99  # Never canonicalize
+    first = symmetric.search([0, 0, 0], [0, 9, 9], 1)
+    second = plain.search([0, 0, 0], [0, 9, 9], 1)
+    assert first.score == second.score
+    assert first.nodes < second.nodes
+
+    # A mirrored position finds the stored entry and gets the mirrored best move
+    geometry = symmetric.geometry
+    bits = [0, geometry.mask_of([(0, 0)]), geometry.mask_of([(1, 3)])]
+    result = symmetric.search(list(bits), [0, 8, 8], 1)
+    mirror = geometry.symmetries.index(tuple(
+        geometry.index[(y, x)] for x, y in geometry.points
+    ))
+    mirrored = [0, geometry.permute(bits[1], mirror), geometry.permute(bits[2], mirror)]
+    table = symmetric.transposition_table
+    hits = table.hits
+    mirrored_result = symmetric.search(mirrored, [0, 8, 8], 1)
+    assert table.hits > hits
+    assert mirrored_result.score == result.score
@@ -0,0 +1,45 @@
+import pytest
+
+from game_logic.selfplay import parse_agent, play_game, run_match, wilson_interval
+
+GREEDY = parse_agent("greedy")
+
+
+def test_parse_agent():
+    assert parse_agent("search:3:0.25") == {"name": "search:3:0.25", "search_depth": 3, "time_budget": 0.25}
+    assert GREEDY["search_depth"] == 0
+    with pytest.raises(ValueError):
+        parse_agent("minimax")
+
+def test_wilson_interval():
+    low, high = wilson_interval(50, 100)
+    assert low == pytest.approx(0.4038, abs=1e-3)
+    assert high == pytest.approx(0.5962, abs=1e-3)
+    assert wilson_interval(0, 10)[0] == 0.0
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+
+@pytest.mark.parametrize("game_type", ["9mm", "12mm"])
+def test_play_game_finishes(game_type):
+    result = play_game(game_type, GREEDY, GREEDY, seed=1)
+    assert result["winner"] in (1, 2, None)
+    assert result["plies"] > 0
+    assert len(result["move_times"][1]) + len(result["move_times"][2]) == result["plies"]
+
+def test_play_game_is_reproducible():
+    first = play_game("9mm", GREEDY, GREEDY, seed=5)
+    second = play_game("9mm", GREEDY, GREEDY, seed=5)
+    assert (first["winner"], first["plies"], first["reason"]) == (second["winner"], second["plies"], second["reason"])
+
+def test_run_match_swaps_colours_and_summarizes():
+    search = parse_agent("search:1")
+    records, summary = run_match("9mm", search, GREEDY, games=4, workers=1, seed=2)
+    assert [record["player1"] for record in records] == ["search:1", "greedy", "search:1", "greedy"]
+    assert summary["games"] == 4
+    wins = sum(agent["wins"] for agent in summary["agents"])
+    assert wins + summary["draws"] == 4
+    assert summary["agents"][0]["moves"] > 0
+
+def test_run_match_in_worker_processes():
+    records, summary = run_match("9mm", GREEDY, GREEDY, games=4, workers=2, seed=3)
+    assert sorted(record["game"] for record in records) == [0, 1, 2, 3]
+    assert summary["games_per_second"] > 0
@@ -0,0 +1,75 @@
+import threading
+
+from game_logic.sessionstore import GameSessionStore
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_create_and_get():
+    store = GameSessionStore()
+    session = store.create("game")
+    assert store.get(session.game_id) is session
+    assert session.game_manager == "game"
+    assert store.get("missing") is None
+
+def test_sessions_have_unique_ids_and_locks():
+    store = GameSessionStore()
+    first = store.create("first")
+    second = store.create("second")
+    assert first.game_id != second.game_id
+    assert isinstance(first.lock, type(threading.Lock()))
+    assert first.lock is not second.lock
+
+def test_idle_games_expire():
+    clock = FakeClock()
+    store = GameSessionStore(idle_ttl=60, clock=clock)
+    stale = store.create("stale")
+    clock.now = 50
+    fresh = store.create("fresh")
+    clock.now = 70
+    assert store.get(stale.game_id) is None
+    assert store.get(fresh.game_id) is fresh
+    assert len(store) == 1
+
+def test_access_keeps_game_alive():
+    clock = FakeClock()
+    store = GameSessionStore(idle_ttl=60, clock=clock)
+    session = store.create("game")
+    for now in (40, 80, 120):
+        clock.now = now
+        assert store.get(session.game_id) is session
+
+def test_least_recently_used_game_is_evicted():
+    store = GameSessionStore(max_games=2)
+    first = store.create("first")
+    second = store.create("second")
+    store.get(first.game_id)  # Second is now the least recently used
+    third = store.create("third")
+    assert first.game_id in store
+    assert second.game_id not in store
+    assert third.game_id in store
+
+def test_evicted_games_are_reported():
+    clock = FakeClock()
+    evicted = []
+    store = GameSessionStore(max_games=2, idle_ttl=60, clock=clock, on_evict=evicted.append)
+    first = store.create("first")
+    second = store.create("second")
+    third = store.create("third")
+    assert evicted == [first.game_id]
+    clock.now = 70
+    store.evict_expired()
+    assert evicted == [first.game_id, second.game_id, third.game_id]
+    store.create("fourth")
+    assert store.remove(store.create("fifth").game_id) is True
+    assert len(evicted) == 3
+
+def test_remove():
+    store = GameSessionStore()
+    session = store.create("game")
+    assert store.remove(session.game_id) is True
+    assert store.remove(session.game_id) is False
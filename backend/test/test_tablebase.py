@@ -0,0 +1,155 @@
+from itertools import combinations
+
+import pytest
+
+from game_logic.bitboard import get_geometry
+from game_logic.search import MATE_SCORE, SearchEngine
+from game_logic.tablebase import (
+    MIN_PIECES, Tablebase, TablebaseGenerator, class_size, decode_value, position_index, rank_mask,
+    write_tablebase
+)
+
+
+class ThreeByThree:
+    """Tiny 3x3 board (rows and columns are mills) so whole classes solve in a test."""
+
+    game_type = "3x3"
+
+    def __init__(self):
+        self.points = [(x, y) for x in range(3) for y in range(3)]
+        self.index = {point: i for i, point in enumerate(self.points)}
+        self.full_mask = (1 << 9) - 1
+        self.adjacent = tuple(
+            sum(1 << self.index[(x + dx, y + dy)]
+                for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                if (x + dx, y + dy) in self.index)
+            for x, y in self.points
+        )
+        rows = [sum(1 << (3 * x + y) for y in range(3)) for x in range(3)]
+        columns = [sum(1 << (3 * x + y) for x in range(3)) for y in range(3)]
+        self.mills = tuple(rows + columns)
+        self.mills_at = tuple(tuple(mill for mill in self.mills if mill >> i & 1) for i in range(9))
+
+
+@pytest.fixture(scope="module")
+def solved():
+    geometry = ThreeByThree()
+    generator = TablebaseGenerator(geometry)
+    generator.build(4)
+    return generator
+
+
+def expected_value(generator, cls, mover, opponent):
+    """Value implied by the children of a position, using the solved tables."""
+    geometry = generator.geometry
+    a, b = cls
+    empty = geometry.full_mask & ~(mover | opponent)
+    child_distances = []
+    has_draw = False
+    for src in range(9):
+        if not mover >> src & 1:
+            continue
+        targets = empty if a == MIN_PIECES else geometry.adjacent[src] & empty
+        for dst in range(9):
+            if not targets >> dst & 1:
+                continue
+            after = mover & ~(1 << src) | 1 << dst
+            if generator._closes_mill(after, dst):
+                if b - 1 < MIN_PIECES:
+                    child_distances.append(0)
+                    continue
+                removable = generator._removable(opponent)
+                children = [((b - 1, a), opponent & ~(1 << rem), after) for rem in range(9) if removable >> rem & 1]
+            else:
+                children = [((b, a), opponent, after)]
+            for child_cls, child_mover, child_opponent in children:
+                value = generator.tables[child_cls][position_index(9, child_mover, child_opponent, a)]
+                if value:
+                    child_distances.append(value - 1)
+                else:
+                    has_draw = True
+    losses = [d for d in child_distances if d % 2 == 0]
+    if losses:
+        return min(losses) + 2
+    if has_draw:
+        return 0
+    if not child_distances:
+        return 1
+    return max(child_distances) + 2
+
+
+def test_rank_mask_is_dense():
+    ranks = sorted(rank_mask(sum(1 << p for p in combo))
+                   for combo in combinations(range(6), 3))
+    assert ranks == list(range(20))
+
+
+def test_decode_value():
+    assert decode_value(0) == ("draw", None)
+    assert decode_value(1) == ("loss", 0)
+    assert decode_value(2) == ("win", 1)
+
+
+@pytest.mark.parametrize("cls", [(3, 3), (3, 4), (4, 3)])
+def test_every_position_agrees_with_its_children(solved, cls):
+    a, b = cls
+    assert len(solved.tables[cls]) == class_size(9, a, b)
+    for mover, opponent in solved._positions(a, b):
+        value = solved.tables[cls][position_index(9, mover, opponent, b)]
+        assert value == expected_value(solved, cls, mover, opponent)
+
+
+def test_open_row_is_a_win_in_one(solved):
+    # Mover holds two of the top row with its third point free; flying closes it
+    mover = 0b000000011 | 1 << 8
+    opponent = 1 << 3 | 1 << 4 | 1 << 6
+    assert solved.tables[(3, 3)][position_index(9, mover, opponent, 3)] == 2
+
+
+def test_file_round_trip(tmp_path):
+    geometry = get_geometry("9mm")
+    size = class_size(24, 3, 3)
+    table = bytearray(size)
+    mover = geometry.mask_of([(0, 0), (0, 3), (3, 1)])
+    opponent = geometry.mask_of([(6, 0), (6, 3), (3, 5)])
+    table[position_index(24, mover, opponent, 3)] = 6
+    path = tmp_path / "endgames.tb"
+    write_tablebase(path, {("9mm", 3, 3): bytes(table)})
+
+    tablebase = Tablebase(path)
+    try:
+        assert tablebase.classes("9mm") == [(3, 3)]
+        assert tablebase.covers("9mm", 3, 3)
+        assert not tablebase.covers("12mm", 3, 3)
+        assert tablebase.lookup("9mm", mover, opponent) == 6
+        assert tablebase.probe("9mm", mover, opponent) == ("win", 5)
+        assert tablebase.probe("9mm", opponent, mover) == ("draw", None)
+        assert tablebase.lookup("9mm", mover | 1 << 23, opponent) is None  # 4v3 not stored
+    finally:
+        tablebase.close()
+
+
+class FixedTablebase:
+    """Reports every covered position as a draw except one win for the mover."""
+
+    def __init__(self, winning):
+        self.winning = winning
+
+    def lookup(self, game_type, mover, opponent):
+        if bin(mover).count("1") != 3 or bin(opponent).count("1") != 3:
+            return None
+        return 6 if (mover, opponent) == self.winning else 0
+
+
+def test_search_uses_tablebase_scores():
+    geometry = get_geometry("9mm")
+    mover = geometry.mask_of([(0, 0), (0, 3), (3, 1)])
+    opponent = geometry.mask_of([(6, 0), (6, 3), (3, 5)])
+    engine = SearchEngine("9mm", max_depth=4, tablebase=FixedTablebase((opponent, mover)))
+    bits = [0, mover, opponent]
+    # Player 2 to move in a position the tablebase says it wins in 5 plies
+    result = engine.search(bits, [0, 0, 0], 2)
+    assert result.depth == 1  # A covered root needs only one ply
+    assert engine._tablebase_score(bits, [0, 0, 0], 2, 0) == MATE_SCORE - 5
+    assert engine._tablebase_score(bits, [0, 0, 0], 1, 0) == 0
+    assert engine._tablebase_score(bits, [0, 1, 0], 2, 0) is None  # Pieces in hand are not covered
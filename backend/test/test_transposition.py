@@ -0,0 +1,76 @@
+from game_logic.bitboard import BitBoard, position_key, zobrist_key
+from game_logic.search import SearchEngine
+from game_logic.transposition import EXACT, LOWER_BOUND, TranspositionTable
+
+def test_table_size_is_bounded():
+    table = TranspositionTable(max_memory_mb=1)
+    assert table.buckets & (table.buckets - 1) == 0  # Power of two
+    for key in range(100000):
+        table.store(key, 1, 0, EXACT, None)
+    assert len(table) <= 2 * table.buckets
+
+def test_probe_returns_stored_entry():
+    table = TranspositionTable(max_memory_mb=1)
+    table.store(12345, 3, 42, LOWER_BOUND, (-1, 0, -1))
+    assert table.probe(12345)[1:5] == (3, 42, LOWER_BOUND, (-1, 0, -1))
+    assert table.probe(54321) is None
+
+def test_depth_preferred_slot_keeps_deepest_entry():
+    table = TranspositionTable(max_memory_mb=1)
+    first = 5
+    second = first + table.buckets  # Same bucket, different key
+    third = first + 2 * table.buckets
+    table.store(first, 6, 1, EXACT, None)
+    table.store(second, 2, 2, EXACT, None)
+    table.store(third, 1, 3, EXACT, None)
+    assert table.probe(first) is not None  # Deep entry survives
+    assert table.probe(second) is None  # Always-replace slot was overwritten
+    assert table.probe(third) is not None
+
+def test_old_entries_are_replaced_by_new_search():
+    table = TranspositionTable(max_memory_mb=1)
+    table.store(7, 8, 1, EXACT, None)
+    table.new_search()
+    table.store(7 + table.buckets, 1, 2, EXACT, None)
+    assert table.probe(7 + table.buckets)[1] == 1
+    assert table.probe(7) is None  # The stale deep entry gave way
+
+def test_bitboard_key_is_incremental():
+    board = BitBoard(game_type="9mm")
+    board.grid[0][0] = 1
+    board.grid[3][4] = 2
+    board.move(board.geometry.index[(0, 0)], board.geometry.index[(0, 3)])
+    board.grid[3][4] = None
+    assert board.zobrist_key == zobrist_key(board.bits)
+    assert board.zobrist_key != 0
+
+def test_transposed_positions_share_a_key():
+    first = BitBoard(game_type="9mm")
+    first.grid[0][0] = 1
+    first.grid[6][6] = 2
+    second = BitBoard(game_type="9mm")
+    second.grid[6][6] = 2
+    second.grid[0][0] = 1
+    assert first.zobrist_key == second.zobrist_key
+    assert position_key(first.bits, [0, 8, 8], 1) != position_key(first.bits, [0, 8, 8], 2)
+
+def test_search_with_table_matches_plain_search():
+    board = BitBoard(game_type="9mm")
+    for pos, owner in [((0, 0), 1), ((0, 3), 1), ((1, 1), 2), ((3, 4), 2), ((5, 3), 1)]:
+        board.grid[pos[0]][pos[1]] = owner
+    plain = SearchEngine("9mm", max_depth=3).search_board(board, 2, 7, 6)
+    table = TranspositionTable(max_memory_mb=4)
+    cached = SearchEngine("9mm", max_depth=3, transposition_table=table).search_board(board, 2, 7, 6)
+    assert cached.score == plain.score
+    assert cached.nodes <= plain.nodes
+
+def test_table_is_reused_across_searches():
+    board = BitBoard(game_type="9mm")
+    board.grid[0][0] = 1
+    board.grid[3][6] = 2
+    table = TranspositionTable(max_memory_mb=4)
+    engine = SearchEngine("9mm", max_depth=3, transposition_table=table)
+    first = engine.search_board(board, 1, 8, 8)
+    second = engine.search_board(board, 1, 8, 8)
+    assert second.nodes < first.nodes
+    assert table.hits > 0
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from game_logic.evaluation import FEATURES, PHASES, EvaluationWeights
+from game_logic.selfplay import parse_agent
+from game_logic.tuning import collect_positions, fit_phase, log_loss, main, tune
+
+
+def test_fit_phase_learns_a_predictive_feature():
+    rng = np.random.default_rng(0)
+    features = np.zeros((4000, len(FEATURES)))
+    features[:, 0] = rng.integers(-3, 4, size=4000)
+    # The side ahead in material wins with probability sigmoid(material)
+    results = (rng.random(4000) < 1 / (1 + np.exp(-features[:, 0]))).astype(float)
+    start = np.zeros(len(FEATURES))
+    weights = fit_phase(features, results, start, iterations=2000)
+    assert 70 < weights[0] < 130
+    assert (weights[1:] == 0).all()
+    assert log_loss(features, results, weights) < log_loss(features, results, start)
+
+
+def test_collect_positions_labels_every_position():
+    own, opp, own_hand, opp_hand, results = collect_positions("9mm", parse_agent("greedy"), 4, workers=1)
+    assert len(own) == len(opp) == len(own_hand) == len(opp_hand) == len(results) > 4 * 18
+    assert set(results.tolist()) <= {0.0, 0.5, 1.0}
+    assert not (own & opp).any()
+
+
+def test_tune_reduces_the_loss_of_every_fitted_phase():
+    data = collect_positions("9mm", parse_agent("greedy"), 20, workers=1)
+    weights, report = tune("9mm", *data)
+    assert isinstance(weights, EvaluationWeights)
+    fitted = [phase for phase in PHASES if "loss_after" in report[phase]]
+    assert "placing" in fitted
+    for phase in fitted:
+        assert report[phase]["loss_after"] <= report[phase]["loss_before"]
+    for phase in set(PHASES) - set(fitted):
+        assert weights.vector(phase) == EvaluationWeights().vector(phase)
+
+
+def test_main_writes_a_weights_file(tmp_path, capsys):
+    output = tmp_path / "weights.json"
+    assert main(["--games", "6", "--workers", "1", "--output", str(output)]) == 0
+    assert set(json.loads(output.read_text())) == set(PHASES)
+    assert "placing" in capsys.readouterr().out
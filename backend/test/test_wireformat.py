@@ -0,0 +1,44 @@
+from game_logic.replay import game_state, new_game
+from game_logic.wireformat import (
+    BoardVersions, apply_changes, compact_board, compact_state, diff_points, encode_points
+)
+
+
+def test_points_follow_the_board_positions():
+    game_manager = new_game("12mm")
+    game_manager.place_piece(0, 0)
+    game_manager.place_piece(6, 6)
+    assert encode_points(game_manager.board) == "1" + "." * 22 + "2"
+
+
+def test_changes_round_trip():
+    old, new = "1" + "." * 23, "." + "2" + "." * 21 + "1"
+    changes = diff_points(old, new)
+    assert changes == [[0, "."], [1, "2"], [23, "1"]]
+    assert apply_changes(old, changes) == new
+
+
+def test_compact_board_and_state():
+    game_manager = new_game("9mm")
+    game_manager.place_piece(0, 0)
+    board = compact_board(game_manager)
+    assert board == {"version": 1, "player1_pieces": 8, "player2_pieces": 9, "current_turn": 2,
+                     "points": "1" + "." * 23}
+    state = compact_state(game_state(game_manager))
+    assert state["board"] == board and state["current_player"] == 2
+
+
+def test_board_versions_diff_against_remembered_versions():
+    versions = BoardVersions(history=2, max_games=2)
+    game_manager = new_game("9mm")
+    assert versions.board("a", game_manager)["points"] == "." * 24
+    game_manager.place_piece(0, 0)
+    assert versions.board("a", game_manager, since=0)["changes"] == [[0, "1"]]
+    game_manager.place_piece(0, 3)
+    game_manager.place_piece(0, 6)
+    # Version 0 has dropped out of the history
+    assert "points" in versions.board("a", game_manager, since=0)
+    assert versions.board("a", game_manager, since=1)["changes"] == [[1, "2"], [2, "1"]]
+    versions.record("b", 0, "." * 24)
+    versions.record("c", 0, "." * 24)
+    assert versions.points_at("a", 3) is None  # The least recently updated game was dropped
@@ -1,6 +1,9 @@
-import React, { useState, useEffect, useCallback } from "react";
+import React, { useState, useEffect, useCallback, useRef } from "react";
 import "./Board.css";
 
+// Delay between moves during auto-replay
+const REPLAY_STEP_MS = 250;
+
 const Board = ({ gameOptions, gameRecord = null, updateGameRecord }) => {
   console.log("Board rendering, gameRecord:", gameRecord);
 
@@ -46,12 +49,14 @@ const Board = ({ gameOptions, gameRecord = null, updateGameRecord }) => {
   const [currentPlayer, setCurrentPlayer] = useState(null);
   const [phase, setPhase] = useState("placing");
   const [selectedPiece, setSelectedPiece] = useState(null);
+  const [legalTargets, setLegalTargets] = useState([]); // Points the selected piece can move to
   const [millFormed, setMillFormed] = useState(false);
   const [notification, setNotification] = useState(null); // New state for notifications
   const [gameOver, setGameOver] = useState(false);
   const [gameOverMessage, setGameOverMessage] = useState("");
   const [currentMoveIndex, setCurrentMoveIndex] = useState(0);
   const [recordedMoves, setRecordedMoves] = useState([]); // For recording a new game
+  const [undoneMoves, setUndoneMoves] = useState([]); // Moves taken back with Undo, for Redo to record again
 
   const mapBoardStateToPositions = useCallback((board) => {
     const newPieces = {};
@@ -87,6 +92,82 @@ const Board = ({ gameOptions, gameRecord = null, updateGameRecord }) => {
           showNotification(data.message, "success");
       }
   }, [mapBoardStateToPositions, setPieces, setPlayer1Pieces, setPlayer2Pieces, setCurrentPlayer, setPhase, setGameOver, setGameOverMessage, showNotification]);
+
+  // The game's WebSocket channel while it is open: actions are sent on it and their replies
+  // matched up by id; otherwise actions go to the POST routes
+  const channel = useRef(null);
+  const pendingReplies = useRef({});
+  const nextMessageId = useRef(1);
+
+  // The computer's replies arrive on the game's WebSocket, or on its event stream where the
+  // server cannot open one, not in the move responses
+  useEffect(() => {
+    if (!gameOptions?.gameId || gameRecord) {
+      return;
+    }
+    const query = new URLSearchParams({ game_id: gameOptions.gameId });
+    const scheme = window.location.protocol === "https:" ? "wss" : "ws";
+    let events = null;
+    let socket = null;
+    const followEventStream = () => {
+      events = new EventSource(`/api/events?${query}`);
+      events.addEventListener("state", (event) => updateBoardState(JSON.parse(event.data)));
+    };
+    if (typeof WebSocket === "undefined") {
+      followEventStream();
+    } else {
+      socket = new WebSocket(`${scheme}://${window.location.host}/api/ws?${query}`);
+      socket.onopen = () => { channel.current = socket; };
+      socket.onmessage = (message) => {
+        const data = JSON.parse(message.data);
+        if (data.type === "event" && data.event === "state") {
+          updateBoardState(data.data);
+        } else if (data.type === "result" && pendingReplies.current[data.id]) {
+          pendingReplies.current[data.id](data.data);
+          delete pendingReplies.current[data.id];
+        }
+      };
+      socket.onclose = () => {
+        if (channel.current === socket) {
+          channel.current = null;
+        }
+        Object.values(pendingReplies.current).forEach((resolve) =>
+          resolve({ success: false, message: "Lost the connection to the game" }));
+        pendingReplies.current = {};
+        if (socket) {
+          // Not closed by us: the server does not speak WebSocket (e.g. the Flask server) or went away
+          followEventStream();
+        }
+      };
+    }
+    return () => {
+      const closing = socket;
+      socket = null;
+      if (closing) {
+        closing.close();
+      }
+      if (events) {
+        events.close();
+      }
+    };
+  }, [gameOptions, gameRecord, updateBoardState]);
+
+  // Send an action (place, move, remove or reset) and resolve with the server's response
+  const sendAction = (type, body) => {
+    const socket = channel.current;
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      const id = nextMessageId.current++;
+      return new Promise((resolve) => {
+        pendingReplies.current[id] = resolve;
+        socket.send(JSON.stringify({ ...body, type, id }));
+      });
+    }
+    return fetch(`/api/${type}`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ game_id: gameOptions.gameId, ...body })
+    }).then((res) => res.json());
+  };
   
   useEffect(() => {
     if (!gameOptions) {
@@ -104,63 +185,73 @@ const Board = ({ gameOptions, gameRecord = null, updateGameRecord }) => {
       setRecordedMoves([]);
     }
 
-    // Check if auto-replay is enabled and a valid gameRecord is available
-    if (gameOptions.autoReplay && gameRecord && Array.isArray(gameRecord)) {
-      console.log("Auto replay enabled. Starting automatic replay...");
+  }, [gameOptions, gameRecord]);
 
-      const replayInterval = setInterval(() => {
-        if (currentMoveIndex < gameRecord.length) {
-          applyMove(gameRecord[currentMoveIndex]);
-          setCurrentMoveIndex((prevIndex) => prevIndex + 1);
+  // Replays are validated once by the server, which then serves the board after any move
+  const [replayId, setReplayId] = useState(null);
+
+  useEffect(() => {
+    if (!gameRecord || !Array.isArray(gameRecord)) {
+      return;
+    }
+    setReplayId(null);
+    setCurrentMoveIndex(0);
+    fetch('/api/replay', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ moves: gameRecord, game_type: gameOptions.gameType })
+    })
+      .then((res) => res.json())
+      .then((data) => {
+        if (data.success) {
+          setReplayId(data.replay_id);
         } else {
-          console.log("Replay complete.");
-          clearInterval(replayInterval);
+          showNotification(data.message, "error");
         }
-      }, 1000); // Adjust delay (e.g., 1000ms) as needed for replay speed
+      })
+      .catch((error) => console.error("Error loading the replay:", error));
+  }, [gameRecord, gameOptions, showNotification]);
 
-      // Cleanup function to clear the interval if the component unmounts or replay ends
-      return () => clearInterval(replayInterval);
+  const showReplayMove = useCallback((ply) => {
+    if (!replayId) {
+      return;
     }
-  }, [gameOptions, gameRecord, currentMoveIndex]);
-
-  const applyMove = (move) => {
-    const { action, position, from, to, player } = move;
-
-    setPieces((prevPieces) => {
-      const updatedPieces = { ...prevPieces };
-      if (action === "place") {
-        updatedPieces[position] = player;
-      } else if (action === "move") {
-        updatedPieces[from] = null;
-        updatedPieces[to] = player;
-      } else if (action === "remove") {
-        updatedPieces[position] = null;
-      }
-      return updatedPieces;
-    });
-  };
+    fetch(`/api/replay/${replayId}?${new URLSearchParams({ ply })}`)
+      .then((res) => res.json())
+      .then((data) => {
+        if (data.success) {
+          setPieces(mapBoardStateToPositions(data.board.grid));
+          setPlayer1Pieces(data.board.player1_pieces);
+          setPlayer2Pieces(data.board.player2_pieces);
+          setCurrentPlayer(data.current_player);
+          setPhase(data.phase);
+          setCurrentMoveIndex(ply);
+        }
+      })
+      .catch((error) => console.error("Error seeking the replay:", error));
+  }, [replayId, mapBoardStateToPositions]);
+
+  // Auto-replay steps through the record a move every REPLAY_STEP_MS
+  useEffect(() => {
+    if (!gameOptions?.autoReplay || !replayId || currentMoveIndex >= gameRecord.length) {
+      return;
+    }
+    const step = setTimeout(() => showReplayMove(currentMoveIndex + 1), REPLAY_STEP_MS);
+    return () => clearTimeout(step);
+  }, [gameOptions, gameRecord, replayId, currentMoveIndex, showReplayMove]);
 
   const playNextMove = () => {
     if (!gameRecord || !Array.isArray(gameRecord) || currentMoveIndex >= gameRecord.length) {
         console.log("No replay data available or replay complete.");
         return;
     }
-
-    const move = gameRecord[currentMoveIndex];
-    console.log("Applying replay move:", move);
-    applyMove(move);
-    setCurrentMoveIndex((index) => index + 1);
+    showReplayMove(currentMoveIndex + 1);
   };
 
 
   const placePiece = (position) => {
     const [x, y] = mapPositionToCoordinates(position);
-    fetch('/api/place', {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ x, y })
-    })
-      .then((res) => res.json())
+    sendAction('place', { x, y })
       .then((data) => {
         if (data.success) {
           updateBoardState(data);
@@ -170,6 +261,7 @@ const Board = ({ gameOptions, gameRecord = null, updateGameRecord }) => {
           console.log("Recording move in placePiece:", newMove);
 
           setRecordedMoves((prevMoves) => [...prevMoves, newMove]);
+          setUndoneMoves([]);
 
           if (data.mill_formed) {
             setMillFormed(true);
@@ -184,12 +276,7 @@ const Board = ({ gameOptions, gameRecord = null, updateGameRecord }) => {
 
   const removePiece = (position) => {
     const [x, y] = mapPositionToCoordinates(position);
-    fetch('/api/remove', {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ x, y })
-    })
-      .then((res) => res.json())
+    sendAction('remove', { x, y })
       .then((data) => {
         if (data.success) {
           updateBoardState(data);
@@ -199,6 +286,7 @@ const Board = ({ gameOptions, gameRecord = null, updateGameRecord }) => {
           console.log("Recording move in removePiece:", newMove);
   
           setRecordedMoves((prevMoves) => [...prevMoves, newMove]);
+          setUndoneMoves([]);
           setMillFormed(false);
         } else {
           showNotification(data.message, "error");
@@ -207,17 +295,30 @@ const Board = ({ gameOptions, gameRecord = null, updateGameRecord }) => {
       .catch((error) => console.error("Error removing piece:", error));
   };
 
+  // Ask the server where the selected piece may go so those points can be highlighted
+  useEffect(() => {
+    if (!selectedPiece || !gameOptions?.gameId) {
+      setLegalTargets([]);
+      return;
+    }
+    const [fromX, fromY] = mapPositionToCoordinates(selectedPiece);
+    const query = new URLSearchParams({ game_id: gameOptions.gameId, from_x: fromX, from_y: fromY });
+    fetch(`/api/legal-moves?${query}`)
+      .then((res) => res.json())
+      .then((data) => {
+        if (data.success) {
+          setLegalTargets(data.moves.map((move) => coordinatesToPosition(move.to_x, move.to_y)));
+        }
+      })
+      .catch((error) => console.error("Error fetching legal moves:", error));
+  }, [selectedPiece, gameOptions]);
+
   const movePiece = (position) => {
     if (selectedPiece) {
       const [fromX, fromY] = mapPositionToCoordinates(selectedPiece);
       const [toX, toY] = mapPositionToCoordinates(position);
   
-      fetch('/api/move', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ from_x: fromX, from_y: fromY, to_x: toX, to_y: toY })
-      })
-        .then((res) => res.json())
+      sendAction('move', { from_x: fromX, from_y: fromY, to_x: toX, to_y: toY })
         .then((data) => {
           if (data.success) {
             updateBoardState(data);
@@ -227,6 +328,7 @@ const Board = ({ gameOptions, gameRecord = null, updateGameRecord }) => {
             console.log("Recording move in movePiece:", newMove);
   
             setRecordedMoves((prevMoves) => [...prevMoves, newMove]);
+            setUndoneMoves([]);
   
             if (data.mill_formed) {
               setMillFormed(true);
@@ -297,11 +399,7 @@ const Board = ({ gameOptions, gameRecord = null, updateGameRecord }) => {
 
   const resetBoard = () => {
     console.log("Resetting the board...");
-    fetch('/api/reset', {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-    })
-      .then((res) => res.json())
+    sendAction('reset', {})
       .then((data) => {
         if (data.success) {
           updateBoardState(data);
@@ -314,6 +412,28 @@ const Board = ({ gameOptions, gameRecord = null, updateGameRecord }) => {
       .catch((error) => console.error("Error resetting the board:", error));
   };  
 
+  // Undo takes back one of our moves (with the computer's reply); redo plays it again
+  const stepHistory = (type) => {
+    sendAction(type, {})
+      .then((data) => {
+        if (data.success) {
+          updateBoardState(data);
+          setMillFormed(!!data.waiting_for_removal);
+          setSelectedPiece(null);
+          if (type === 'undo' && recordedMoves.length > 0) {
+            setUndoneMoves((moves) => [...moves, recordedMoves[recordedMoves.length - 1]]);
+            setRecordedMoves((moves) => moves.slice(0, -1));
+          } else if (type === 'redo' && undoneMoves.length > 0) {
+            setRecordedMoves((moves) => [...moves, undoneMoves[undoneMoves.length - 1]]);
+            setUndoneMoves((moves) => moves.slice(0, -1));
+          }
+        } else {
+          showNotification(data.message, "error");
+        }
+      })
+      .catch((error) => console.error(`Error during ${type}:`, error));
+  };
+
   const mapPositionToCoordinates = (position) => {
     const positionMapping = {
       'a1': [0, 0], 'd1': [0, 3], 'g1': [0, 6],
@@ -327,6 +447,12 @@ const Board = ({ gameOptions, gameRecord = null, updateGameRecord }) => {
     return positionMapping[position];
   };
 
+  const coordinatesToPosition = (x, y) =>
+    Object.keys(pieces).find((position) => {
+      const [px, py] = mapPositionToCoordinates(position);
+      return px === x && py === y;
+    });
+
   const saveRecordedGame = () => {
     console.log("Saving Recorded Game...");
     const jsonString = JSON.stringify({ moves: recordedMoves }, null, 2);
@@ -400,7 +526,9 @@ const Board = ({ gameOptions, gameRecord = null, updateGameRecord }) => {
                 key={position}
                 className={`spot ${position} ${isOccupied ? "occupied" : ""} ${
                   isSelectable ? "selectable" : ""
-                } ${selectedPiece === position ? "selected" : ""}`}
+                } ${selectedPiece === position ? "selected" : ""} ${
+                  legalTargets.includes(position) ? "legal-target" : ""
+                }`}
                 style={{ cursor: cursorStyle }}
                 onClick={() => !isReplayMode && handleClick(position)} // Disable clicks in replay mode
               >
@@ -432,15 +560,31 @@ const Board = ({ gameOptions, gameRecord = null, updateGameRecord }) => {
       {/* Replay Controls */}
       {isReplayMode && (
         <div className="replay-controls">
-          <button onClick={playNextMove} disabled={currentMoveIndex >= gameRecord.length}>
+          <button onClick={() => showReplayMove(currentMoveIndex - 1)} disabled={!replayId || currentMoveIndex <= 0}>
+            Previous Move
+          </button>
+          <input
+            type="range"
+            min={0}
+            max={gameRecord.length}
+            value={currentMoveIndex}
+            disabled={!replayId}
+            onChange={(event) => showReplayMove(Number(event.target.value))}
+          />
+          <span>Move {currentMoveIndex} of {gameRecord.length}</span>
+          <button onClick={playNextMove} disabled={!replayId || currentMoveIndex >= gameRecord.length}>
             Next Move
           </button>
         </div>
       )}
   
-      {/* Reset Board Button */}
+      {/* Undo, Redo and Reset Board Buttons */}
       {!isReplayMode && (
-        <button className="reset-button" onClick={resetBoard}>Reset Board</button>
+        <div className="history-controls">
+          <button className="reset-button" onClick={() => stepHistory('undo')}>Undo</button>
+          <button className="reset-button" onClick={() => stepHistory('redo')}>Redo</button>
+          <button className="reset-button" onClick={resetBoard}>Reset Board</button>
+        </div>
       )}
     </div>
   );
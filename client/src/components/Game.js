@@ -22,6 +22,7 @@ const Game = () => {
             fetch('/api/reset', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ game_id: options.gameId })
             })
             .then(res => {
                 if (!res.ok) {
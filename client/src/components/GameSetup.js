@@ -23,7 +23,7 @@ const GameSetup = ({ startGame }) => {
             .then(res => res.json())
             .then(data => {
                 if (data.success) {
-                    startGame(options);
+                    startGame({ ...options, gameId: data.game_id });
                 }
             })
             .catch(error => console.error('Error setting up the game:', error));
@@ -47,8 +47,22 @@ const GameSetup = ({ startGame }) => {
                 console.log("Parsed Game Record:", parsedRecord);
 
                 if (parsedRecord && Array.isArray(parsedRecord.moves)) {
-                    setGameRecord(parsedRecord); // Store the entire record
-                    alert('Game record uploaded successfully! Click Replay Game to start.');
+                    // Check the whole record on the server in one round trip before replaying it
+                    fetch('/api/replay', {
+                        method: 'POST',
+                        headers: { 'Content-Type': 'application/json' },
+                        body: JSON.stringify({ moves: parsedRecord.moves, game_type: gameType })
+                    })
+                        .then(res => res.json())
+                        .then(data => {
+                            if (data.success) {
+                                setGameRecord(parsedRecord); // Store the entire record
+                                alert('Game record uploaded successfully! Click Replay Game to start.');
+                            } else {
+                                alert(`Invalid game record: ${data.message}`);
+                            }
+                        })
+                        .catch(error => console.error('Error validating the game record:', error));
                 } else {
                     alert('Invalid JSON structure. Ensure it has a "moves" array.');
                 }